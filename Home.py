@@ -12,20 +12,30 @@ project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 sys.path.insert(0, project_root)
 summary_dir = os.path.join(os.path.dirname(__file__), 'summary')
 sys.path.append(summary_dir)
+
+# Subapps are imported the first time their page is opened, not at start-up,
+# so the landing page does not pull in OCR, PDF, tokenizer and LLM libraries.
+# The imported module (and the process-wide resources it creates through its
+# get_* helpers: OCR readers, LLM gateway, template registry, rule corpus)
+# is then shared by every rerun and session
+SUBAPPS = {
+    "Summary": "summary.app",
+    # "Compliance": "compliance.app",
+    "Drafting": "drafting.app",
+}
+
+@st.cache_resource(show_spinner="Loading...")
+def _import_subapp(module_name):
+    return importlib.import_module(module_name)
+
 def load_module(module_name):
     try:
-        module = importlib.import_module(module_name)
-        return module
+        return _import_subapp(module_name)
     except ImportError as e:
         st.error(f"Failed to import {module_name}: {str(e)}")
         st.error(f"Traceback: {traceback.format_exc()}")
         return None
 
-# Import the app modules
-summary_app = load_module("summary.app")
-# compliance_app = load_module("compliance.app")
-drafting_app = load_module("drafting.app")
-
 def main():
     st.title("Welcome to LegalEase")
     
@@ -56,12 +66,8 @@ def main():
         # st.write("**Compliance**: Check and ensure legal compliance")
         st.write("**Drafting**: Draft legal documents with assistance")
     
-    elif st.session_state.page == "Summary":
-        run_subapp(summary_app, "Summary")
-    # elif st.session_state.page == "Compliance":
-    #     run_subapp(compliance_app, "Compliance")
-    elif st.session_state.page == "Drafting":
-        run_subapp(drafting_app, "Drafting")
+    elif st.session_state.page in SUBAPPS:
+        run_subapp(load_module(SUBAPPS[st.session_state.page]), st.session_state.page)
     
     st.sidebar.markdown("---")
     st.sidebar.write("© 2025 LegalEase. All rights reserved.")
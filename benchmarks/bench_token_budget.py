@@ -0,0 +1,106 @@
+"""Benchmark incremental token accounting in summary/document_processor.
+
+Builds large synthetic PDF and DOCX files and compares the old approach of
+re-encoding the whole growing string after every page/paragraph against the
+running TokenBudget used by the extractors now.
+
+    python benchmarks/bench_token_budget.py --pages 300 --paragraphs 3000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import docx
+import fitz  # PyMuPDF
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, project_root)
+
+from summary.document_processor import (
+    extract_text_from_docx,
+    extract_text_from_pdf,
+    num_tokens_from_string,
+    truncate_text,
+)
+
+CLAUSE = (
+    "The Service Provider shall indemnify and hold harmless the Client against all claims, "
+    "losses and liabilities arising out of any breach of this Agreement, subject to the "
+    "limitations set out in clause {n}. "
+)
+
+def build_pdf(path, pages):
+    doc = fitz.open()
+    for n in range(pages):
+        page = doc.new_page()
+        page.insert_textbox(fitz.Rect(40, 40, 560, 800), CLAUSE.format(n=n) * 12, fontsize=9)
+    doc.save(path)
+    doc.close()
+
+def build_docx(path, paragraphs):
+    doc = docx.Document()
+    for n in range(paragraphs):
+        doc.add_paragraph(CLAUSE.format(n=n))
+    doc.save(path)
+
+def legacy_extract_text_from_pdf(file_path):
+    text = ''
+    pdf_document = fitz.open(file_path)
+    for page_num in range(len(pdf_document)):
+        text += pdf_document[page_num].get_text()
+        if num_tokens_from_string(text) >= 7500:
+            break
+    pdf_document.close()
+    return truncate_text(text)
+
+def legacy_extract_text_from_docx(file_path):
+    text = ''
+    doc = docx.Document(file_path)
+    for para in doc.paragraphs:
+        text += para.text + '\n'
+        if num_tokens_from_string(text) >= 7500:
+            break
+    return truncate_text(text)
+
+def best_of(func, path, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(path)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=300)
+    parser.add_argument("--paragraphs", type=int, default=3000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    # Warm up the tiktoken encoding so it is not counted in the first run
+    num_tokens_from_string("warm up")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pdf_path = os.path.join(tmp_dir, "synthetic.pdf")
+        docx_path = os.path.join(tmp_dir, "synthetic.docx")
+        build_pdf(pdf_path, args.pages)
+        build_docx(docx_path, args.paragraphs)
+
+        cases = [
+            # One worker, like the legacy loop, so the process pool's start-up is
+            # not counted against the token accounting being measured
+            (f"PDF  ({args.pages} pages)", pdf_path, legacy_extract_text_from_pdf,
+             lambda path: extract_text_from_pdf(path, workers=1)),
+            (f"DOCX ({args.paragraphs} paragraphs)", docx_path, legacy_extract_text_from_docx, extract_text_from_docx),
+        ]
+        for label, path, legacy, current in cases:
+            legacy_time = best_of(legacy, path, args.repeat)
+            current_time = best_of(current, path, args.repeat)
+            print(f"{label}: legacy {legacy_time * 1000:8.1f} ms | "
+                  f"budget {current_time * 1000:8.1f} ms | "
+                  f"speedup {legacy_time / current_time:5.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+import re
+
+import tiktoken
+
+from common.clauses import clause_boundaries
+
+_PARAGRAPH_BREAK = re.compile(r"\n[ \t]*\n")
+_SENTENCE_END = re.compile(r"(?<=[.;:])\s+")
+
+def _split_offsets(text, cuts):
+    """Split text at the given ascending offsets, keeping all characters."""
+    pieces = []
+    start = 0
+    for cut in cuts:
+        if cut > start:
+            pieces.append(text[start:cut])
+            start = cut
+    if start < len(text):
+        pieces.append(text[start:])
+    return pieces
+
+def _split_at(text, pattern, at_end=False):
+    """Split text at every match of pattern, keeping all characters."""
+    return _split_offsets(text, [m.end() if at_end else m.start() for m in pattern.finditer(text)])
+
+def split_clauses(text):
+    """Split text into clause-sized segments, each starting at a numbered clause or section heading.
+
+    Boundaries come from common.clauses; lettered and roman sub-clauses
+    ("(a)", "(iv)") stay with the clause they belong to.
+    """
+    return [segment for segment in _split_offsets(text, clause_boundaries(text)) if segment.strip()]
+
+def _fit(segment, max_tokens, encoding):
+    """Break a segment into (text, token_count) pieces of at most max_tokens each."""
+    tokens = encoding.encode(segment)
+    if len(tokens) <= max_tokens:
+        return [(segment, len(tokens))]
+    for pattern in (_PARAGRAPH_BREAK, _SENTENCE_END):
+        parts = _split_at(segment, pattern, at_end=True)
+        if len(parts) > 1:
+            return [piece for part in parts for piece in _fit(part, max_tokens, encoding)]
+    # A single run-on sentence: cut on token boundaries
+    return [
+        (encoding.decode(tokens[i:i + max_tokens]), len(tokens[i:i + max_tokens]))
+        for i in range(0, len(tokens), max_tokens)
+    ]
+
+def split_into_chunks(text, max_tokens=3000, encoding_name="cl100k_base"):
+    """Split a document into chunks of at most max_tokens, breaking on clause boundaries.
+
+    Clauses are packed greedily into chunks. A clause that is too long on its
+    own is broken at paragraph breaks, then at sentence ends, and only as a
+    last resort in the middle of a sentence.
+    """
+    if not text.strip():
+        return []
+    encoding = tiktoken.get_encoding(encoding_name)
+    pieces = []
+    for segment in _split_offsets(text, clause_boundaries(text)):
+        pieces.extend(_fit(segment, max_tokens, encoding))
+
+    chunks = []
+    current = []
+    current_tokens = 0
+    for piece, tokens in pieces:
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append(''.join(current))
+            current = []
+            current_tokens = 0
+        current.append(piece)
+        current_tokens += tokens
+    if current:
+        chunks.append(''.join(current))
+    return chunks
+
+def count_tokens(text, encoding_name="cl100k_base"):
+    return len(tiktoken.get_encoding(encoding_name).encode(text))
+
+def merge_unique(lists):
+    """Concatenate lists, dropping repeated items while keeping first-seen order.
+
+    A string in place of a list (a model answering "issues": "...") counts
+    as a one-item list.
+    """
+    merged = []
+    seen = set()
+    for items in lists:
+        if isinstance(items, str):
+            items = [items]
+        for item in items or []:
+            marker = item if isinstance(item, str) else repr(item)
+            if marker in seen:
+                continue
+            seen.add(marker)
+            merged.append(item)
+    return merged
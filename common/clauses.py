@@ -0,0 +1,107 @@
+import re
+
+# Clause markers at the start of a line, in one pattern so a document is
+# segmented in a single pass:
+#   heading  "ARTICLE IV", "Section 5:", "SCHEDULE A", "धारा 3"
+#   decimal  "1.", "4.2", "4.2.1", "12)", "१.२" (Devanagari digits)
+#   alpha    "(a)", "b)", "(क)"
+#   roman    "(iv)", "ii)"
+# A heading keyword needs a number, a roman numeral or a capital letter, then
+# the end of the line, a separator or an all-caps title, so "Part-time
+# employees" or "Section 5 of the Act applies" stay running text. A bare
+# number needs a "." or ")" or a second level, and every number must be
+# followed by something other than a lowercase word, so a line such as
+# "30 days", "2019" or "1.5 lakhs per annum" does not open a clause
+_DIGIT = "[0-9०-९]"
+_MARKER = re.compile(
+    r"^[ \t]*(?:"
+    r"(?P<heading>(?:article|section|clause|schedule|annexure|chapter|part|अनुच्छेद|धारा|खंड|अनुसूची)"
+    r"[ \t]+(?:[0-9०-९]+|[ivxlcdm]+|(?-i:[A-Z]))\b)"
+    r"(?=[ \t]*(?:[.:\-–—]|$)|[ \t]+(?-i:[^\sa-z][^a-z\n]*)$)"
+    rf"|(?P<decimal>{_DIGIT}{{1,3}}(?:\.{_DIGIT}{{1,3}})+\.?|{_DIGIT}{{1,3}}[.)])(?=[ \t]+(?-i:[^\sa-z]))"
+    r"|(?P<roman>\(?(?:[ivx]{2,}|[ivx](?=\)))\))(?=[ \t]+\S)"
+    r"|(?P<alpha>\(?[a-zक-ह]\))(?=[ \t]+\S)"
+    r")",
+    re.IGNORECASE | re.MULTILINE,
+)
+
+# Nesting order: headings hold numbered clauses, "1." holds "1.1", and
+# lettered and roman sub-clauses sit under the innermost numbered clause
+_ALPHA_RANK = 50
+_ROMAN_RANK = 60
+
+def _number(label):
+    """Normalized dotted number of a decimal marker ("१.२" -> "1.2")."""
+    return ".".join(str(int(part)) for part in re.findall(r"[0-9०-९]+", label))
+
+def _classify(match, stack):
+    """(kind, label, rank) of a marker match; a lone "(i)" after "(h)" is a letter, not a numeral."""
+    kind = match.lastgroup
+    label = match.group(kind).strip()
+    if kind == "heading":
+        return kind, " ".join(label.split()), 0
+    if kind == "decimal":
+        number = _number(label)
+        return kind, number, number.count(".") + 1
+    letter = label.strip("()").lower()
+    if kind == "roman" or letter in ("i", "v", "x"):
+        previous = next((node for node in reversed(stack) if node["kind"] in ("alpha", "roman")), None)
+        follows_letter = (
+            previous is not None and previous["kind"] == "alpha"
+            and len(letter) == 1 and ord(previous["label"]) + 1 == ord(letter)
+        )
+        if not follows_letter:
+            return "roman", letter, _ROMAN_RANK
+    return "alpha", letter, _ALPHA_RANK
+
+def segment_clauses(text):
+    """Parse text into a tree of sections and clauses with character offsets.
+
+    Returns the root node. Every node is a dict with "kind" ("document",
+    "heading", "decimal", "alpha" or "roman"), "label" (e.g. "ARTICLE IV",
+    "4.2", "b", "iv"), "start" and "end" offsets into text (a node spans its
+    marker line up to the next marker that is not nested in it), "title"
+    (the rest of the marker line) and "children". Text before the first
+    marker belongs to the root alone. Runs in one pass over the text.
+    """
+    root = {"kind": "document", "label": "", "start": 0, "end": len(text), "title": "", "children": [], "rank": -1}
+    stack = [root]
+    for match in _MARKER.finditer(text):
+        kind, label, rank = _classify(match, stack)
+        while stack[-1]["rank"] >= rank:
+            stack.pop()["end"] = match.start()
+        line_end = text.find("\n", match.end())
+        node = {
+            "kind": kind,
+            "label": label,
+            "start": match.start(),
+            "end": len(text),
+            "title": text[match.end():line_end if line_end >= 0 else len(text)].strip(" \t.:-–—"),
+            "children": [],
+            "rank": rank,
+        }
+        stack[-1]["children"].append(node)
+        stack.append(node)
+    return root
+
+def iter_clauses(node, depth=0):
+    """Yield (depth, node) for every clause under node, in document order."""
+    for child in node["children"]:
+        yield depth, child
+        yield from iter_clauses(child, depth + 1)
+
+def clause_marker(line):
+    """(kind, label, level) of the marker opening a single line, or None.
+
+    level is 0 for a heading, the number of parts for a decimal marker
+    ("4.2" is 2) and None for lettered and roman sub-clauses.
+    """
+    match = _MARKER.match(line)
+    if match is None:
+        return None
+    kind, label, rank = _classify(match, [])
+    return kind, label, rank if kind in ("heading", "decimal") else None
+
+def clause_boundaries(text, kinds=("heading", "decimal")):
+    """Start offsets of every clause of the given kinds, ascending."""
+    return [node["start"] for _, node in iter_clauses(segment_clauses(text)) if node["kind"] in kinds]
@@ -0,0 +1,117 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+DEFAULT_CACHE_ROOT = os.path.join(os.path.expanduser("~"), ".cache", "legalease")
+
+def cache_root():
+    """Root directory for on-disk caches, overridable with LEGALEASE_CACHE_DIR."""
+    return os.environ.get("LEGALEASE_CACHE_DIR", DEFAULT_CACHE_ROOT)
+
+def file_digest(file_path, chunk_size=1024 * 1024):
+    """SHA-256 hex digest of a file's bytes."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class DiskCache:
+    """Size-bounded, least-recently-used cache of JSON values stored as files.
+
+    Every entry is one file named after its key. Reads bump the file's mtime
+    and writes evict the least recently used files once the directory grows
+    past max_bytes. Entries older than ttl seconds (if given) count as
+    misses. Writes go through a temporary file and os.replace, so concurrent
+    Streamlit sessions never see a half-written entry.
+    """
+    def __init__(self, directory, max_bytes=512 * 1024 * 1024, ttl=None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (OSError, ValueError) as e:
+            print(f"Discarding unreadable cache entry {path}: {e}")
+            self.delete(key)
+            self.misses += 1
+            return None
+        if not isinstance(entry, dict) or "value" not in entry:
+            # Written by an older version of the cache
+            self.delete(key)
+            self.misses += 1
+            return None
+        if self.ttl is not None and time.time() - entry.get("stored_at", 0) > self.ttl:
+            self.delete(key)
+            self.misses += 1
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        return entry["value"]
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses}
+
+    def set(self, key, value):
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"stored_at": time.time(), "value": value}, f, ensure_ascii=False)
+            os.replace(tmp_path, self._path(key))
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self._evict()
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def _evict(self):
+        with self._lock:
+            entries = []
+            total = 0
+            for entry in os.scandir(self.directory):
+                if not entry.name.endswith(".json"):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+            if total <= self.max_bytes:
+                return
+            # Oldest access first
+            entries.sort()
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                except FileNotFoundError:
+                    pass
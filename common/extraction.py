@@ -0,0 +1,99 @@
+"""Record helpers and the PDF page-range skeleton shared by the extractors.
+
+Both the summary and the compliance extractors read a document as records
+{"page", "text", "source"} ("text" for a PDF text layer, "paragraph" for a
+DOCX paragraph, "ocr" for an embedded image, "image" for an image file).
+PDF pages are read in ranges across the process pool (common.parallel);
+each extractor supplies only its OCR step.
+"""
+from functools import partial
+import io
+
+import fitz  # PyMuPDF
+from PIL import Image
+
+from common.parallel import map_page_ranges
+
+def record_fragment(record):
+    """The piece of flat document text a record contributes."""
+    if record["source"] == "ocr":
+        return '\n' + record["text"]
+    if record["source"] == "paragraph":
+        return record["text"] + '\n'
+    return record["text"]
+
+def records_to_text(records):
+    """Join extraction records back into flat document text."""
+    return ''.join(record_fragment(record) for record in records)
+
+def extract_page_range(file_path, start, stop, ocr, ocr_plan=None):
+    """Extract pages [start, stop) as {"page", "text", "ocr"} records, one per page.
+
+    ocr is a module-level function (or a partial of one) taking a list of
+    PIL images and returning one text per image. It gets the images of every
+    page in the range in one call, and each text is attached back to the
+    page its image came from, in page order; empty texts are dropped.
+    ocr_plan maps page numbers to the image xrefs worth OCR'ing (see
+    common.ocr_policy.plan_pdf_ocr); without one, every image is OCR'd.
+    """
+    pages = []
+    images = []  # (index into pages, PIL image)
+    pdf_document = fitz.open(file_path)
+    try:
+        for page_num in range(start, stop):
+            record = {"page": page_num, "text": "", "ocr": []}
+            try:
+                page = pdf_document[page_num]
+                record["text"] = page.get_text()
+
+                if ocr_plan is None:
+                    xrefs = [img[0] for img in page.get_images(full=True)]
+                else:
+                    xrefs = ocr_plan.get(page_num, [])
+                for xref in xrefs:
+                    image_bytes = pdf_document.extract_image(xref)["image"]
+                    images.append((len(pages), Image.open(io.BytesIO(image_bytes))))
+            except Exception as e:
+                print(f"Error processing page {page_num}: {e}")
+            pages.append(record)
+    finally:
+        pdf_document.close()
+
+    if images:
+        image_texts = ocr([image for _, image in images])
+        for (page_index, _), image_text in zip(images, image_texts):
+            if image_text:
+                pages[page_index]["ocr"].append(image_text)
+    return pages
+
+def page_records(page):
+    """Split an extracted page into its text layer record and one record per OCR'd image."""
+    yield {"page": page["page"], "text": page["text"], "source": "text"}
+    for ocr_text in page["ocr"]:
+        yield {"page": page["page"], "text": ocr_text, "source": "ocr"}
+
+def iter_pdf(file_path, ocr, workers=None, plan_ocr=None, first_page=0):
+    """Yield the records of a PDF in page order, from first_page on.
+
+    plan_ocr, if given, is called with the open document and returns the
+    ocr_plan for extract_page_range.
+    """
+    try:
+        pdf_document = fitz.open(file_path)
+    except Exception as e:
+        raise ValueError(f"Error opening PDF file: {e}")
+    try:
+        page_count = len(pdf_document)
+        ocr_plan = plan_ocr(pdf_document) if plan_ocr is not None else None
+    finally:
+        pdf_document.close()
+
+    # Pages are split across worker processes (see common.parallel) and come
+    # back in page order; closing the generator cancels ranges not yet started
+    extract_range = partial(extract_page_range, ocr=ocr, ocr_plan=ocr_plan)
+    pages = map_page_ranges(extract_range, file_path, page_count, workers, first_page)
+    try:
+        for page in pages:
+            yield from page_records(page)
+    finally:
+        pages.close()
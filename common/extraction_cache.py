@@ -0,0 +1,49 @@
+import os
+
+from common.disk_cache import DiskCache, cache_root, file_digest
+
+_cache = None
+
+def get_extraction_cache():
+    """Process-wide cache of extracted document text, keyed by file content.
+
+    Returns None when the cache directory cannot be created, in which case
+    callers simply extract without caching.
+    """
+    global _cache
+    if _cache is None:
+        max_mb = int(os.environ.get("LEGALEASE_EXTRACTION_CACHE_MB", "512"))
+        try:
+            _cache = DiskCache(os.path.join(cache_root(), "extraction"), max_bytes=max_mb * 1024 * 1024)
+        except OSError as e:
+            print(f"Extraction cache disabled: {e}")
+            return None
+    return _cache
+
+def extraction_key(file_path, extractor_version):
+    """Cache key for a file: SHA-256 of its bytes plus the extractor that produced the text."""
+    return f"{file_digest(file_path)}-{extractor_version}"
+
+def lookup(file_path, extractor_version, use_cache=True):
+    """Return (cache, key, cached value or None) for a file.
+
+    cache is None when caching is turned off or unavailable, in which case
+    store() is a no-op.
+    """
+    cache = get_extraction_cache() if use_cache else None
+    if cache is None:
+        return None, None, None
+    try:
+        key = extraction_key(file_path, extractor_version)
+    except OSError as e:
+        print(f"Skipping extraction cache: {e}")
+        return None, None, None
+    return cache, key, cache.get(key)
+
+def store(cache, key, value):
+    if cache is None:
+        return
+    try:
+        cache.set(key, value)
+    except OSError as e:
+        print(f"Error writing extraction cache: {e}")
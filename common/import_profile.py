@@ -0,0 +1,111 @@
+"""Start-up cost report: import time and memory of each entry point.
+
+Every target module is imported in a fresh interpreter with -X importtime,
+with the same sys.path setup as Home.py. The report gives the total import
+time, the peak memory after the import and the packages that cost the most
+(self time summed per top-level package). In CI, --max-ms and --max-mb
+make the run fail when a target grows past a budget, and --json keeps the
+numbers as an artifact.
+
+    python -m common.import_profile
+    python -m common.import_profile Home drafting.app --max-ms 2000 --json import_profile.json
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_TARGETS = ["Home", "summary.app", "drafting.app", "compliance.app", "service.app"]
+
+_IMPORT_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)\s*$")
+
+# Run in the child: Home.py's path setup, the import, then the peak RSS
+_CHILD = (
+    "import os, sys, resource; "
+    "sys.path.append(os.path.join(os.getcwd(), 'summary')); "
+    "import {target}; "
+    "print('peak-rss-kb', resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)"
+)
+
+def parse_importtime(stderr):
+    """[(module, self us, cumulative us, depth)] from -X importtime output."""
+    entries = []
+    for line in stderr.splitlines():
+        match = _IMPORT_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            entries.append((module, int(self_us), int(cumulative_us), len(indent) // 2))
+    return entries
+
+def profile_import(target, top=10):
+    """Import cost of one module: {"target", "ok", "total_ms", "peak_rss_mb", "packages", "error"}."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _CHILD.format(target=target)],
+        cwd=PROJECT_ROOT, capture_output=True, text=True,
+    )
+    entries = parse_importtime(completed.stderr)
+    # The target's own line comes after every import nested under it
+    index = next((i for i, entry in enumerate(entries) if entry[0] == target and entry[3] == 0), None)
+    subtree = []
+    if index is not None:
+        start = index
+        while start > 0 and entries[start - 1][3] > 0:
+            start -= 1
+        subtree = entries[start:index + 1]
+    packages = {}
+    for module, self_us, _, _ in subtree:
+        package = module.split(".")[0]
+        packages[package] = packages.get(package, 0) + self_us
+    peak = re.search(r"peak-rss-kb (\d+)", completed.stdout)
+    report = {
+        "target": target,
+        "ok": completed.returncode == 0,
+        "total_ms": round(subtree[-1][2] / 1000, 1) if subtree else 0.0,
+        "peak_rss_mb": round(int(peak.group(1)) / 1024, 1) if peak else None,
+        "packages": [
+            {"package": package, "ms": round(us / 1000, 1)}
+            for package, us in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+        ],
+        "error": None,
+    }
+    if completed.returncode != 0:
+        report["error"] = (completed.stderr.strip().splitlines() or ["import failed"])[-1]
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Report the import time and memory of LegalEase entry points.")
+    parser.add_argument("targets", nargs="*", default=DEFAULT_TARGETS)
+    parser.add_argument("--top", type=int, default=10, help="packages listed per target")
+    parser.add_argument("--max-ms", type=float, default=None, help="fail if a target takes longer to import")
+    parser.add_argument("--max-mb", type=float, default=None, help="fail if a target's peak memory is higher")
+    parser.add_argument("--json", default=None, help="also write the report to this file")
+    args = parser.parse_args()
+
+    reports = [profile_import(target, args.top) for target in args.targets]
+    failures = []
+    for report in reports:
+        if not report["ok"]:
+            print(f"{report['target']}: import failed: {report['error']}")
+            failures.append(report["target"])
+            continue
+        print(f"{report['target']}: {report['total_ms']:.1f} ms, peak RSS {report['peak_rss_mb']} MB")
+        for package in report["packages"]:
+            print(f"    {package['ms']:8.1f} ms  {package['package']}")
+        if args.max_ms is not None and report["total_ms"] > args.max_ms:
+            failures.append(f"{report['target']} ({report['total_ms']:.0f} ms > {args.max_ms:.0f} ms)")
+        if args.max_mb is not None and (report["peak_rss_mb"] or 0) > args.max_mb:
+            failures.append(f"{report['target']} ({report['peak_rss_mb']} MB > {args.max_mb} MB)")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(reports, f, indent=2)
+    if failures:
+        print(f"Over budget or failed: {', '.join(failures)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
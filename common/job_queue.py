@@ -0,0 +1,358 @@
+"""Persistent local queue for long extraction, OCR and analysis jobs.
+
+Jobs live in a SQLite database (LEGALEASE_JOB_DB, default
+<cache root>/jobs/queue.sqlite3), so they survive browser refreshes and
+server restarts and are visible to every process on the machine: the
+Streamlit pages, the HTTP service and the workers.
+
+A job names its handler as "module:function" plus JSON parameters. Input
+files are moved into a per-job directory that is removed when the job
+ends. Handlers run in worker processes (python -m common.job_queue work) and
+split their work into named steps; the result of every finished step is
+checkpointed, so a job whose worker died is picked up again and resumes
+after its last finished step. At most LEGALEASE_MAX_JOBS jobs run at once
+per machine, however many workers are polling.
+"""
+import argparse
+import importlib
+import json
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+import uuid
+
+from common.disk_cache import cache_root
+
+# A running job whose worker has not sent a heartbeat for this long is
+# considered dead and handed to another worker, at most MAX_ATTEMPTS times
+HEARTBEAT_INTERVAL = 10
+HEARTBEAT_TIMEOUT = 60
+MAX_ATTEMPTS = 3
+
+# Idle workers poll this often (seconds) and exit after IDLE_EXIT seconds
+# without work; start_workers starts new ones when jobs are submitted
+POLL_INTERVAL = 1.0
+IDLE_EXIT = 300
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    handler TEXT NOT NULL,
+    status TEXT NOT NULL,
+    params TEXT NOT NULL,
+    checkpoint TEXT NOT NULL DEFAULT '{}',
+    progress REAL NOT NULL DEFAULT 0,
+    message TEXT NOT NULL DEFAULT '',
+    result TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    heartbeat REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at);
+"""
+
+_JSON_FIELDS = ("params", "checkpoint", "result")
+
+def queue_path():
+    return os.environ.get("LEGALEASE_JOB_DB", os.path.join(cache_root(), "jobs", "queue.sqlite3"))
+
+def max_running_jobs():
+    """Cap on jobs running at once on this machine, from LEGALEASE_MAX_JOBS (default 2)."""
+    try:
+        return max(1, int(os.environ.get("LEGALEASE_MAX_JOBS", "2")))
+    except ValueError:
+        print(f"Ignoring invalid LEGALEASE_MAX_JOBS value: {os.environ['LEGALEASE_MAX_JOBS']}")
+        return 2
+
+class JobQueue:
+    def __init__(self, path=None, max_running=None, ttl=7 * 24 * 3600):
+        self.path = path or queue_path()
+        self.max_running = max_running or max_running_jobs()
+        # Finished jobs are deleted after ttl seconds
+        self.ttl = ttl
+        self.files_dir = os.path.join(os.path.dirname(os.path.abspath(self.path)), "files")
+        os.makedirs(self.files_dir, exist_ok=True)
+        with self._connect() as connection:
+            connection.executescript(_SCHEMA)
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        connection.row_factory = sqlite3.Row
+        connection.execute("PRAGMA journal_mode=WAL")
+        return _Connection(connection)
+
+    def _row(self, row):
+        if row is None:
+            return None
+        job = dict(row)
+        for field in _JSON_FIELDS:
+            if job[field] is not None:
+                job[field] = json.loads(job[field])
+        return job
+
+    def job_dir(self, job_id):
+        return os.path.join(self.files_dir, job_id)
+
+    def submit(self, handler, params, files=None):
+        """Queue a job and return its id.
+
+        files maps parameter names to paths of input files; each file is
+        moved into the job's directory and its new path stored under that
+        name in params. If the job cannot be queued, files already moved
+        are removed and the rest are left where they are.
+        """
+        job_id = uuid.uuid4().hex
+        params = dict(params)
+        try:
+            if files:
+                os.makedirs(self.job_dir(job_id), exist_ok=True)
+                for name, path in files.items():
+                    target = os.path.join(self.job_dir(job_id), name + os.path.splitext(path)[1])
+                    shutil.move(path, target)
+                    params[name] = target
+            with self._connect() as connection:
+                connection.execute(
+                    "INSERT INTO jobs (id, handler, status, params, created_at) VALUES (?, ?, 'queued', ?, ?)",
+                    (job_id, handler, json.dumps(params), time.time()),
+                )
+        except Exception:
+            # Files already moved go with the job that was never queued
+            shutil.rmtree(self.job_dir(job_id), ignore_errors=True)
+            raise
+        return job_id
+
+    def get(self, job_id):
+        """The job as a dict (JSON fields decoded), or None if it is unknown."""
+        with self._connect() as connection:
+            return self._row(connection.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone())
+
+    def list_jobs(self, status=None, limit=50):
+        """Most recent jobs first, optionally only those with one status."""
+        query = "SELECT * FROM jobs"
+        args = ()
+        if status:
+            query += " WHERE status = ?"
+            args = (status,)
+        with self._connect() as connection:
+            rows = connection.execute(query + " ORDER BY created_at DESC LIMIT ?", args + (limit,)).fetchall()
+        return [self._row(row) for row in rows]
+
+    def claim(self):
+        """Mark the oldest queued job as running and return it, or None if nothing can start.
+
+        Jobs of dead workers are requeued (or failed after MAX_ATTEMPTS)
+        first, and nothing starts while max_running jobs are running.
+        """
+        now = time.time()
+        with self._connect() as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            stale = connection.execute(
+                "SELECT id, attempts FROM jobs WHERE status = 'running' AND heartbeat < ?",
+                (now - HEARTBEAT_TIMEOUT,),
+            ).fetchall()
+            abandoned = []
+            for row in stale:
+                if row["attempts"] >= MAX_ATTEMPTS:
+                    abandoned.append(row["id"])
+                    connection.execute(
+                        "UPDATE jobs SET status = 'failed', error = ?, finished_at = ? WHERE id = ?",
+                        (f"Worker stopped responding {row['attempts']} times", now, row["id"]),
+                    )
+                else:
+                    connection.execute("UPDATE jobs SET status = 'queued', message = 'Resuming' WHERE id = ?", (row["id"],))
+            connection.execute(
+                "DELETE FROM jobs WHERE status IN ('done', 'failed') AND finished_at < ?", (now - self.ttl,)
+            )
+
+            running = connection.execute("SELECT COUNT(*) FROM jobs WHERE status = 'running'").fetchone()[0]
+            row = None
+            if running < self.max_running:
+                row = connection.execute(
+                    "SELECT * FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+                ).fetchone()
+            if row is not None:
+                connection.execute(
+                    "UPDATE jobs SET status = 'running', attempts = attempts + 1, "
+                    "started_at = COALESCE(started_at, ?), heartbeat = ? WHERE id = ?",
+                    (now, now, row["id"]),
+                )
+            connection.execute("COMMIT")
+        for job_id in abandoned:
+            shutil.rmtree(self.job_dir(job_id), ignore_errors=True)
+        return self.get(row["id"]) if row is not None else None
+
+    def update(self, job_id, progress=None, message=None, checkpoint=None):
+        """Record progress (0 to 1), a status message and/or a checkpoint; also counts as a heartbeat."""
+        fields = {"heartbeat": time.time()}
+        if progress is not None:
+            fields["progress"] = min(1.0, max(0.0, progress))
+        if message is not None:
+            fields["message"] = message
+        if checkpoint is not None:
+            fields["checkpoint"] = json.dumps(checkpoint)
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._connect() as connection:
+            connection.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", tuple(fields.values()) + (job_id,))
+
+    def finish(self, job_id, result=None, error=None):
+        """End a job as done (with its result) or failed (with an error message) and drop its files."""
+        with self._connect() as connection:
+            connection.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, progress = COALESCE(?, progress), finished_at = ? WHERE id = ?",
+                (
+                    "failed" if error is not None else "done",
+                    json.dumps(result) if error is None else None,
+                    error,
+                    1.0 if error is None else None,
+                    time.time(),
+                    job_id,
+                ),
+            )
+        shutil.rmtree(self.job_dir(job_id), ignore_errors=True)
+
+class _Connection:
+    """sqlite3 connection that is closed (not just committed) at the end of a with block."""
+    def __init__(self, connection):
+        self._connection = connection
+
+    def __enter__(self):
+        return self._connection
+
+    def __exit__(self, *exc_info):
+        if exc_info[0] is not None and self._connection.in_transaction:
+            self._connection.execute("ROLLBACK")
+        self._connection.close()
+
+class JobContext:
+    """What a handler sees of its job: params, checkpointed steps and progress reporting."""
+    def __init__(self, queue, job):
+        self.queue = queue
+        self.job_id = job["id"]
+        self.params = job["params"]
+        self.checkpoint = job["checkpoint"] or {}
+
+    def step(self, name, func):
+        """Return the result of step name, running func() only if no earlier attempt finished it."""
+        steps = self.checkpoint.setdefault("steps", {})
+        if name in steps:
+            return steps[name]
+        result = func()
+        steps[name] = result
+        self.save()
+        return result
+
+    def save(self):
+        """Write the checkpoint now, for handlers that keep partial state in it inside a step."""
+        self.queue.update(self.job_id, checkpoint=self.checkpoint)
+
+    def progress(self, fraction=None, message=None):
+        self.queue.update(self.job_id, progress=fraction, message=message)
+
+def _handler(name):
+    module_name, function_name = name.split(":")
+    return getattr(importlib.import_module(module_name), function_name)
+
+def run_job(queue, job):
+    """Run one claimed job to completion, sending heartbeats while it runs."""
+    stop = threading.Event()
+    def beat():
+        while not stop.wait(HEARTBEAT_INTERVAL):
+            try:
+                queue.update(job["id"])
+            except sqlite3.Error as e:
+                print(f"Heartbeat for job {job['id']} failed: {e}")
+    heartbeat = threading.Thread(target=beat, daemon=True)
+    heartbeat.start()
+    try:
+        result = _handler(job["handler"])(JobContext(queue, job))
+    except Exception as e:
+        print(f"Job {job['id']} ({job['handler']}) failed: {e}")
+        queue.finish(job["id"], error=str(e) or type(e).__name__)
+    else:
+        queue.finish(job["id"], result=result)
+    finally:
+        stop.set()
+
+def work(queue=None, idle_exit=IDLE_EXIT):
+    """Claim and run jobs until there has been nothing to do for idle_exit seconds."""
+    queue = queue or JobQueue()
+    idle_since = time.monotonic()
+    while True:
+        job = queue.claim()
+        if job is not None:
+            run_job(queue, job)
+            idle_since = time.monotonic()
+            continue
+        if idle_exit is not None and time.monotonic() - idle_since >= idle_exit:
+            return
+        time.sleep(POLL_INTERVAL)
+
+_queue = None
+_workers = []
+_workers_lock = threading.Lock()
+
+def get_job_queue():
+    """Process-wide handle on the machine's job queue."""
+    global _queue
+    if _queue is None:
+        _queue = JobQueue()
+    return _queue
+
+def start_workers(count=None):
+    """Make sure this process has started count worker processes (default: the running-job cap).
+
+    Workers exit on their own when idle, so this is called again whenever
+    a job is submitted.
+    """
+    count = count or max_running_jobs()
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    with _workers_lock:
+        _workers[:] = [worker for worker in _workers if worker.poll() is None]
+        while len(_workers) < count:
+            _workers.append(subprocess.Popen(
+                [sys.executable, "-m", "common.job_queue", "work"],
+                cwd=project_root,
+                env={**os.environ, "LEGALEASE_JOB_DB": get_job_queue().path},
+            ))
+
+def describe_job(job):
+    """One-line status of a job for logs and the CLI."""
+    line = f"{job['id']} {job['handler']} {job['status']} {job['progress'] * 100:.0f}%"
+    if job["message"]:
+        line += f" {job['message']}"
+    if job["error"]:
+        line += f" error: {job['error']}"
+    return line
+
+def main():
+    parser = argparse.ArgumentParser(description="Run or inspect the LegalEase job queue.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    work_parser = subparsers.add_parser("work", help="run jobs until idle")
+    work_parser.add_argument("--idle-exit", type=float, default=IDLE_EXIT, help="seconds without work before exiting (0: never)")
+    list_parser = subparsers.add_parser("list", help="show recent jobs")
+    list_parser.add_argument("--status", default=None)
+    show_parser = subparsers.add_parser("show", help="show one job")
+    show_parser.add_argument("job_id")
+    args = parser.parse_args()
+
+    queue = get_job_queue()
+    if args.command == "work":
+        work(queue, args.idle_exit or None)
+    elif args.command == "list":
+        for job in queue.list_jobs(args.status):
+            print(describe_job(job))
+    else:
+        job = queue.get(args.job_id)
+        if job is None:
+            parser.error(f"Unknown job: {args.job_id}")
+        print(json.dumps(job, indent=2, ensure_ascii=False))
+
+if __name__ == "__main__":
+    main()
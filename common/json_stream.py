@@ -0,0 +1,209 @@
+import json
+import re
+
+# Characters that change the scanner state; everything else is skipped in bulk
+_STRUCTURAL = re.compile(r'[{}\[\]",\\]')
+_CLOSERS = {"{": "}", "[": "]"}
+
+class JSONStreamParser:
+    """Incrementally finds the first JSON object in model output.
+
+    Text is fed in as it arrives. A balanced-brace scanner tracks strings,
+    escapes and nesting, so stray braces in prose before or inside the
+    object do not confuse it, and each character is scanned once. Until
+    the object is closed, partial() repairs what has arrived so far (open
+    strings and containers are closed, a dangling key or value is dropped),
+    so callers can render fields while the completion is still streaming.
+    """
+    def __init__(self):
+        self.buffer = ""
+        self.done = False
+        self._value = None
+        self._reset(0)
+
+    def _reset(self, position):
+        self._pos = position
+        self._start = None
+        self._stack = []
+        self._in_string = False
+        # End of the last complete member and the closers needed at that point
+        self._safe = None
+        self._partial_at = None
+        self._partial = None
+
+    def feed(self, text):
+        """Add a completion delta; returns the complete object once it has been closed."""
+        if self.done or not text:
+            return self._value
+        self.buffer += text
+        self._scan()
+        return self._value
+
+    def _scan(self):
+        buffer = self.buffer
+        while not self.done:
+            if self._start is None:
+                start = buffer.find("{", self._pos)
+                if start < 0:
+                    self._pos = len(buffer)
+                    return
+                self._start = start
+                self._stack = ["{"]
+                self._safe = (start + 1, "}")
+                self._pos = start + 1
+                continue
+
+            match = _STRUCTURAL.search(buffer, self._pos)
+            if match is None:
+                self._pos = len(buffer)
+                return
+            char = match.group(0)
+            position = match.start()
+            if char == "\\":
+                if position + 1 >= len(buffer):
+                    # Wait for the escaped character
+                    self._pos = position
+                    return
+                self._pos = position + 2
+                continue
+            self._pos = position + 1
+
+            if self._in_string:
+                if char == '"':
+                    self._in_string = False
+                continue
+            if char == '"':
+                self._in_string = True
+            elif char in _CLOSERS:
+                self._stack.append(char)
+                self._safe = (position + 1, self._closers())
+            elif char in "}]":
+                self._stack.pop()
+                if not self._stack:
+                    self._close(position + 1)
+                else:
+                    self._safe = (position + 1, self._closers())
+            elif char == ",":
+                self._safe = (position, self._closers())
+
+    def _closers(self):
+        return "".join(_CLOSERS[opener] for opener in reversed(self._stack))
+
+    def _close(self, end):
+        try:
+            value = json.loads(self.buffer[self._start:end])
+        except json.JSONDecodeError:
+            value = None
+        if isinstance(value, dict):
+            self._value = value
+            self.done = True
+            return
+        # Balanced but not JSON (e.g. "{placeholder}" in prose); look further on
+        self._reset(self._start + 1)
+
+    def partial(self):
+        """Best-effort object for the text seen so far, or None before the first member."""
+        if self.done:
+            return self._value
+        if self._start is None:
+            return None
+        if self._partial_at == len(self.buffer):
+            return self._partial
+
+        text = self.buffer[self._start:]
+        if text.endswith("\\"):
+            text = text[:-1]
+        candidates = [text + ('"' if self._in_string else "") + self._closers()]
+        if self._safe is not None:
+            safe_end, closers = self._safe
+            candidates.append(self.buffer[self._start:safe_end] + closers)
+        value = None
+        for candidate in candidates:
+            try:
+                value = json.loads(candidate)
+                break
+            except json.JSONDecodeError:
+                continue
+        self._partial_at = len(self.buffer)
+        self._partial = value if isinstance(value, dict) and value else None
+        return self._partial
+
+    def result(self):
+        """The closed object, or the repaired partial one if the output was cut off.
+
+        Call once the output is complete. An opening brace that never closed
+        and cannot be repaired (a stray "{" in prose) is skipped, and the
+        scan starts again at the next one.
+        """
+        while not self.done:
+            value = self.partial()
+            if value is not None or self._start is None:
+                return value
+            self._reset(self._start + 1)
+            self._scan()
+        return self._value
+
+def _strip_fences(text):
+    return text.strip().strip("`")
+
+def validate(value, schema):
+    """Problems with value against schema, a {field: type or tuple of types} dict."""
+    if not isinstance(value, dict):
+        return ["not a JSON object"]
+    problems = []
+    for field, expected in schema.items():
+        if field not in value:
+            problems.append(f"missing field {field!r}")
+        elif not isinstance(value[field], expected):
+            problems.append(f"field {field!r} is {type(value[field]).__name__}")
+    return problems
+
+def conform(value, schema):
+    """Fill missing or mistyped str/list/dict fields with empty defaults; other fields are left as they are."""
+    value = dict(value)
+    for field, expected in schema.items():
+        if expected in (str, list, dict) and not isinstance(value.get(field), expected):
+            current = value.get(field)
+            if expected is list and isinstance(current, str) and current:
+                value[field] = [current]
+            elif expected is str and current is not None and not isinstance(current, (dict, list)):
+                value[field] = str(current)
+            else:
+                value[field] = expected()
+    return value
+
+def extract_json(text, schema=None):
+    """First JSON object in text, repaired if the output was truncated.
+
+    With a schema, the object is checked and its missing or mistyped fields
+    are filled with empty defaults rather than rejected. Returns None when
+    no object (or none with any schema field) can be recovered.
+    """
+    if not text:
+        return None
+    parser = JSONStreamParser()
+    parser.feed(_strip_fences(text))
+    value = parser.result()
+    if value is None:
+        return None
+    if not parser.done:
+        print("Repaired truncated JSON response")
+    if schema is None:
+        return value
+    problems = validate(value, schema)
+    if problems:
+        if not any(field in value for field in schema):
+            print(f"JSON response does not match the expected fields: {', '.join(problems)}")
+            return None
+        print(f"Conforming JSON response: {', '.join(problems)}")
+        value = conform(value, schema)
+    return value
+
+def parses_as(schema):
+    """Check for LLMGateway's validate hook: true if extract_json can read the text as schema.
+
+    None without a schema, so plain-text completions are cached as they are.
+    """
+    if schema is None:
+        return None
+    return lambda text: extract_json(text, schema) is not None
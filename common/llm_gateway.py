@@ -0,0 +1,317 @@
+import asyncio
+import json
+import os
+import queue
+import random
+import threading
+import time
+from collections import deque
+
+import httpx
+
+from common.response_cache import get_response_cache, prompt_fingerprint
+
+GROQ_BASE_URL = "https://api.groq.com/openai/v1"
+
+# HTTP statuses worth retrying: rate limiting and transient server errors
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+class TokenBucket:
+    """Async token bucket allowing `rate` acquisitions per second with bursts up to `capacity`."""
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+class LLMGateway:
+    """Shared async client for OpenAI-compatible chat completion APIs (Groq by default).
+
+    All requests go through one pooled httpx.AsyncClient on an event loop
+    that runs in a background thread, so synchronous Streamlit code and
+    asyncio code share the same limits:
+
+    - at most max_concurrency requests in flight,
+    - at most requests_per_minute requests started per minute,
+    - 429 and 5xx responses and transport errors are retried up to
+      max_retries times with jittered exponential backoff, honouring
+      Retry-After when the server sends it.
+
+    Completions are cached on disk by prompt fingerprint (see
+    common.response_cache), so a rerun or re-upload that sends the same
+    prompt is answered without a remote call; pass use_cache=False to skip
+    the cache for one call. A completion is only cached if it passes the
+    caller's validate check (e.g. it parses as the expected JSON), so a
+    retry of a bad answer goes to the model again. astream() yields a completion as it is
+    generated, under the same limits and cache. Latency of every remote call
+    is kept in `metrics`.
+    """
+    def __init__(self, api_key, base_url=None, max_concurrency=None, requests_per_minute=None,
+                 max_retries=4, timeout=120.0, backoff_base=1.0, backoff_cap=30.0):
+        self.api_key = api_key
+        self.base_url = (base_url or os.environ.get("GROQ_BASE_URL", GROQ_BASE_URL)).rstrip("/")
+        self.max_concurrency = max_concurrency or int(os.environ.get("LEGALEASE_LLM_CONCURRENCY", "4"))
+        self.requests_per_minute = requests_per_minute or int(os.environ.get("LEGALEASE_LLM_RPM", "30"))
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.metrics = deque(maxlen=1000)
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="llm-gateway", daemon=True)
+        self._thread.start()
+        self._client = None
+        self._semaphore = None
+        self._bucket = None
+        self.run(self._setup())
+
+    async def _setup(self):
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            headers={"Authorization": f"Bearer {self.api_key}"},
+            timeout=self.timeout,
+            limits=httpx.Limits(max_connections=self.max_concurrency, max_keepalive_connections=self.max_concurrency),
+        )
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._bucket = TokenBucket(self.requests_per_minute / 60.0, capacity=self.max_concurrency)
+
+    def run(self, coroutine):
+        """Run a coroutine on the gateway's event loop and wait for its result."""
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+    def _backoff(self, attempt, retry_after=None):
+        delay = min(self.backoff_cap, self.backoff_base * (2 ** attempt)) * random.uniform(0.5, 1.0)
+        if retry_after:
+            try:
+                delay = max(delay, float(retry_after))
+            except ValueError:
+                pass
+        return delay
+
+    async def acomplete(self, messages, model, temperature=0.2, max_tokens=1000, use_cache=True, validate=None):
+        """Return the content of one chat completion; it is cached only if validate(content) is true."""
+        cache = get_response_cache() if use_cache else None
+        if cache is not None:
+            key = prompt_fingerprint(model, messages, temperature, max_tokens)
+            cached = await asyncio.to_thread(cache.get, key)
+            if cached is not None:
+                return cached
+        content = await self._request(messages, model, temperature, max_tokens)
+        if cache is not None and (validate is None or validate(content)):
+            try:
+                await asyncio.to_thread(cache.set, key, content)
+            except OSError as e:
+                print(f"Error writing LLM response cache: {e}")
+        return content
+
+    async def _request(self, messages, model, temperature, max_tokens):
+        payload = {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+        }
+        start = time.perf_counter()
+        attempt = 0
+        status = None
+        try:
+            async with self._semaphore:
+                while True:
+                    await self._bucket.acquire()
+                    try:
+                        response = await self._client.post("/chat/completions", json=payload)
+                    except httpx.TransportError as e:
+                        status = type(e).__name__
+                        if attempt >= self.max_retries:
+                            raise
+                        await asyncio.sleep(self._backoff(attempt))
+                        attempt += 1
+                        continue
+                    status = response.status_code
+                    if status in RETRYABLE_STATUSES and attempt < self.max_retries:
+                        await asyncio.sleep(self._backoff(attempt, response.headers.get("retry-after")))
+                        attempt += 1
+                        continue
+                    response.raise_for_status()
+                    return response.json()["choices"][0]["message"]["content"]
+        finally:
+            self.metrics.append({
+                "model": model,
+                "latency": time.perf_counter() - start,
+                "attempts": attempt + 1,
+                "status": status,
+            })
+
+    async def astream(self, messages, model, temperature=0.2, max_tokens=1000, use_cache=True, validate=None):
+        """Yield the content of one chat completion in deltas as the server streams it.
+
+        A cached completion comes back as a single delta; a streamed one is
+        cached once the server has ended it with [DONE], if validate (when
+        given) accepts the whole text.
+        """
+        cache = get_response_cache() if use_cache else None
+        if cache is not None:
+            key = prompt_fingerprint(model, messages, temperature, max_tokens)
+            cached = await asyncio.to_thread(cache.get, key)
+            if cached is not None:
+                yield cached
+                return
+        parts = []
+        outcome = {"done": False}
+        async for delta in self._stream_request(messages, model, temperature, max_tokens, outcome):
+            parts.append(delta)
+            yield delta
+        content = "".join(parts)
+        if cache is not None and outcome["done"] and (validate is None or validate(content)):
+            try:
+                await asyncio.to_thread(cache.set, key, content)
+            except OSError as e:
+                print(f"Error writing LLM response cache: {e}")
+
+    async def _stream_request(self, messages, model, temperature, max_tokens, outcome=None):
+        """Yield the deltas of one streamed completion; sets outcome["done"] once [DONE] arrives."""
+        payload = {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "stream": True,
+        }
+        start = time.perf_counter()
+        first_delta = None
+        attempt = 0
+        status = None
+        try:
+            async with self._semaphore:
+                while True:
+                    await self._bucket.acquire()
+                    try:
+                        async with self._client.stream("POST", "/chat/completions", json=payload) as response:
+                            status = response.status_code
+                            if status in RETRYABLE_STATUSES and attempt < self.max_retries:
+                                retry_after = response.headers.get("retry-after")
+                            else:
+                                retry_after = None
+                                response.raise_for_status()
+                                # Server-sent events: "data: {...}" lines, ended by "data: [DONE]"
+                                async for line in response.aiter_lines():
+                                    if not line.startswith("data:"):
+                                        continue
+                                    data = line[5:].strip()
+                                    if data == "[DONE]":
+                                        if outcome is not None:
+                                            outcome["done"] = True
+                                        break
+                                    delta = json.loads(data)["choices"][0].get("delta", {}).get("content")
+                                    if delta:
+                                        if first_delta is None:
+                                            first_delta = time.perf_counter() - start
+                                        yield delta
+                                return
+                    except httpx.TransportError as e:
+                        status = type(e).__name__
+                        # Text already handed out can't be taken back, so only retry before the first delta
+                        if first_delta is not None or attempt >= self.max_retries:
+                            raise
+                        await asyncio.sleep(self._backoff(attempt))
+                        attempt += 1
+                        continue
+                    await asyncio.sleep(self._backoff(attempt, retry_after))
+                    attempt += 1
+        finally:
+            self.metrics.append({
+                "model": model,
+                "latency": time.perf_counter() - start,
+                "first_delta": first_delta,
+                "attempts": attempt + 1,
+                "status": status,
+            })
+
+    def merge(self, iterables):
+        """Drive async iterables concurrently on the gateway loop; yields (index, item) as items arrive.
+
+        This is how synchronous callers such as Streamlit consume astream()
+        and the streaming analyses built on it. An iterable that raises
+        yields its exception as its last item, and the others carry on;
+        closing the generator cancels whatever is still running.
+        """
+        items = queue.Queue()
+        finished = object()
+
+        async def drain(index, iterable):
+            try:
+                async for item in iterable:
+                    items.put((index, item))
+            except Exception as e:
+                items.put((index, e))
+            finally:
+                items.put((index, finished))
+
+        async def drive():
+            await asyncio.gather(*[drain(index, iterable) for index, iterable in enumerate(iterables)])
+
+        future = asyncio.run_coroutine_threadsafe(drive(), self._loop)
+        remaining = len(iterables)
+        try:
+            while remaining:
+                index, item = items.get()
+                if item is finished:
+                    remaining -= 1
+                    continue
+                yield index, item
+        finally:
+            future.cancel()
+
+    def stream(self, messages, model, temperature=0.2, max_tokens=1000, use_cache=True):
+        """Blocking version of astream: a generator of completion deltas; raises what astream raises."""
+        for _, delta in self.merge([self.astream(messages, model, temperature, max_tokens, use_cache)]):
+            if isinstance(delta, Exception):
+                raise delta
+            yield delta
+
+    def complete(self, messages, model, temperature=0.2, max_tokens=1000, use_cache=True):
+        """Blocking version of acomplete for synchronous callers."""
+        return self.run(self.acomplete(messages, model, temperature, max_tokens, use_cache))
+
+    def cache_stats(self):
+        """Hit/miss counters of the response cache in this process."""
+        cache = get_response_cache()
+        return cache.stats() if cache is not None else {"hits": 0, "misses": 0}
+
+    def latency_summary(self):
+        """Count, mean, p50 and p95 latency in seconds over the recorded calls."""
+        latencies = sorted(entry["latency"] for entry in self.metrics)
+        if not latencies:
+            return {"count": 0}
+        return {
+            "count": len(latencies),
+            "mean": sum(latencies) / len(latencies),
+            "p50": latencies[len(latencies) // 2],
+            "p95": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+        }
+
+_gateways = {}
+_gateways_lock = threading.Lock()
+
+def get_gateway(api_key, base_url=None):
+    """Process-wide gateway per API key and endpoint, so every caller shares its limits."""
+    key = (api_key, base_url)
+    with _gateways_lock:
+        gateway = _gateways.get(key)
+        if gateway is None:
+            gateway = LLMGateway(api_key, base_url)
+            _gateways[key] = gateway
+        return gateway
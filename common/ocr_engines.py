@@ -0,0 +1,40 @@
+import threading
+
+# EasyOCR models to load for each input language offered in the UI. The
+# Devanagari models are paired with English, which EasyOCR allows and which
+# covers the English fragments most Indian contracts contain
+LANGUAGE_CODES = {
+    "English": ("en",),
+    "Hindi Devanagari": ("hi", "en"),
+    "Marathi": ("mr", "en"),
+}
+
+# Used when no input language is known
+DEFAULT_LANGUAGES = ("en", "hi", "mr")
+
+_readers = {}
+_readers_lock = threading.Lock()
+
+def language_codes(language=None):
+    """EasyOCR language codes for a UI language name, or the default set."""
+    return LANGUAGE_CODES.get(language, DEFAULT_LANGUAGES)
+
+def get_reader(languages=DEFAULT_LANGUAGES):
+    """Return the process-wide EasyOCR reader for a set of languages.
+
+    easyocr itself is only imported here, and each language combination is
+    loaded the first time it is asked for. Worker processes of the shared pool
+    in common.parallel live for the life of the server, so their readers stay
+    warm between documents.
+    """
+    key = tuple(sorted(set(languages)))
+    reader = _readers.get(key)
+    if reader is not None:
+        return reader
+    with _readers_lock:
+        reader = _readers.get(key)
+        if reader is None:
+            import easyocr
+            reader = easyocr.Reader(list(key))
+            _readers[key] = reader
+    return reader
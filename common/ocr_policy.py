@@ -0,0 +1,58 @@
+# Pages whose text layer has at least this many non-whitespace characters are
+# treated as digital and their images are not OCR'd
+MIN_TEXT_LAYER_CHARS = 200
+
+# Images smaller than this on either side are icons, bullets or rules
+MIN_IMAGE_SIDE = 64
+
+# Flat images (blank boxes, solid letterhead bands) carry no text; PIL's
+# greyscale histogram entropy is measured in bits, 8.0 being the maximum
+MIN_IMAGE_ENTROPY = 2.0
+
+def has_text_layer(page_text):
+    """True when a page's extracted text is dense enough to skip OCR."""
+    return len(''.join(page_text.split())) >= MIN_TEXT_LAYER_CHARS
+
+def is_large_enough(width, height):
+    return width >= MIN_IMAGE_SIDE and height >= MIN_IMAGE_SIDE
+
+def is_ocr_candidate(image):
+    """Cheap checks on a decoded PIL image before spending an OCR call on it."""
+    if not is_large_enough(image.width, image.height):
+        return False
+    try:
+        entropy = image.convert("L").entropy()
+    except Exception:
+        return True
+    return entropy >= MIN_IMAGE_ENTROPY
+
+def plan_pdf_ocr(pdf_document):
+    """Decide which image xrefs to OCR on which page of an open fitz document.
+
+    Only pages without a usable text layer are considered, tiny images are
+    dropped by their declared size, and an image shared between pages (a
+    logo or letterhead with the same xref) is assigned to the first page it
+    appears on, so it is OCR'd once per document.
+
+    Returns {page_num: [xref, ...]} for pages that need OCR.
+    """
+    plan = {}
+    seen = set()
+    for page_num in range(len(pdf_document)):
+        try:
+            page = pdf_document[page_num]
+            if has_text_layer(page.get_text()):
+                continue
+            xrefs = []
+            for img in page.get_images(full=True):
+                xref, width, height = img[0], img[2], img[3]
+                if xref in seen or not is_large_enough(width, height):
+                    continue
+                seen.add(xref)
+                xrefs.append(xref)
+        except Exception as e:
+            print(f"Error planning OCR for page {page_num}: {e}")
+            continue
+        if xrefs:
+            plan[page_num] = xrefs
+    return plan
@@ -0,0 +1,123 @@
+import os
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+# Documents with fewer pages than this are always extracted serially, the
+# process pool start-up would cost more than it saves
+MIN_PARALLEL_PAGES = 4
+
+# Each worker gets several small page ranges instead of one big one, so slow
+# (OCR heavy) pages balance out and callers can stop early
+RANGES_PER_WORKER = 4
+
+# Serial mode still walks the document in small ranges so callers that stop
+# early (e.g. on a token budget) do not pay for the remaining pages
+SERIAL_RANGE_PAGES = 8
+
+# torch/OpenMP threads per worker process. EasyOCR would otherwise start
+# about one thread per core in every worker, so N workers would run N times
+# as many compute threads as there are cores
+WORKER_THREADS = 1
+
+_executors = {}
+_executors_lock = threading.Lock()
+
+def default_workers():
+    """Worker count from LEGALEASE_PDF_WORKERS, falling back to the CPU count.
+
+    Every worker that OCRs a page loads its own EasyOCR reader, i.e. its own
+    copy of the detection and recognition models (several hundred MB per
+    language set), and keeps it for the life of the pool. On replicas short
+    of memory, set LEGALEASE_PDF_WORKERS below the CPU count; each worker
+    runs WORKER_THREADS compute threads.
+    """
+    value = os.environ.get("LEGALEASE_PDF_WORKERS")
+    if value:
+        try:
+            return max(1, int(value))
+        except ValueError:
+            print(f"Ignoring invalid LEGALEASE_PDF_WORKERS value: {value}")
+    return os.cpu_count() or 1
+
+def _init_worker():
+    for name in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[name] = str(WORKER_THREADS)
+    # A forked worker may have inherited torch already imported
+    torch = sys.modules.get("torch")
+    if torch is not None:
+        torch.set_num_threads(WORKER_THREADS)
+
+def get_executor(workers):
+    """Return the process-wide pool for the given worker count, creating it on first use."""
+    with _executors_lock:
+        executor = _executors.get(workers)
+        if executor is None:
+            executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+            _executors[workers] = executor
+        return executor
+
+def discard_executor(workers):
+    with _executors_lock:
+        executor = _executors.pop(workers, None)
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def split_page_ranges(page_count, parts):
+    """Split [0, page_count) into at most `parts` contiguous (start, stop) ranges."""
+    parts = max(1, min(parts, page_count))
+    size, extra = divmod(page_count, parts)
+    ranges = []
+    start = 0
+    for i in range(parts):
+        stop = start + size + (1 if i < extra else 0)
+        if stop > start:
+            ranges.append((start, stop))
+        start = stop
+    return ranges
+
+def _map_serial(func, file_path, start, stop):
+    for range_start in range(start, stop, SERIAL_RANGE_PAGES):
+        yield from func(file_path, range_start, min(range_start + SERIAL_RANGE_PAGES, stop))
+
+def map_page_ranges(func, file_path, page_count, workers=None, first_page=0):
+    """Yield func(file_path, start, stop) results for every page range, in page order.
+
+    func must be a module-level function returning a list with one entry per
+    page. Pages before first_page are skipped. Ranges are spread across worker
+    processes; with one worker, a small document or a broken pool the ranges
+    run serially in this process. Closing the generator early cancels ranges
+    that have not started yet.
+    """
+    if workers is None:
+        workers = default_workers()
+    if workers <= 1 or page_count - first_page < MIN_PARALLEL_PAGES:
+        yield from _map_serial(func, file_path, first_page, page_count)
+        return
+
+    ranges = [
+        (first_page + start, first_page + stop)
+        for start, stop in split_page_ranges(page_count - first_page, workers * RANGES_PER_WORKER)
+    ]
+    try:
+        executor = get_executor(workers)
+        futures = [executor.submit(func, file_path, start, stop) for start, stop in ranges]
+    except (BrokenProcessPool, OSError, RuntimeError) as e:
+        print(f"Parallel extraction unavailable, falling back to serial mode: {e}")
+        discard_executor(workers)
+        yield from _map_serial(func, file_path, first_page, page_count)
+        return
+
+    try:
+        for (start, stop), future in zip(ranges, futures):
+            try:
+                pages = future.result()
+            except BrokenProcessPool as e:
+                print(f"Worker pool failed on pages {start}-{stop - 1}, continuing serially: {e}")
+                discard_executor(workers)
+                pages = _map_serial(func, file_path, start, stop)
+            yield from pages
+    finally:
+        for future in futures:
+            future.cancel()
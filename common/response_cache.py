@@ -0,0 +1,39 @@
+import hashlib
+import json
+import os
+
+from common.disk_cache import DiskCache, cache_root
+
+_cache = None
+
+def caching_enabled():
+    """LLM response caching is on unless LEGALEASE_LLM_CACHE is set to 0/false/no."""
+    return os.environ.get("LEGALEASE_LLM_CACHE", "1").lower() not in ("0", "false", "no")
+
+def get_response_cache():
+    """Process-wide cache of LLM completions, or None when disabled or unavailable.
+
+    Size is capped by LEGALEASE_LLM_CACHE_MB (default 256) and entries expire
+    after LEGALEASE_LLM_CACHE_TTL seconds (default one week).
+    """
+    global _cache
+    if not caching_enabled():
+        return None
+    if _cache is None:
+        max_mb = int(os.environ.get("LEGALEASE_LLM_CACHE_MB", "256"))
+        ttl = int(os.environ.get("LEGALEASE_LLM_CACHE_TTL", str(7 * 24 * 3600)))
+        try:
+            _cache = DiskCache(os.path.join(cache_root(), "llm"), max_bytes=max_mb * 1024 * 1024, ttl=ttl)
+        except OSError as e:
+            print(f"LLM response cache disabled: {e}")
+            return None
+    return _cache
+
+def prompt_fingerprint(model, messages, temperature, max_tokens):
+    """SHA-256 over everything that determines a completion: model, system and user prompts and sampling settings."""
+    payload = json.dumps(
+        {"model": model, "messages": messages, "temperature": temperature, "max_tokens": max_tokens},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
@@ -2,6 +2,7 @@ import streamlit as st
 import os
 import sys
 import json
+import time
 
 # Add the parent directory to sys.path
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -9,15 +10,55 @@ parent_dir = os.path.dirname(current_dir)
 sys.path.append(parent_dir)
 
 from compliance.llm_integration import LLMIntegration
-from compliance.document_processor import process_document
+from compliance.document_processor import iter_document_pages, records_to_text
 
 # Set the GROQ API key
 os.environ["GROQ_API_KEY"] = "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"
 
+# Streaming analyses are redrawn at most this often (seconds)
+RENDER_INTERVAL = 0.25
+
+def render_analysis(analysis):
+    """Write a (possibly partial) analysis; fields that have not arrived yet are skipped."""
+    st.subheader("Contract Analysis")
+
+    st.write("**Summary:**")
+    st.write(analysis.get("summary") or "...")
+
+    st.write("**Balance Score:**")
+    st.write(analysis.get("balance_score", "N/A"))
+
+    st.write("**Compliance Check:**")
+    compliance_check = analysis.get("compliance_check", {})
+    for law, details in compliance_check.items():
+        if "compliant" in details:
+            st.write(f"- {law.replace('_', ' ')}: {'Compliant' if details['compliant'] else 'Non-compliant'}")
+        if details.get('issues'):
+            st.write("  Issues:")
+            for issue in details['issues']:
+                st.write(f"    • {issue}")
+
+    st.write("**Key Clauses:**")
+    key_clauses = analysis.get("key_clauses", [])
+    for clause in key_clauses:
+        if not isinstance(clause, dict):
+            continue
+        st.write(f"- {clause.get('type', '')}")
+        st.write(f"  Content: {clause.get('content', '')}")
+        st.write(f"  Analysis: {clause.get('analysis', '')}")
+        if clause.get('issues'):
+            st.write("  Issues:")
+            for issue in clause['issues']:
+                st.write(f"    • {issue}")
+
+    st.write("**Overall Assessment:**")
+    st.write(analysis.get("overall_assessment") or "...")
+
 def main():
     st.title("Compliance Checker")
     
     uploaded_file = st.file_uploader("Upload a contract file", type=['pdf', 'docx'])
+    agreement_name = st.text_input("Agreement name (optional: revisions uploaded under the same name only re-analyze changed clauses)")
 
     if uploaded_file is not None:
         with st.spinner("Processing document..."):
@@ -26,7 +67,15 @@ def main():
                 f.write(uploaded_file.getbuffer())
 
             try:
-                document_text = process_document(uploaded_file.name)
+                # Stream records so progress shows while later pages are still extracted
+                status = st.empty()
+                records = []
+                for record in iter_document_pages(uploaded_file.name):
+                    records.append(record)
+                    if record["page"] is not None:
+                        status.caption(f"Extracted page {record['page'] + 1}")
+                status.empty()
+                document_text = records_to_text(records)
                 st.success("Document processed successfully!")
             except Exception as e:
                 st.error(f"Failed to process document: {e}")
@@ -35,40 +84,30 @@ def main():
         if document_text:
             llm = LLMIntegration()
             
-            with st.spinner("Analyzing the contract..."):
-                analysis = llm.analyze_contract(document_text)
+            placeholder = st.empty()
+            analysis = None
+            if agreement_name.strip():
+                with st.spinner("Analyzing the changes since the last revision..."):
+                    analysis = llm.analyze_contract_revision(document_text, agreement_name.strip())
+                revision = analysis.get("revision")
+                if revision:
+                    st.caption(
+                        f"Revision {revision['version']}: {revision['reanalyzed_clauses']} of "
+                        f"{revision['clauses']} clauses analyzed, the rest reused from earlier revisions"
+                    )
+            else:
+                # Rule-based findings show at once; the model's analysis fills in as it streams
+                rendered_at = 0.0
+                for analysis in llm.stream_contract(document_text):
+                    now = time.monotonic()
+                    if now - rendered_at >= RENDER_INTERVAL:
+                        rendered_at = now
+                        with placeholder.container():
+                            render_analysis(analysis)
 
             if analysis:
-                st.subheader("Contract Analysis")
-                
-                st.write("**Summary:**")
-                st.write(analysis.get("summary", "No summary available."))
-                
-                st.write("**Balance Score:**")
-                st.write(analysis.get("balance_score", "N/A"))
-                
-                st.write("**Compliance Check:**")
-                compliance_check = analysis.get("compliance_check", {})
-                for law, details in compliance_check.items():
-                    st.write(f"- {law.replace('_', ' ')}: {'Compliant' if details['compliant'] else 'Non-compliant'}")
-                    if details['issues']:
-                        st.write("  Issues:")
-                        for issue in details['issues']:
-                            st.write(f"    • {issue}")
-                
-                st.write("**Key Clauses:**")
-                key_clauses = analysis.get("key_clauses", [])
-                for clause in key_clauses:
-                    st.write(f"- {clause['type']}")
-                    st.write(f"  Content: {clause['content']}")
-                    st.write(f"  Analysis: {clause['analysis']}")
-                    if clause['issues']:
-                        st.write("  Issues:")
-                        for issue in clause['issues']:
-                            st.write(f"    • {issue}")
-                
-                st.write("**Overall Assessment:**")
-                st.write(analysis.get("overall_assessment", "No overall assessment available."))
+                with placeholder.container():
+                    render_analysis(analysis)
 
                 # Add a section for follow-up questions
                 st.subheader("Ask a Follow-up Question")
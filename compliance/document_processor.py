@@ -3,61 +3,89 @@ import docx
 from PIL import Image
 import pytesseract
 import io
-import fitz  # PyMuPDF
 
-def extract_text_from_pdf(file_path):
-    text = ''
-    try:
-        pdf_document = fitz.open(file_path)
-    except Exception as e:
-        raise ValueError(f"Error opening PDF file: {e}")
+from common.extraction import iter_pdf, records_to_text
+from common.extraction_cache import lookup, store
+from common.ocr_policy import is_ocr_candidate, plan_pdf_ocr
 
-    for page_num in range(len(pdf_document)):
+# Bump whenever extraction output changes so cached results are invalidated
+EXTRACTOR_VERSION = "compliance-4"
+
+def _ocr_images(images):
+    """Tesseract text of each image worth OCR'ing (see common.ocr_policy), "" for the rest."""
+    texts = []
+    for image in images:
         try:
-            page = pdf_document[page_num]
-            text += page.get_text()
-            
-            # Extract images from the PDF page
-            for img in page.get_images(full=True):
-                xref = img[0]
-                base_image = pdf_document.extract_image(xref)
-                image_bytes = base_image["image"]
-                image = Image.open(io.BytesIO(image_bytes))
-                text += '\n' + pytesseract.image_to_string(image)
+            texts.append(pytesseract.image_to_string(image) if is_ocr_candidate(image) else "")
         except Exception as e:
-            print(f"Error processing page {page_num}: {e}")
-            continue
+            print(f"Error extracting text from image: {e}")
+            texts.append("")
+    return texts
 
-    pdf_document.close()
-    return text
+def _iter_pdf(file_path, workers=None):
+    # Only the planned images of pages without a usable text layer are OCR'd
+    return iter_pdf(file_path, _ocr_images, workers, plan_ocr=plan_pdf_ocr)
 
-def extract_text_from_docx(file_path):
-    text = ''
+def _iter_docx(file_path):
     try:
         doc = docx.Document(file_path)
     except Exception as e:
         raise ValueError(f"Error opening DOCX file: {e}")
 
     for para in doc.paragraphs:
-        text += para.text + '\n'
+        yield {"page": None, "text": para.text, "source": "paragraph"}
 
     # Extract images from DOCX
     for rel in doc.part.rels.values():
         try:
-            if "image" in rel.target_ref:
-                image_part = rel.target_part
-                image = Image.open(io.BytesIO(image_part.blob))
-                text += '\n' + pytesseract.image_to_string(image)
+            if "image" not in rel.target_ref:
+                continue
+            image_part = rel.target_part
+            image = Image.open(io.BytesIO(image_part.blob))
+            if not is_ocr_candidate(image):
+                continue
+            ocr_text = pytesseract.image_to_string(image)
         except Exception as e:
             print(f"Error processing image in DOCX: {e}")
             continue
+        yield {"page": None, "text": ocr_text, "source": "ocr"}
+
+def iter_document_pages(file_path, workers=None, use_cache=True):
+    """Yield extraction records in document order while the document is being extracted.
+
+    Each record is a dict with "text", "source" ("text" for a PDF text layer,
+    "paragraph" for a DOCX paragraph, "ocr" for an image) and "page" (the
+    0-based PDF page, None for DOCX). A document is cached once it has been
+    read to the end, and later calls replay the cached records.
+    """
+    if not file_path.endswith(('.pdf', '.docx')):
+        raise ValueError("Unsupported file format")
 
-    return text
+    # Reruns and repeat uploads of the same bytes are served from the cache
+    cache, key, cached = lookup(file_path, EXTRACTOR_VERSION, use_cache)
+    if cached is not None:
+        yield from cached["records"]
+        return
 
-def process_document(file_path):
+    records = []
     if file_path.endswith('.pdf'):
-        return extract_text_from_pdf(file_path)
-    elif file_path.endswith('.docx'):
-        return extract_text_from_docx(file_path)
+        source = _iter_pdf(file_path, workers)
     else:
-        raise ValueError("Unsupported file format")
+        source = _iter_docx(file_path)
+    try:
+        for record in source:
+            records.append(record)
+            yield record
+    finally:
+        source.close()
+
+    store(cache, key, {"records": records})
+
+def extract_text_from_pdf(file_path, workers=None):
+    return records_to_text(_iter_pdf(file_path, workers))
+
+def extract_text_from_docx(file_path):
+    return records_to_text(_iter_docx(file_path))
+
+def process_document(file_path, workers=None, use_cache=True):
+    return records_to_text(iter_document_pages(file_path, workers, use_cache))
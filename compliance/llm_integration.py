@@ -1,34 +1,296 @@
-import groq
-import json
+import asyncio
 import os
-import re  # For extracting JSON
+
+from common.chunking import count_tokens, merge_unique, split_clauses, split_into_chunks
+from common.json_stream import JSONStreamParser, extract_json, parses_as
+from common.llm_gateway import get_gateway
+from compliance.prescreen import describe_checks, describe_finding, prescreen
+from compliance.retrieval import get_retriever
+from compliance.rule_corpus import citation
+from compliance.revisions import load_revision, pack_runs, plan_revision, save_revision, split_revision
+
+# Contracts up to this size are analyzed in one call; longer ones are split
+# into clause-aligned chunks of CHUNK_TOKENS that are analyzed concurrently
+# (bounded by the gateway's concurrency limit) and merged in a reduce step
+SINGLE_PASS_TOKENS = 2500
+CHUNK_TOKENS = 2500
+
+# Statutory rules attached to each prompt: the best RULES_PER_CLAUSE matches
+# of every clause, at most MAX_RULES_PER_PROMPT overall, each cut to
+# MAX_RULE_CHARS characters
+RULES_PER_CLAUSE = 3
+MAX_RULES_PER_PROMPT = 8
+MAX_RULE_CHARS = 400
+
+# Texts shorter than this are not worth a model call; the rule-based
+# pre-screen result is returned on its own
+MIN_LLM_WORDS = 50
+
+# Expected top-level fields of each response; see common.json_stream.extract_json
+ANALYSIS_SCHEMA = {
+    "summary": str,
+    "balance_score": (int, float, str),
+    "compliance_check": dict,
+    "key_clauses": list,
+    "overall_assessment": str,
+}
+OVERVIEW_SCHEMA = {"summary": str, "overall_assessment": str}
+FOLLOWUP_SCHEMA = {"answer": str, "explanation": str, "law_references": list}
 
 class LLMIntegration:
-    def __init__(self, api_key=None):
+    def __init__(self, api_key=None, use_cache=True):
         if api_key is None:
             api_key = os.environ.get("GROQ_API_KEY")
         if api_key is None:
             raise ValueError("GROQ API key not provided and not found in environment variables")
-        self.client = groq.Groq(api_key=api_key)
+        self.gateway = get_gateway(api_key)
+        # Identical prompts are answered from the on-disk response cache unless disabled
+        self.use_cache = use_cache
+
+    def _extract_json(self, text, schema=None):
+        """Extract the JSON object from a response, repairing truncated output."""
+        return extract_json(text, schema)
+
+    async def _complete(self, prompt, model="llama-guard-3-8b", max_tokens=4000, schema=None):
+        return await self.gateway.acomplete(
+            [
+                {"role": "system", "content": "You are an AI legal assistant specialized in contract analysis and compliance with Indian laws."},
+                {"role": "user", "content": prompt}
+            ],
+            model=model,
+            # model = "llama3-70b-8192"  # Groq supports this
+            temperature=0.2,
+            max_tokens=max_tokens,
+            use_cache=self.use_cache,
+            validate=parses_as(schema),
+        )
+
+    async def _stream(self, prompt, model="llama-guard-3-8b", max_tokens=4000, schema=None):
+        """Yield completion deltas as the model generates them."""
+        async for delta in self.gateway.astream(
+            [
+                {"role": "system", "content": "You are an AI legal assistant specialized in contract analysis and compliance with Indian laws."},
+                {"role": "user", "content": prompt}
+            ],
+            model=model,
+            temperature=0.2,
+            max_tokens=max_tokens,
+            use_cache=self.use_cache,
+            validate=parses_as(schema),
+        ):
+            yield delta
+
+    def stream_contract(self, contract_text):
+        """Yield the analysis of a contract as it takes shape; the last item is the final analysis."""
+        for _, analysis in self.gateway.merge([self.astream_contract(contract_text)]):
+            if isinstance(analysis, Exception):
+                print(f"Unexpected error: {analysis}")
+                analysis = self._apply_prescreen({"error": str(analysis), "raw_response": ""}, prescreen(contract_text))
+            yield analysis
 
-    def _extract_json(self, text):
-        """Extract JSON object from a string using regex."""
+    async def astream_contract(self, contract_text):
+        """Yield the rule-based findings first, then partial analyses while the completion streams."""
+        screen = await asyncio.to_thread(prescreen, contract_text)
+        yield self._apply_prescreen(self._empty_analysis(), screen)
+        if len(contract_text.split()) < MIN_LLM_WORDS or await asyncio.to_thread(count_tokens, contract_text) > SINGLE_PASS_TOKENS:
+            # Nothing to send, or chunks combined in a reduce step: no stream to show
+            yield await self.aanalyze_contract(contract_text)
+            return
+
+        prompt = await asyncio.to_thread(self._contract_prompt, contract_text, screened=screen["checked"])
+        parser = JSONStreamParser()
+        last = None
         try:
-            json_match = re.search(r"\{(?:[^{}]|(?R))*\}", text, re.DOTALL)
-            if json_match:
-                return json.loads(json_match.group(0))
-        except json.JSONDecodeError as e:
-            print("JSON extraction failed:", e)
-        return None
+            async for delta in self._stream(prompt, schema=ANALYSIS_SCHEMA):
+                parser.feed(delta)
+                partial = parser.partial()
+                if partial and partial != last:
+                    last = partial
+                    yield self._apply_prescreen(partial, screen)
+        except Exception as e:
+            print(f"Unexpected error: {e}")
+            yield self._apply_prescreen({"error": str(e), "raw_response": parser.buffer}, screen)
+            return
+        parsed = self._extract_json(parser.buffer, ANALYSIS_SCHEMA)
+        if not parsed:
+            parsed = {"error": "Failed to extract valid JSON.", "raw_response": parser.buffer}
+        yield self._apply_prescreen(parsed, screen)
 
     def analyze_contract(self, contract_text):
+        return self.gateway.run(self.aanalyze_contract(contract_text))
+
+    async def aanalyze_contract(self, contract_text):
+        # Checks a pattern can decide run locally first; the model is told to
+        # skip them and their findings are merged into its answer. Local work
+        # runs in a worker thread so it does not hold up the gateway's loop
+        screen = await asyncio.to_thread(prescreen, contract_text)
+        if len(contract_text.split()) < MIN_LLM_WORDS:
+            return self._apply_prescreen(self._empty_analysis(), screen)
+
+        if await asyncio.to_thread(count_tokens, contract_text) <= SINGLE_PASS_TOKENS:
+            analysis = await self._analyze_contract_part(contract_text, screened=screen["checked"])
+            return self._apply_prescreen(analysis, screen)
+
+        # Map: analyze clause-aligned chunks concurrently
+        chunks = await asyncio.to_thread(split_into_chunks, contract_text, CHUNK_TOKENS)
+        partials = await asyncio.gather(*[
+            self._analyze_contract_part(chunk, part, len(chunks), screened=screen["checked"])
+            for part, chunk in enumerate(chunks, start=1)
+        ])
+        analyses = [partial for partial in partials if "error" not in partial]
+        if not analyses:
+            return self._apply_prescreen(partials[0], screen)
+        return self._apply_prescreen(await self._merge_analyses(analyses), screen)
+
+    def analyze_contract_revision(self, contract_text, document_id):
+        return self.gateway.run(self.aanalyze_contract_revision(contract_text, document_id))
+
+    async def aanalyze_contract_revision(self, contract_text, document_id):
+        """Analyze a new revision of the agreement document_id, re-analyzing only new or changed clauses.
+
+        The clause-level results of the previous revision are kept (see
+        compliance.revisions); unchanged clauses reuse them, and the
+        compliance checks, key clauses and scores of old and new parts are
+        merged as for a chunked contract. The result carries a "revision"
+        dict saying how much was re-analyzed.
+        """
+        if len(contract_text.split()) < MIN_LLM_WORDS:
+            return await self.aanalyze_contract(contract_text)
+        screen = await asyncio.to_thread(prescreen, contract_text)
+        clauses = await asyncio.to_thread(split_revision, contract_text)
+        hashes = [digest for digest, _ in clauses]
+        previous = load_revision(document_id)
+        version = previous["version"] + 1 if previous else 1
+
+        # A revision with failed units is never complete, so its failed clauses are retried
+        if previous and previous.get("complete") and previous["clauses"] == hashes:
+            analysis = dict(previous["analysis"])
+            analysis["revision"] = {"version": previous["version"], "clauses": len(clauses), "reanalyzed_clauses": 0, "reused_units": len(previous["units"])}
+            return self._apply_prescreen(analysis, screen)
+
+        reused, runs = plan_revision(clauses, previous)
+        new_units = await asyncio.to_thread(pack_runs, clauses, runs, CHUNK_TOKENS, count_tokens)
+
+        # Units are numbered in document order so the model knows which part it sees
+        order = sorted(
+            [("reused", unit, position) for position, unit in reused]
+            + [("new", unit, unit[0]) for unit in new_units],
+            key=lambda entry: entry[2],
+        )
+        parts = len(order)
+        partials = await asyncio.gather(*[
+            self._analyze_contract_part(
+                "".join(clauses[index][1] for index in unit),
+                part if parts > 1 else None, parts, screened=screen["checked"],
+            )
+            for part, (kind, unit, _) in enumerate(order, start=1) if kind == "new"
+        ])
+
+        units = []
+        analyses = []
+        complete = True
+        new_partials = iter(partials)
+        for kind, unit, _ in order:
+            if kind == "reused":
+                units.append(unit)
+                analyses.append(unit["analysis"])
+                continue
+            partial = next(new_partials)
+            if "error" in partial:
+                # Left out of the stored units, so the next revision retries these clauses
+                complete = False
+                continue
+            units.append({"clauses": [hashes[index] for index in unit], "analysis": partial})
+            analyses.append(partial)
+
+        if not analyses:
+            return self._apply_prescreen(partials[0] if partials else {"error": "No clauses to analyze."}, screen)
+        analysis = analyses[0] if len(analyses) == 1 else await self._merge_analyses(analyses)
+        save_revision(document_id, {"version": version, "clauses": hashes, "complete": complete,
+                                    "units": units, "analysis": analysis})
+
+        analysis = dict(analysis)
+        analysis["revision"] = {
+            "version": version,
+            "clauses": len(clauses),
+            "reanalyzed_clauses": sum(len(unit) for unit in new_units),
+            "reused_units": len(reused),
+        }
+        return self._apply_prescreen(analysis, screen)
+
+    def _empty_analysis(self):
+        return {
+            "summary": "",
+            "balance_score": "N/A",
+            "compliance_check": {},
+            "key_clauses": [],
+            "overall_assessment": "",
+        }
+
+    def _apply_prescreen(self, analysis, screen):
+        """Copy of an analysis with the rule-based findings merged in; a failed analysis keeps its error next to them."""
+        analysis = dict(self._empty_analysis(), **analysis) if "error" in analysis else dict(analysis)
+        found = {}
+        for finding in screen["findings"]:
+            found.setdefault(finding["act"], []).append(describe_finding(finding))
+        compliance_check = {
+            law: dict(details) for law, details in (analysis.get("compliance_check") or {}).items()
+            if isinstance(details, dict)
+        }
+        analysis["compliance_check"] = compliance_check
+        for act, issues in found.items():
+            details = compliance_check.setdefault(act, {"compliant": True, "issues": []})
+            details["compliant"] = False
+            details["issues"] = merge_unique([issues, details.get("issues")])
+        analysis["prescreen"] = screen["findings"]
+        return analysis
+
+    def _relevant_provisions(self, contract_text):
+        """Top-ranked statutory rules for the clauses of a contract chunk, formatted for the prompt."""
+        try:
+            ranked = get_retriever().top_k(split_clauses(contract_text), k=RULES_PER_CLAUSE)
+        except Exception as e:
+            # Retrieval only sharpens the prompt; the analysis still works without it
+            print(f"Rule retrieval failed: {e}")
+            return ""
+
+        best = {}
+        for matches in ranked:
+            for rule, score in matches:
+                if rule["id"] not in best or best[rule["id"]][1] < score:
+                    best[rule["id"]] = (rule, score)
+        selected = sorted(best.values(), key=lambda match: -match[1])[:MAX_RULES_PER_PROMPT]
+
+        lines = []
+        for rule, _ in selected:
+            line = f"- {rule['act'].replace('_', ' ')}, {citation(rule)}: {rule['rule'][:MAX_RULE_CHARS]}"
+            if rule.get("penalty"):
+                line += " Penalty: " + "; ".join(f"{who}: {what}" for who, what in rule["penalty"].items())
+            lines.append(line)
+        return "\n".join(lines)
+
+    def _contract_prompt(self, contract_text, part=None, parts=None, screened=None):
+        scope = f"This is part {part} of {parts} of a longer contract; analyze only this part.\n" if part else ""
+        if screened:
+            scope += (
+                "These checks were already run by a rule engine; do not report on them again:\n"
+                + describe_checks(screened) + "\n"
+            )
+        provisions = self._relevant_provisions(contract_text)
+        if provisions:
+            provisions = (
+                "Relevant statutory provisions (cite their section numbers in the issues you report):\n"
+                + provisions + "\n"
+            )
         prompt = f"""
         Analyze the following contract for compliance with Indian laws including the Companies Act, 2013, the Code of Wages, 2019, Occupational Safety, Health and Working Conditions Code, 2020, the Code on Social Security, 2020, and the Industrial Relations Code, 2020. 
 
         Highlight any sections that may not comply with these laws and provide a structured response in JSON format:
 
+        {scope}
+        {provisions}
         Contract text:
-        {contract_text[:4000]}
+        {contract_text}
 
         Please provide the analysis in the following JSON structure:
         {{
@@ -68,23 +330,16 @@ class LLMIntegration:
         }}
         Only return JSON without any extra explanation.
         """
+        return prompt
 
-        response = self.client.chat.completions.create(
-            model="llama-guard-3-8b",
-            # model = "llama3-70b-8192"  # Groq supports this
-
-            messages=[
-                {"role": "system", "content": "You are an AI legal assistant specialized in contract analysis and compliance with Indian laws."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.2,
-            max_tokens=4000,
-        )
-
+    async def _analyze_contract_part(self, contract_text, part=None, parts=None, screened=None):
+        # Rule retrieval is CPU-bound; keep it off the gateway's event loop
+        prompt = await asyncio.to_thread(self._contract_prompt, contract_text, part, parts, screened)
+        response_content = None
         try:
-            response_content = response.choices[0].message.content
+            response_content = await self._complete(prompt, schema=ANALYSIS_SCHEMA)
             print("\nRaw API Response:\n", response_content)  # Print full response
-            parsed = self._extract_json(response_content)
+            parsed = self._extract_json(response_content, ANALYSIS_SCHEMA)
             if parsed:
                 return parsed
             else:
@@ -96,9 +351,60 @@ class LLMIntegration:
             print(f"Unexpected error: {e}")
             return {
                 "error": str(e),
-                "raw_response": str(response)
+                "raw_response": str(response_content)
             }
 
+    async def _merge_analyses(self, analyses):
+        """Reduce the per-chunk analyses of one contract into a single analysis."""
+        compliance_check = {}
+        for analysis in analyses:
+            for law, details in (analysis.get("compliance_check") or {}).items():
+                merged = compliance_check.setdefault(law, {"compliant": True, "issues": []})
+                # A law is only compliant if no part of the contract breaches it
+                merged["compliant"] = merged["compliant"] and bool(details.get("compliant", True))
+                merged["issues"] = merge_unique([merged["issues"], details.get("issues")])
+
+        scores = [analysis["balance_score"] for analysis in analyses
+                  if isinstance(analysis.get("balance_score"), (int, float))]
+        overview = await self._reduce_overview(analyses)
+        return {
+            "summary": overview.get("summary", ""),
+            "balance_score": round(sum(scores) / len(scores)) if scores else "N/A",
+            "compliance_check": compliance_check,
+            "key_clauses": merge_unique(analysis.get("key_clauses") for analysis in analyses),
+            "overall_assessment": overview.get("overall_assessment", ""),
+        }
+
+    async def _reduce_overview(self, analyses):
+        parts = "\n\n".join(
+            f"Part {i} summary: {analysis.get('summary', '')}\nPart {i} assessment: {analysis.get('overall_assessment', '')}"
+            for i, analysis in enumerate(analyses, start=1)
+        )
+        prompt = f"""
+        The following are summaries and assessments of consecutive parts of one contract.
+        Combine them into a single summary and a single overall assessment of the entire contract.
+
+        {parts}
+
+        Please provide your response in the following JSON format:
+        {{
+            "summary": "...",
+            "overall_assessment": "..."
+        }}
+        Only return JSON without any extra explanation.
+        """
+        try:
+            parsed = self._extract_json(await self._complete(prompt, max_tokens=1000, schema=OVERVIEW_SCHEMA), OVERVIEW_SCHEMA)
+            if parsed:
+                return parsed
+        except Exception as e:
+            print(f"Error combining contract analyses: {e}")
+        # The partial texts are still useful on their own
+        return {
+            "summary": "\n\n".join(analysis.get("summary", "") for analysis in analyses),
+            "overall_assessment": "\n\n".join(analysis.get("overall_assessment", "") for analysis in analyses),
+        }
+
     def get_followup_analysis(self, question, context):
         prompt = f"""
         Based on the following contract analysis, answer this question:
@@ -123,21 +429,11 @@ class LLMIntegration:
         Only return JSON. No extra explanations.
         """
 
-        response = self.client.chat.completions.create(
-            model="mixtral-8x7b-32768",
-            # model = "llama3-70b-8192"  # Groq supports this
-            messages=[
-                {"role": "system", "content": "You are an AI legal assistant specialized in contract analysis and compliance with Indian laws."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.2,
-            max_tokens=1000,
-        )
-
+        response_content = None
         try:
-            response_content = response.choices[0].message.content
+            response_content = self.gateway.run(self._complete(prompt, model="mixtral-8x7b-32768", max_tokens=1000, schema=FOLLOWUP_SCHEMA))
             print("\nRaw API Response:\n", response_content)  # Debug print
-            parsed = self._extract_json(response_content)
+            parsed = self._extract_json(response_content, FOLLOWUP_SCHEMA)
             if parsed:
                 return parsed
             else:
@@ -149,6 +445,6 @@ class LLMIntegration:
             print(f"Unexpected error: {e}")
             return {
                 "error": str(e),
-                "raw_response": str(response)
+                "raw_response": str(response_content)
             }
 
@@ -0,0 +1,216 @@
+"""Deterministic pre-screen of a contract before it goes to the LLM.
+
+Every check below is a handful of regular expressions, compiled once. Each
+distinct pattern is scanned for on its own, so hits of different checks may
+overlap (a wage clause can mention termination). The checks then decide
+locally whether something required is missing, something prohibited is
+present, or a figure breaks a threshold. Findings carry the penalty from
+noncompliance.json for their section.
+"""
+import json
+import os
+import re
+import threading
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+NONCOMPLIANCE_PATH = os.path.join(current_dir, "noncompliance.json")
+
+# Lowest daily wage accepted by the wage check (the national floor wage,
+# in rupees); monthly figures assume 26 working days as the Code does
+MIN_DAILY_WAGE = float(os.environ.get("LEGALEASE_MIN_DAILY_WAGE", 178))
+WORKING_DAYS = {"hour": 1 / 8, "day": 1, "week": 6, "month": 26, "annum": 312, "year": 312}
+
+_AMOUNT = r"(?:rs\.?|inr|₹)\s*[\d,]+(?:\.\d+)?\s*(?:/-)?"
+_PERIOD = r"(?:per|a|an|every|/)\s*(?:hour|day|week|month|annum|year)"
+# A notice length: "30", "thirty (30)", "one", "a" followed by "days", "clear days", "month"...
+_NOTICE_LENGTH = (
+    r"(?:\d+|a|one|two|three|four|five|six|seven|eight|nine|ten|fourteen|fifteen|twenty|thirty"
+    r"|forty(?:[\s-]+five)?|sixty|ninety)\s*(?:\(\d+\)\s*)?"
+    r"(?:calendar\s+|working\s+|clear\s+)?(?:days?|weeks?|months?)"
+)
+
+# kind "requires": a finding when `when` matches but `pattern` never does
+# kind "forbids":  a finding for every match of `pattern`
+# kind "wage" / "max_days": a finding when the figure in a match breaks the limit
+CHECKS = [
+    {
+        "id": "registered_office",
+        "act": "Companies_Act_2013",
+        "section": "12",
+        "kind": "requires",
+        "when": r"\b(?:private\s+limited|pvt\.?\s*ltd\.?|limited\s+company|company\s+incorporated)\b",
+        "pattern": r"\bregistered\s+office\b",
+        "issue": "The company's registered office address is not stated",
+    },
+    {
+        "id": "corporate_identity_number",
+        "act": "Companies_Act_2013",
+        "section": "12",
+        "kind": "requires",
+        "when": r"\b(?:private\s+limited|pvt\.?\s*ltd\.?|limited\s+company|company\s+incorporated)\b",
+        "pattern": r"\b(?:[lu]\d{5}[a-z]{2}\d{4}[a-z]{3}\d{6}|cin|corporate\s+identity\s+number)\b",
+        "issue": "The company's Corporate Identity Number (CIN) is not stated",
+    },
+    {
+        "id": "loan_to_director",
+        "act": "Companies_Act_2013",
+        "section": "185",
+        "kind": "forbids",
+        "pattern": r"\b(?:loan|advance)s?\b[^.;]{0,60}?\bto\s+(?:any\s+|a\s+|the\s+|its\s+)?directors?\b",
+        "issue": "Provides for a loan or advance to a director",
+    },
+    {
+        "id": "assistance_for_own_shares",
+        "act": "Companies_Act_2013",
+        "section": "67",
+        "kind": "forbids",
+        "pattern": r"\b(?:buy\s*back|purchase|acquisition)\s+of\s+(?:its|the\s+company'?s)\s+own\s+shares\b",
+        "issue": "Provides for the company buying or financing the purchase of its own shares",
+    },
+    {
+        "id": "dividend_payment_period",
+        "act": "Companies_Act_2013",
+        "section": "127",
+        "kind": "max_days",
+        "limit": 30,
+        "pattern": r"\bdividends?\b[^.;]{0,80}?\bwithin\s+\d+\s+days\b",
+        "issue": "Allows {value:g} days to pay a declared dividend; the limit is {limit:g} days",
+    },
+    {
+        "id": "minimum_wage",
+        "act": "Code_of_Wages_2019",
+        "section": "9",
+        "kind": "wage",
+        "limit": MIN_DAILY_WAGE,
+        "pattern": rf"\b(?:wages?|salary|remuneration|stipend)\b[^.;]{{0,80}}?{_AMOUNT}\s*{_PERIOD}\b",
+        "issue": "Pays about Rs. {value:g} per day, below the floor wage of Rs. {limit:g} per day",
+        "penalty": {"employer": "Fine up to Rs. 50,000 (section 54)"},
+    },
+    {
+        "id": "notice_period",
+        "act": "Industrial_Relations_Code_2020",
+        "section": "70",
+        "kind": "requires",
+        "when": r"\b(?:terminat(?:e|es|ed|ion)|dismiss(?:al|ed)?|retrench(?:ment|ed)?)\b",
+        # "notice period", "thirty (30) days' written notice", "one month's notice",
+        # "notice in writing of not less than 30 days"
+        "pattern": (
+            rf"\b(?:notice\s+period|{_NOTICE_LENGTH}['’]?s?\s+(?:prior\s+)?(?:written\s+)?notice"
+            rf"|notice\s+(?:in\s+writing\s+)?(?:of\s+)?(?:not\s+less\s+than\s+|at\s+least\s+|a\s+minimum\s+of\s+)?{_NOTICE_LENGTH})\b"
+        ),
+        "issue": "Termination is provided for without a notice period",
+    },
+]
+
+_NUMBER = re.compile(r"\d[\d,]*(?:\.\d+)?")
+_WAGE_PERIOD = re.compile(r"(hour|day|week|month|annum|year)\b")
+
+def _compile(checks):
+    """One compiled, case-insensitive regex per distinct pattern.
+
+    Returns [(matcher, [(check index, role), ...])]; checks sharing a
+    pattern share its matcher and its hits.
+    """
+    roles = {}
+    for index, check in enumerate(checks):
+        for role in ("when", "pattern"):
+            if role in check:
+                roles.setdefault(check[role], []).append((index, role))
+    return [(re.compile(pattern, re.IGNORECASE), users) for pattern, users in roles.items()]
+
+_matchers = _compile(CHECKS)
+_penalties = None
+_penalties_lock = threading.Lock()
+
+def section_penalties():
+    """{(act, section): penalty dict} from noncompliance.json, read once."""
+    global _penalties
+    with _penalties_lock:
+        if _penalties is None:
+            penalties = {}
+            try:
+                with open(NONCOMPLIANCE_PATH, "r", encoding="utf-8") as f:
+                    for entries in json.load(f).values():
+                        for entry in entries:
+                            penalties[("Companies_Act_2013", str(entry.get("section")))] = entry.get("penalty") or {}
+            except FileNotFoundError:
+                print(f"Non-compliance rules not found: {NONCOMPLIANCE_PATH}")
+            _penalties = penalties
+        return _penalties
+
+def _figure(check, text):
+    """The number a threshold check compares, normalized to days or to a daily wage."""
+    numbers = _NUMBER.findall(text)
+    if not numbers:
+        return None
+    value = float(numbers[-1].replace(",", ""))
+    if check["kind"] == "wage":
+        period = _WAGE_PERIOD.findall(text.lower())
+        return value / WORKING_DAYS[period[-1]] if period else None
+    return value
+
+def prescreen(text):
+    """Run every check over text.
+
+    Returns {"findings": [...], "checked": [check ids]}. Each finding is a
+    dict with "check", "act", "section", "issue", "penalty" (or None) and
+    "evidence", the matched text or None when something is missing.
+    """
+    hits = {}
+    for matcher, users in _matchers:
+        found = [match.group(0) for match in matcher.finditer(text)]
+        if found:
+            for index, role in users:
+                hits[(index, role)] = found
+
+    penalties = section_penalties()
+    findings = []
+    checked = []
+    for index, check in enumerate(CHECKS):
+        matches = hits.get((index, "pattern"), [])
+        if check["kind"] == "requires":
+            if not hits.get((index, "when")):
+                continue
+            failures = [] if matches else [(None, None)]
+        elif check["kind"] == "forbids":
+            failures = [(None, evidence) for evidence in matches]
+        else:
+            failures = []
+            for evidence in matches:
+                value = _figure(check, evidence)
+                if value is None:
+                    continue
+                too_high = check["kind"] == "max_days" and value > check["limit"]
+                too_low = check["kind"] == "wage" and value < check["limit"]
+                if too_high or too_low:
+                    failures.append((value, evidence))
+        checked.append(check["id"])
+
+        penalty = check.get("penalty") or penalties.get((check["act"], check["section"]))
+        for value, evidence in failures:
+            findings.append({
+                "check": check["id"],
+                "act": check["act"],
+                "section": check["section"],
+                "issue": check["issue"].format(value=round(value or 0, 2), limit=check.get("limit", 0)),
+                "penalty": penalty or None,
+                "evidence": " ".join(evidence.split()) if evidence else None,
+            })
+    return {"findings": findings, "checked": checked}
+
+def describe_finding(finding):
+    """One line for an issue list: section, issue, evidence and penalty."""
+    line = f"Section {finding['section']}: {finding['issue']}"
+    if finding["evidence"]:
+        line += f' ("{finding["evidence"][:120]}")'
+    if finding["penalty"]:
+        line += ". Penalty: " + "; ".join(f"{who}: {what}" for who, what in finding["penalty"].items())
+    return line
+
+def describe_checks(check_ids):
+    """The checks already decided locally, phrased for a prompt."""
+    by_id = {check["id"]: check for check in CHECKS}
+    return "\n".join(
+        f"- {by_id[check_id]['act'].replace('_', ' ')}, Section {by_id[check_id]['section']}: {by_id[check_id]['id'].replace('_', ' ')}"
+        for check_id in check_ids
+    )
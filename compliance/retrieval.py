@@ -0,0 +1,100 @@
+"""BM25 ranking of statutory rules against contract clauses.
+
+The BM25 weight matrix (rules x terms) is precomputed offline with the rule
+corpus and shipped in the same artifact (see compliance.rule_corpus). At
+analysis time each clause becomes a sparse term vector, all clauses of a
+chunk are scored with a single sparse matrix product, and only the top-k
+rules per clause go into the prompt. Rules can also be looked up by act and
+section number.
+
+    python -m compliance.retrieval "notice period for termination"
+    python -m compliance.retrieval --act Companies_Act_2013 --section 185
+"""
+import argparse
+import os
+import sys
+import threading
+
+import numpy as np
+from scipy import sparse
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(current_dir))
+
+from compliance.rule_corpus import citation, get_corpus, tokenize
+
+class RuleRetriever:
+    """Scores clauses against the precomputed BM25 matrix and returns the best rules."""
+    def __init__(self, corpus):
+        self.rules = corpus["rules"]
+        self.fingerprint = corpus["fingerprint"]
+        self.vocabulary = {term: i for i, term in enumerate(corpus["terms"])}
+        # Scoring multiplies queries by the transposed matrix; do it once
+        self.weights_t = corpus["weights"].T.tocsr()
+        self.sections = {}
+        for rule in self.rules:
+            self.sections.setdefault((rule["act"], rule["section"]), []).append(rule)
+
+    def _query_matrix(self, texts):
+        rows, cols = [], []
+        for row, text in enumerate(texts):
+            for term in {self.vocabulary[token] for token in tokenize(text) if token in self.vocabulary}:
+                rows.append(row)
+                cols.append(term)
+        return sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.float32), (rows, cols)),
+            shape=(len(texts), len(self.vocabulary)),
+        )
+
+    def lookup(self, act, section):
+        """Rules of one section of an act, in corpus order."""
+        return self.sections.get((act, str(section)), [])
+
+    def top_k(self, texts, k=3, min_score=1.0):
+        """For every text, up to k (rule, score) pairs ranked by BM25, best first."""
+        if not texts:
+            return []
+        scores = (self._query_matrix(texts) @ self.weights_t).toarray()
+        results = []
+        for row in scores:
+            k_row = min(k, len(row))
+            if k_row == 0:
+                results.append([])
+                continue
+            best = np.argpartition(-row, k_row - 1)[:k_row]
+            best = best[np.argsort(-row[best])]
+            results.append([(self.rules[i], float(row[i])) for i in best if row[i] >= min_score])
+        return results
+
+_retriever = None
+_retriever_lock = threading.Lock()
+
+def get_retriever(artifact_path=None):
+    """Process-wide retriever over the rule corpus artifact."""
+    global _retriever
+    with _retriever_lock:
+        if _retriever is None:
+            _retriever = RuleRetriever(get_corpus(artifact_path))
+        return _retriever
+
+def main():
+    parser = argparse.ArgumentParser(description="Rank statutory rules against a clause.")
+    parser.add_argument("query", nargs="?", help="clause text to rank rules against")
+    parser.add_argument("--artifact", default=None, help="rule corpus artifact (see compliance.rule_corpus)")
+    parser.add_argument("--act", default="Companies_Act_2013", help="act for --section")
+    parser.add_argument("--section", default=None, help="list the rules of this section instead of ranking")
+    parser.add_argument("-k", type=int, default=5)
+    args = parser.parse_args()
+    if args.query is None and args.section is None:
+        parser.error("give a query or --section")
+
+    retriever = get_retriever(args.artifact)
+    if args.section is not None:
+        for rule in retriever.lookup(args.act, args.section):
+            print(f"[{rule['act']}, {citation(rule)}] {rule['rule'][:120]}")
+        return
+    for rule, score in retriever.top_k([args.query], k=args.k)[0]:
+        print(f"{score:6.2f} [{rule['act']}, {citation(rule)}] {rule['rule'][:110]}")
+
+if __name__ == "__main__":
+    main()
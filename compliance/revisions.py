@@ -0,0 +1,142 @@
+"""Per-clause bookkeeping for analyzing successive revisions of one agreement.
+
+A contract is cut into clauses (common.clauses) and every clause is hashed.
+Clauses are analyzed in units of one or more neighbouring clauses, and each
+unit's partial analysis is stored with the hashes of its clauses. When a
+new revision comes in, a stored unit is reused as long as all of its
+clauses still appear in the new text unchanged. Only the remaining clauses
+(added or edited ones, plus the unchanged neighbours of a broken unit)
+are analyzed again.
+"""
+import hashlib
+import os
+
+from common.chunking import split_clauses
+from common.disk_cache import DiskCache, cache_root
+
+# Bump whenever the stored revision layout or the clause split changes
+REVISION_VERSION = "2"
+
+_store = None
+
+def get_revision_store():
+    """Process-wide store of the latest analyzed revision per agreement, or None if unavailable."""
+    global _store
+    if _store is None:
+        max_mb = int(os.environ.get("LEGALEASE_REVISION_CACHE_MB", "128"))
+        try:
+            _store = DiskCache(os.path.join(cache_root(), "revisions"), max_bytes=max_mb * 1024 * 1024)
+        except OSError as e:
+            print(f"Revision store disabled: {e}")
+            return None
+    return _store
+
+def _key(document_id):
+    return hashlib.sha256(f"{REVISION_VERSION}:{document_id}".encode("utf-8")).hexdigest()
+
+def clause_hash(text):
+    """Hash of a clause that ignores differences in whitespace."""
+    return hashlib.sha256(" ".join(text.split()).encode("utf-8")).hexdigest()[:32]
+
+def split_revision(contract_text):
+    """[(hash, clause text)] for every clause of a contract, in order."""
+    return [(clause_hash(clause), clause) for clause in split_clauses(contract_text)]
+
+def load_revision(document_id):
+    """The last stored revision of an agreement: {"version", "clauses", "complete", "units", "analysis"}, or None.
+
+    "complete" is False when some clauses failed to analyze; those are not
+    covered by any unit and are analyzed again with the next revision.
+    """
+    store = get_revision_store()
+    return store.get(_key(document_id)) if store is not None else None
+
+def save_revision(document_id, revision):
+    store = get_revision_store()
+    if store is None:
+        return
+    try:
+        store.set(_key(document_id), revision)
+    except OSError as e:
+        print(f"Error saving contract revision: {e}")
+
+def _place(unit_clauses, where, claimed):
+    """Indices of the new revision a stored unit covers, or None if its clauses are not all there.
+
+    A clause that occurs more than once (repeated boilerplate) is matched to
+    an occurrence no other unit has claimed, preferring occurrences that
+    follow each other in the unit's order.
+    """
+    for start in where.get(unit_clauses[0], []):
+        if start in claimed:
+            continue
+        indices = [start]
+        for digest in unit_clauses[1:]:
+            following = [index for index in where.get(digest, [])
+                         if index > indices[-1] and index not in claimed and index not in indices]
+            if not following:
+                break
+            indices.append(following[0])
+        else:
+            return indices
+    # Clauses moved around inside the unit: any free occurrence of each will do
+    indices = []
+    for digest in unit_clauses:
+        free = [index for index in where.get(digest, []) if index not in claimed and index not in indices]
+        if not free:
+            return None
+        indices.append(free[0])
+    return indices
+
+def plan_revision(clauses, previous):
+    """Split the clauses of a new revision into stored units to reuse and clause runs to analyze.
+
+    clauses is the output of split_revision. Returns (reused, runs): reused
+    is a list of (position, unit) for every stored unit whose clauses all
+    still appear, position being the index of the unit's first clause in
+    the new revision; every run is a list of consecutive clause indices that
+    no reused unit covers.
+    """
+    where = {}
+    for index, (digest, _) in enumerate(clauses):
+        where.setdefault(digest, []).append(index)
+    reused = []
+    claimed = set()
+    for unit in (previous or {}).get("units", []):
+        if not unit["clauses"]:
+            continue
+        indices = _place(unit["clauses"], where, claimed)
+        if indices is not None:
+            reused.append((min(indices), unit))
+            claimed.update(indices)
+
+    runs = []
+    current = []
+    for index in range(len(clauses)):
+        if index in claimed:
+            if current:
+                runs.append(current)
+                current = []
+            continue
+        current.append(index)
+    if current:
+        runs.append(current)
+    return reused, runs
+
+def pack_runs(clauses, runs, max_tokens, count_tokens):
+    """Group each run of clause indices into units of at most max_tokens (one clause may exceed it)."""
+    units = []
+    for run in runs:
+        unit = []
+        unit_tokens = 0
+        for index in run:
+            tokens = count_tokens(clauses[index][1])
+            if unit and unit_tokens + tokens > max_tokens:
+                units.append(unit)
+                unit = []
+                unit_tokens = 0
+            unit.append(index)
+            unit_tokens += tokens
+        if unit:
+            units.append(unit)
+    return units
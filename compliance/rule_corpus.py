@@ -0,0 +1,422 @@
+"""Offline build of the deduplicated statutory rule corpus.
+
+The four rule files in compliance/rules overlap heavily: the two per-section
+files are byte-identical, and their "rule" fields are concatenated tables of
+contents ("Punishment for ...  58. Refusal of ...  59. ..."). The build step
+reads every source file once and then:
+
+- normalizes the text (whitespace, mis-encoded quotes)
+- splits section listings into one record per section
+- attributes every record to the section it sits in, carrying the last
+  section heading forward over the lines that follow it; in the schedules
+  (Table F and the like) numbered paragraphs are regulations, not sections
+- drops compliance_rules.json lines that are stripped copies of the lines of
+  compliance_rules_with_context.json, and records that repeat the text of
+  another one under the same act and section
+- precomputes the BM25 weight matrix used by compliance.retrieval
+
+The result is written to a single versioned, compressed .npz artifact that
+the app loads in one read. The artifact is shipped in compliance/rules, so
+the raw JSON is only parsed when the sources or CORPUS_VERSION change.
+
+    python -m compliance.rule_corpus          # rebuild the artifact
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+
+import numpy as np
+from scipy import sparse
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(current_dir))
+
+from common.disk_cache import cache_root
+
+RULES_DIR = os.path.join(current_dir, "rules")
+NONCOMPLIANCE_PATH = os.path.join(current_dir, "noncompliance.json")
+ARTIFACT_PATH = os.path.join(RULES_DIR, "rule_corpus.npz")
+
+# Bump whenever normalization, splitting or the artifact layout changes
+CORPUS_VERSION = "2"
+
+# Every rule file is extracted from the Companies Act, 2013; the act names
+# match the keys of "compliance_check" in LLMIntegration.analyze_contract
+RULE_FILES = {
+    "compliance_rules.json": "Companies_Act_2013",
+    "compliance_rules_per_section.json": "Companies_Act_2013",
+    "compliance_rules_per_section_multi.json": "Companies_Act_2013",
+    "compliance_rules_with_context.json": "Companies_Act_2013",
+}
+# compliance_rules.json holds the lines of compliance_rules_with_context.json,
+# one for one, with their section headings cut off
+STRIPPED_COPIES = {
+    "compliance_rules.json": "compliance_rules_with_context.json",
+}
+NONCOMPLIANCE_ACTS = {
+    "CompaniesAct2013_NonComplianceRules": "Companies_Act_2013",
+}
+
+# Standard BM25 parameters
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# "36. Punishment for ...", "76A. Punishment ..." or "(See section 135)"
+_SECTION_NUMBER = re.compile(r"^\s*(\d+[A-Z]*)\.\s")
+_SEE_SECTION = re.compile(r"\(See section (\d+[A-Z]*)\)", re.IGNORECASE)
+# A section heading in the body of the Act: "12. Registered office of company.— (1) ..."
+# (not a contents line running into "PART II.—Winding up ...")
+_SECTION_HEADING = re.compile(r"^\s*\d+[A-Z]*\.\s+(?:(?!PART|CHAPTER)[^—]){1,200}?\.\s*—")
+# Footnotes on amendments and commencement dates, also numbered from 1:
+# "1. Subs. by Act 21 of 2015, s. 11, ...", "1. 1st April 2014 – S. 2(2), ..."
+_FOOTNOTE = re.compile(
+    r"^\s*(?:\d+\.\s+)?(?:Subs\.|Ins\.|.{0,80}?\b(?i:omitted|substituted|inserted)\b|.{0,120}?\bw\.e\.f\.|\d{1,2}(?:st|nd|rd|th)\s+\w+,?\s+\d{4}|[^.]{0,80}?\bby\s+Act\s+\d+)"
+)
+# Entries of a concatenated listing are separated by two or more spaces and
+# start with a capital: "...shareholder.  58. Refusal of registration...
+# 59. Rectification..." (but not a wrapped "under section  143.  (5) The ...")
+_LISTING_ENTRY = re.compile(r"(?:^|\s{2,}(?=\d+[A-Z]*\.\s+[A-Z\[]))(\d+[A-Z]*)\.\s+")
+# The PDF extraction turned quotes into box-drawing and doubled single quotes
+_QUOTES = {"‗‗": '"', "‘‘": '"', "’’": '"', "‗": "'", "‘": "'", "’": "'", "“": '"', "”": '"'}
+_QUOTE = re.compile("|".join(sorted(map(re.escape, _QUOTES), key=len, reverse=True)))
+
+_WORD = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset("""
+a an and any are as at be by for from has have in is it its of on or such
+shall that the their this to under which with without may been not other
+than any all each every where whether who whom will would said same
+""".split())
+
+def tokenize(text):
+    return [word for word in _WORD.findall(text.lower()) if len(word) > 2 and word not in STOPWORDS]
+
+def default_artifact_path():
+    return os.environ.get("LEGALEASE_RULE_CORPUS", ARTIFACT_PATH)
+
+def normalize_text(text):
+    """Collapse whitespace and repair the quotes mangled by PDF extraction."""
+    if not text:
+        return ""
+    return " ".join(_QUOTE.sub(lambda match: _QUOTES[match.group(0)], text).split())
+
+def parse_section(*texts):
+    """Section number referred to by a rule, e.g. "36" or "76A", or None."""
+    for text in texts:
+        if not text:
+            continue
+        match = _SECTION_NUMBER.match(text) or _SEE_SECTION.search(text)
+        if match:
+            return match.group(1)
+    return None
+
+def split_listing(text):
+    """Split a concatenated section listing into (section, text) pairs.
+
+    Text before the first numbered entry comes back with section None; text
+    without any listing comes back as a single pair.
+    """
+    pieces = []
+    section, start = None, 0
+    for match in _LISTING_ENTRY.finditer(text):
+        pieces.append((section, text[start:match.start()]))
+        section, start = match.group(1), match.end()
+    pieces.append((section, text[start:]))
+    return [(section, normalize_text(piece)) for section, piece in pieces if piece.strip()]
+
+def _number(section):
+    """Sort key of a section number: "76A" -> (76, "A")."""
+    match = re.match(r"(\d+)([A-Z]*)", section)
+    return int(match.group(1)), match.group(2)
+
+class SectionCursor:
+    """Nearest enclosing section (or schedule regulation) while reading a rule file in document order.
+
+    place(text, number) is called for every line, with the number the line
+    starts with, if any. A section heading sets the section carried over the
+    following lines; a number that drops below it (past the last section of
+    the Act) opens the schedules, where the section is reset and numbered
+    paragraphs carry a regulation number instead. The table of contents at
+    the start of the Act lists numbers without headings and sets nothing.
+    """
+    def __init__(self):
+        self.section = None
+        self.regulation = None
+        self.in_schedule = False
+
+    def place(self, text, number=None):
+        """(section, regulation) of one line."""
+        if number is None or _FOOTNOTE.match(text):
+            return self.section, self.regulation
+        line = text if _SECTION_NUMBER.match(text) else f"{number}. {text}"
+        if self.in_schedule:
+            # Every table and schedule numbers its paragraphs from 1 again
+            self.regulation = number
+            see = _SEE_SECTION.search(text)
+            return (see.group(1) if see else None), number
+        if _SECTION_HEADING.match(line):
+            if self.section is None or _number(number) > _number(self.section):
+                self.section = number
+            return number, None
+        if self.section is not None and _number(number) < _number(self.section):
+            self.in_schedule = True
+            self.section = None
+            self.regulation = number
+            return None, number
+        if self.section is not None and _number(number)[0] <= _number(self.section)[0] + 5:
+            # A heading whose dash wrapped onto the next line
+            self.section = number
+        return number, None
+
+def citation(rule):
+    """Where a rule sits: "Section 12", "Schedule, regulation 12" or "Section n/a"."""
+    if rule.get("section"):
+        return f"Section {rule['section']}"
+    if rule.get("regulation"):
+        return f"Schedule, regulation {rule['regulation']}"
+    return "Section n/a"
+
+def _source_files():
+    files = [os.path.join(RULES_DIR, name) for name in RULE_FILES]
+    return files + [NONCOMPLIANCE_PATH]
+
+def source_fingerprint():
+    """Corpus version plus the size of every source file.
+
+    Sizes rather than mtimes, so the shipped artifact stays valid after a
+    fresh checkout; editing a source file almost always changes its size,
+    and CORPUS_VERSION covers everything else.
+    """
+    parts = [CORPUS_VERSION]
+    for path in _source_files():
+        try:
+            parts.append(f"{os.path.basename(path)}:{os.path.getsize(path)}")
+        except FileNotFoundError:
+            parts.append(f"{os.path.basename(path)}:missing")
+    return "|".join(parts)
+
+def _read_sources():
+    """Yield (file name, act, entries) for every distinct rule file; byte-identical copies are read once."""
+    seen = set()
+    for name, act in RULE_FILES.items():
+        path = os.path.join(RULES_DIR, name)
+        try:
+            with open(path, "rb") as f:
+                raw = f.read()
+        except FileNotFoundError:
+            print(f"Rule file not found: {path}")
+            continue
+        digest = hashlib.sha256(raw).digest()
+        if digest in seen:
+            continue
+        seen.add(digest)
+        yield name, act, json.loads(raw)
+
+def build_corpus():
+    """Normalized, deduplicated rule records from every source file.
+
+    Each record is a dict with "id", "act", "section", "regulation" (the
+    paragraph number of a schedule rule, whose section is None), "rule",
+    "context", "penalty" (a dict, only for noncompliance.json rules),
+    "page_number" and "source".
+    """
+    records = []
+    by_text = {}
+
+    def add(record):
+        # The same text may be listed with and without its section number
+        # (compliance_rules.json has none); a copy without one is dropped and
+        # a numbered copy fills in the section of an unnumbered one
+        copies = by_text.setdefault((record["act"], record["rule"].lower()), [])
+        for existing in copies:
+            if existing["section"] is None and record["section"] is not None:
+                existing["section"] = record["section"]
+            elif record["section"] is not None and existing["section"] != record["section"]:
+                continue
+            # Keep the first copy but fill in whatever it was missing
+            for field in ("regulation", "context", "penalty", "page_number"):
+                if existing[field] is None:
+                    existing[field] = record[field]
+            return
+        record["id"] = len(records) + 1
+        copies.append(record)
+        records.append(record)
+
+    sources = {name: (act, entries) for name, act, entries in _read_sources()}
+    for name, (act, entries) in sources.items():
+        copy_of = sources.get(STRIPPED_COPIES.get(name), (None, []))[1]
+        if len(copy_of) == len(entries) and all(
+            normalize_text(entry.get("rule")) in normalize_text(original.get("rule"))
+            for entry, original in zip(entries, copy_of)
+        ):
+            continue
+        cursor = SectionCursor()
+        for entry in entries:
+            context = normalize_text(entry.get("context")) or None
+            # The per-section files key an entry by the line before it, often a section heading
+            heading = normalize_text(entry.get("section"))
+            if heading:
+                match = _SECTION_NUMBER.match(heading)
+                cursor.place(heading, match.group(1) if match else None)
+            for position, (number, rule) in enumerate(split_listing(entry.get("rule") or "")):
+                section, regulation = cursor.place(rule, number)
+                if position == 0 and section is None and regulation is None:
+                    # Only the leading piece belongs to the entry's own heading and context
+                    section = parse_section(entry.get("section"), context)
+                add({
+                    "act": act,
+                    "section": section,
+                    "regulation": regulation,
+                    "rule": rule,
+                    "context": context if position == 0 else None,
+                    "penalty": None,
+                    "page_number": entry.get("page_number"),
+                    "source": name,
+                })
+
+    try:
+        with open(NONCOMPLIANCE_PATH, "r", encoding="utf-8") as f:
+            noncompliance = json.load(f)
+    except FileNotFoundError:
+        print(f"Non-compliance rules not found: {NONCOMPLIANCE_PATH}")
+        noncompliance = {}
+    for key, entries in noncompliance.items():
+        act = NONCOMPLIANCE_ACTS.get(key, key)
+        for entry in entries:
+            add({
+                "act": act,
+                "section": str(entry.get("section", "")).strip() or None,
+                "regulation": None,
+                "rule": normalize_text(entry.get("rule")),
+                "context": None,
+                "penalty": entry.get("penalty") or None,
+                "page_number": None,
+                "source": os.path.basename(NONCOMPLIANCE_PATH),
+            })
+    return records
+
+def bm25_weights(records):
+    """Sparse (records x terms) BM25 document weight matrix and its term list."""
+    vocabulary = {}
+    rows, cols, counts = [], [], []
+    for row, record in enumerate(records):
+        term_counts = {}
+        for token in tokenize(f"{record['rule']} {record.get('context') or ''}"):
+            term = vocabulary.setdefault(token, len(vocabulary))
+            term_counts[term] = term_counts.get(term, 0) + 1
+        for term, count in term_counts.items():
+            rows.append(row)
+            cols.append(term)
+            counts.append(count)
+
+    tf = sparse.csr_matrix(
+        (np.asarray(counts, dtype=np.float32), (np.asarray(rows, dtype=np.int64), np.asarray(cols, dtype=np.int64))),
+        shape=(len(records), len(vocabulary)),
+    )
+    doc_lengths = np.asarray(tf.sum(axis=1)).ravel()
+    avg_length = doc_lengths.mean() if len(doc_lengths) else 0.0
+    doc_freq = np.bincount(tf.indices, minlength=len(vocabulary))
+    idf = np.log(1 + (len(records) - doc_freq + 0.5) / (doc_freq + 0.5)).astype(np.float32)
+
+    # weight = idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * dl / avgdl)), computed on the non-zeros only
+    norm = BM25_K1 * (1 - BM25_B + BM25_B * doc_lengths / max(avg_length, 1e-9))
+    row_of_entry = np.repeat(np.arange(tf.shape[0]), np.diff(tf.indptr))
+    weights = tf.copy()
+    weights.data = (idf[tf.indices] * tf.data * (BM25_K1 + 1) / (tf.data + norm[row_of_entry])).astype(np.float32)
+
+    terms = [None] * len(vocabulary)
+    for token, term in vocabulary.items():
+        terms[term] = token
+    return weights, terms
+
+def _json_bytes(value):
+    # UTF-8 bytes; a NumPy string array would hold four bytes per character
+    return np.frombuffer(json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8"), dtype=np.uint8)
+
+def build_artifact(artifact_path=None):
+    """Build the corpus and its BM25 weights and save them as one compressed artifact."""
+    artifact_path = artifact_path or default_artifact_path()
+    records = build_corpus()
+    weights, terms = bm25_weights(records)
+
+    os.makedirs(os.path.dirname(os.path.abspath(artifact_path)), exist_ok=True)
+    tmp_path = f"{artifact_path}.{os.getpid()}.tmp.npz"
+    np.savez_compressed(
+        tmp_path,
+        version=np.asarray(CORPUS_VERSION),
+        fingerprint=np.asarray(source_fingerprint()),
+        rules=_json_bytes(records),
+        terms=_json_bytes(terms),
+        data=weights.data,
+        indices=weights.indices.astype(np.int32),
+        indptr=weights.indptr.astype(np.int32),
+        shape=np.asarray(weights.shape),
+    )
+    os.replace(tmp_path, artifact_path)
+    return artifact_path
+
+def load_artifact(artifact_path):
+    """Read an artifact into {"version", "fingerprint", "rules", "terms", "weights"}."""
+    with np.load(artifact_path, allow_pickle=False) as artifact:
+        return {
+            "version": str(artifact["version"]),
+            "fingerprint": str(artifact["fingerprint"]),
+            "rules": json.loads(artifact["rules"].tobytes()),
+            "terms": json.loads(artifact["terms"].tobytes()),
+            "weights": sparse.csr_matrix(
+                (artifact["data"], artifact["indices"], artifact["indptr"]),
+                shape=tuple(artifact["shape"]),
+            ),
+        }
+
+def _load_current(artifact_path):
+    if not os.path.exists(artifact_path):
+        return None
+    try:
+        corpus = load_artifact(artifact_path)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Ignoring unreadable rule corpus {artifact_path}: {e}")
+        return None
+    if corpus["fingerprint"] != source_fingerprint():
+        return None
+    return corpus
+
+_corpus = None
+_corpus_lock = threading.Lock()
+
+def get_corpus(artifact_path=None):
+    """Process-wide rule corpus.
+
+    The shipped artifact is used when it matches the sources; otherwise the
+    corpus is rebuilt once into the cache directory, since the install
+    directory may not be writable.
+    """
+    global _corpus
+    with _corpus_lock:
+        if _corpus is not None:
+            return _corpus
+        artifact_path = artifact_path or default_artifact_path()
+        corpus = _load_current(artifact_path)
+        if corpus is None:
+            fallback_path = os.path.join(cache_root(), "rule_corpus.npz")
+            corpus = _load_current(fallback_path)
+            if corpus is None:
+                corpus = load_artifact(build_artifact(fallback_path))
+        _corpus = corpus
+        return _corpus
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the deduplicated compliance rule corpus.")
+    parser.add_argument("--artifact", default=None, help="artifact path (default: LEGALEASE_RULE_CORPUS or compliance/rules/rule_corpus.npz)")
+    args = parser.parse_args()
+
+    path = build_artifact(args.artifact)
+    corpus = load_artifact(path)
+    print(f"Rule corpus v{corpus['version']} written to {path}: "
+          f"{len(corpus['rules'])} rules, {len(corpus['terms'])} terms, {os.path.getsize(path) // 1024} KB")
+
+if __name__ == "__main__":
+    main()
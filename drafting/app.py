@@ -1,107 +1,36 @@
 import streamlit as st
 import os
+import sys
 import json
-from docx import Document
-from docx.shared import Pt
-from docx.enum.style import WD_STYLE_TYPE
-import mammoth
-import re
+import csv
 import tempfile
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.enums import TA_JUSTIFY, TA_CENTER
-from io import BytesIO
 
-# Function to replace text in paragraphs and runs
-def replace_text_in_paragraph(paragraph, placeholder, new_text):
-    # Pattern to match both [placeholder] and [Insert Type: placeholder] formats
-    pattern = rf'\[(?:.*?:)?\s*{re.escape(placeholder)}\]'
-    if re.search(pattern, paragraph.text):
-        inline = paragraph.runs
-        for i in range(len(inline)):
-            if re.search(pattern, inline[i].text):
-                text = re.sub(pattern, new_text, inline[i].text)
-                inline[i].text = text
+# Add the parent directory to sys.path so the shared `common` package resolves
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from drafting.template_engine import fill_template
+from drafting.template_registry import get_template_registry
+from drafting.rendering import DOCX_MIME, PDF_MIME, render_contract
+from drafting.batch import generate_batch, read_rows, write_zip
+
+# Batch ZIPs larger than this are built in a temporary file instead of memory
+BATCH_SPOOL_BYTES = 32 * 1024 * 1024
 
 # Function to generate the document
 def generate_document(selected_contract, form_details, local_file_path):
+    # Templates are opened, styled and indexed once per process; every
+    # contract is filled into a fresh copy
     try:
-        doc = Document(local_file_path)
+        doc, slots = get_template_registry().clone(selected_contract, local_file_path)
     except Exception as e:
         st.error(f"Error opening document: {e}")
         return None
 
-    # Create styles if they don't exist
-    styles = doc.styles
-    if 'Heading 1' not in styles:
-        styles.add_style('Heading 1', WD_STYLE_TYPE.PARAGRAPH)
-        styles['Heading 1'].font.size = Pt(16)
-        styles['Heading 1'].font.bold = True
-    if 'Heading 2' not in styles:
-        styles.add_style('Heading 2', WD_STYLE_TYPE.PARAGRAPH)
-        styles['Heading 2'].font.size = Pt(14)
-        styles['Heading 2'].font.bold = True
-
-    # Apply formatting and replacements
-    for paragraph in doc.paragraphs:
-        # Apply heading styles
-        if paragraph.text.startswith(selected_contract.upper()):
-            paragraph.style = styles['Heading 1']
-        elif paragraph.text.strip().startswith(("1.", "2.", "3.", "4.", "5.", "6.", "7.", "8.", "9.", "10.", "11.", "12.")):
-            paragraph.style = styles['Heading 2']
-        
-        # Replace placeholders
-        for placeholder, value in form_details.items():
-            replace_text_in_paragraph(paragraph, placeholder, value)
+    # Replace all placeholders in one pass
+    fill_template(doc, slots, form_details)
 
     return doc
 
-# Function to convert DOCX to PDF using reportlab
-def convert_docx_to_pdf(docx_content):
-    # Convert DOCX to HTML
-    result = mammoth.convert_to_html(docx_content)
-    html_content = result.value
-
-    # Create a PDF buffer
-    buffer = BytesIO()
-
-    # Create the PDF document
-    doc = SimpleDocTemplate(buffer, pagesize=letter)
-
-    # Create styles
-    styles = getSampleStyleSheet()
-    styles.add(ParagraphStyle(name='Justify', alignment=TA_JUSTIFY))
-    styles.add(ParagraphStyle(name='Center', alignment=TA_CENTER))
-
-    # Create a list to hold the flowables
-    flowables = []
-
-    # Split the HTML content into paragraphs
-    paragraphs = re.split('</p>|</h1>|</h2>', html_content)
-
-    for p in paragraphs:
-        if p.strip():
-            if p.startswith('<h1'):
-                p = p.replace('<h1>', '').replace('</h1>', '')
-                flowables.append(Paragraph(p, styles['Heading1']))
-            elif p.startswith('<h2'):
-                p = p.replace('<h2>', '').replace('</h2>', '')
-                flowables.append(Paragraph(p, styles['Heading2']))
-            else:
-                p = p.replace('<p>', '').replace('</p>', '')
-                flowables.append(Paragraph(p, styles['Justify']))
-            flowables.append(Spacer(1, 12))
-
-    # Build the PDF
-    doc.build(flowables)
-
-    # Get the value of the BytesIO buffer
-    pdf_bytes = buffer.getvalue()
-    buffer.close()
-
-    return pdf_bytes
-
 # CSS for styling the preview
 preview_css = """
 <style>
@@ -135,15 +64,15 @@ def main():
     # Get the absolute path of the current script
     current_dir = os.path.dirname(os.path.abspath(__file__))
 
-    # Set the docs directory path
+    # Set the docs directory path (templates are only read from it)
     docs_dir = os.path.join(current_dir, 'docs')
-    os.makedirs(docs_dir, exist_ok=True)
 
-    # Load contract types from JSON file
+    registry = get_template_registry()
+
+    # Load contract types from JSON file (cached until the file changes)
     contract_types_path = os.path.join(current_dir, 'contract_types.json')
     try:
-        with open(contract_types_path, 'r') as f:
-            contract_types = json.load(f)
+        contract_types = registry.contract_types()
     except FileNotFoundError:
         st.error(f"Contract types file not found: {contract_types_path}")
         return
@@ -151,11 +80,10 @@ def main():
         st.error(f"Error parsing contract types JSON file: {contract_types_path}")
         return
 
-    # Load placeholder questions from JSON file
+    # Load placeholder questions from JSON file (cached until the file changes)
     placeholder_questions_path = os.path.join(current_dir, 'placeholder_questions.json')
     try:
-        with open(placeholder_questions_path, 'r') as f:
-            placeholder_questions = json.load(f)
+        placeholder_questions = registry.placeholder_questions()
     except FileNotFoundError:
         st.error(f"Placeholder questions file not found: {placeholder_questions_path}")
         return
@@ -198,59 +126,76 @@ def main():
             if doc is None:
                 return
 
-            # Save the document to a temporary file
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.docx') as tmp_file:
-                doc.save(tmp_file.name)
-                tmp_file_path = tmp_file.name
-
-            # Convert the document to HTML for preview
+            # Serialize once and convert to HTML once, in memory; the same
+            # HTML feeds the preview and the PDF
             try:
-                with open(tmp_file_path, 'rb') as docx_file:
-                    result = mammoth.convert_to_html(docx_file)
-                    html_content = result.value
+                rendered = render_contract(doc)
             except Exception as e:
-                st.error(f"Error converting document to HTML: {e}")
+                st.error(f"Error converting document: {e}")
                 return
 
             # Wrap the HTML content with our custom CSS
-            styled_html = f"{preview_css}<div class='contract-preview'>{html_content}</div>"
+            styled_html = f"{preview_css}<div class='contract-preview'>{rendered['html']}</div>"
 
             # Display the preview
             st.subheader("Contract Preview")
             st.components.v1.html(styled_html, height=600, scrolling=True)
 
-            # Save as DOCX
-            output_docx_path = os.path.join(docs_dir, f'{selected_contract.lower().replace(" ", "_")}_output.docx')
-            doc.save(output_docx_path)
-
-            # Convert to PDF
-            with open(tmp_file_path, 'rb') as docx_file:
-                pdf_bytes = convert_docx_to_pdf(docx_file)
-
             # Download buttons
             st.subheader("Download Options")
-            
-            # DOCX download
-            with open(output_docx_path, 'rb') as f:
-                docx_bytes = f.read()
-            
+
             st.download_button(
                 label="Download Contract (DOCX)",
-                data=docx_bytes,
+                data=rendered["docx"],
                 file_name=f'{selected_contract.lower().replace(" ", "_")}.docx',
-                mime='application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+                mime=DOCX_MIME
             )
 
             # PDF download
             st.download_button(
                 label="Download Contract (PDF)",
-                data=pdf_bytes,
+                data=rendered["pdf"],
                 file_name=f'{selected_contract.lower().replace(" ", "_")}.pdf',
-                mime='application/pdf'
+                mime=PDF_MIME
             )
 
-            # Remove the temporary file
-            os.unlink(tmp_file_path)
+        # Batch mode: one contract per row of an uploaded CSV or JSONL file
+        st.subheader("Batch Generation")
+        st.caption(f"Upload a CSV (one column per field) or JSONL file (one object per line) to generate many {selected_contract}s at once. Field names: {', '.join(placeholder_questions.get(selected_contract, {}))}")
+        batch_file = st.file_uploader("Upload form details", type=['csv', 'jsonl'])
+        include_pdf = st.checkbox("Include PDF copies", value=True)
+        if batch_file is not None and st.button("Generate Batch"):
+            try:
+                rows = read_rows(batch_file.getvalue(), batch_file.name)
+            except (ValueError, UnicodeDecodeError, csv.Error) as e:
+                st.error(f"Error reading batch file: {e}")
+                return
+            if not rows:
+                st.error("The batch file has no rows.")
+                return
+
+            progress = st.progress(0.0, text=f"Generating {len(rows)} contracts...")
+            def on_result(result):
+                progress.progress(result["row"] / len(rows), text=f"Generated {result['row']} of {len(rows)} contracts")
+
+            # The archive spills to disk once it outgrows BATCH_SPOOL_BYTES
+            with tempfile.SpooledTemporaryFile(max_size=BATCH_SPOOL_BYTES) as archive:
+                report = write_zip(generate_batch(selected_contract, rows, pdf=include_pdf), archive, on_result)
+                archive.seek(0)
+                archive_data = archive.read()
+            failed = sum(1 for entry in report if entry["status"] != "ok")
+            progress.empty()
+            if failed:
+                st.warning(f"{failed} of {len(report)} rows failed; see the report below and report.csv in the ZIP.")
+            else:
+                st.success(f"Generated {len(report)} contracts.")
+            st.dataframe(report)
+            st.download_button(
+                label="Download Contracts (ZIP)",
+                data=archive_data,
+                file_name=f'{selected_contract.lower().replace(" ", "_")}_batch.zip',
+                mime='application/zip'
+            )
 
         # Display legal compliance notice
         st.info("This contract generator is designed to comply with Indian laws. However, it is recommended to have the final contract reviewed by a legal professional to ensure full compliance with current regulations and your specific business needs.")
@@ -0,0 +1,189 @@
+"""Generate one contract per row of a CSV or JSONL file.
+
+Every row holds the form details of one contract (column or key names are
+the placeholders of placeholder_questions.json). Rows are spread across the
+shared process pool; each worker prepares the template once through its own
+template registry and then only fills and renders copies. Results are
+written to a ZIP as they come in, followed by report.csv with one status
+line per row.
+
+    python -m drafting.batch "Non-Disclosure Agreement" ndas.csv -o ndas.zip
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import time
+import zipfile
+from concurrent.futures.process import BrokenProcessPool
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(current_dir))
+
+from common.parallel import discard_executor, default_workers, get_executor
+from drafting.rendering import html_to_pdf, render_contract
+from drafting.template_engine import fill_template, missing_placeholders
+from drafting.template_registry import DOCS_DIR, get_template_registry
+
+# Rows kept in flight per worker; bounds memory for very large batches
+ROWS_PER_WORKER = 4
+
+REPORT_FIELDS = ["row", "status", "files", "missing_fields", "error"]
+
+def read_rows(data, filename):
+    """Form details from CSV or JSONL content (bytes or str), as a list of {placeholder: value}."""
+    if isinstance(data, bytes):
+        data = data.decode("utf-8-sig")
+    if filename.lower().endswith((".jsonl", ".json")):
+        rows = []
+        for line_number, line in enumerate(data.splitlines(), 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Line {line_number} is not valid JSON: {e}")
+            if not isinstance(row, dict):
+                raise ValueError(f"Line {line_number} is not a JSON object")
+            rows.append(row)
+    else:
+        rows = list(csv.DictReader(io.StringIO(data)))
+    return [
+        {str(key).strip(): "" if value is None else str(value) for key, value in row.items() if key is not None}
+        for row in rows
+    ]
+
+def template_path(selected_contract):
+    """Path of the template for a contract type; raises ValueError for an unknown type."""
+    template_filename = get_template_registry().contract_types().get(selected_contract)
+    if not template_filename:
+        raise ValueError(f"Unknown contract type: {selected_contract}")
+    return os.path.join(DOCS_DIR, template_filename)
+
+def file_stem(selected_contract, row_number):
+    return f'{selected_contract.lower().replace(" ", "_")}_{row_number:04d}'
+
+def generate_row(selected_contract, path, row_number, row, pdf=True):
+    """Fill and render one row. Returns {"row", "status", "files": {name: bytes}, "missing_fields", "error"}."""
+    result = {"row": row_number, "status": "ok", "files": {}, "missing_fields": [], "error": ""}
+    try:
+        doc, slots = get_template_registry().clone(selected_contract, path)
+        result["missing_fields"] = missing_placeholders(slots, row)
+        fill_template(doc, slots, row)
+        rendered = render_contract(doc, pdf=False)
+        stem = file_stem(selected_contract, row_number)
+        result["files"][f"{stem}.docx"] = rendered["docx"]
+        if pdf:
+            result["files"][f"{stem}.pdf"] = html_to_pdf(rendered["html"])
+    except Exception as e:
+        result["status"] = "error"
+        result["error"] = str(e)
+        result["files"] = {}
+    return result
+
+def generate_batch(selected_contract, rows, workers=None, pdf=True):
+    """Yield generate_row results for every row, in row order (rows are numbered from 1).
+
+    Rows run in the shared process pool with a bounded number in flight; with
+    one worker or a broken pool they run in this process.
+    """
+    path = template_path(selected_contract)
+    if workers is None:
+        workers = default_workers()
+    numbered = list(enumerate(rows, 1))
+    if workers <= 1 or len(numbered) < 2:
+        for row_number, row in numbered:
+            yield generate_row(selected_contract, path, row_number, row, pdf)
+        return
+
+    window = workers * ROWS_PER_WORKER
+    pending = []
+    position = 0
+    try:
+        executor = get_executor(workers)
+        while position < len(numbered) or pending:
+            while position < len(numbered) and len(pending) < window:
+                row_number, row = numbered[position]
+                pending.append((row_number, row, executor.submit(generate_row, selected_contract, path, row_number, row, pdf)))
+                position += 1
+            row_number, row, future = pending.pop(0)
+            try:
+                yield future.result()
+            except BrokenProcessPool as e:
+                print(f"Worker pool failed on row {row_number}, continuing serially: {e}")
+                discard_executor(workers)
+                for row_number, row, _ in [(row_number, row, None)] + pending:
+                    yield generate_row(selected_contract, path, row_number, row, pdf)
+                for row_number, row in numbered[position:]:
+                    yield generate_row(selected_contract, path, row_number, row, pdf)
+                return
+    except (OSError, RuntimeError) as e:
+        if position:
+            raise
+        print(f"Parallel generation unavailable, falling back to serial mode: {e}")
+        for row_number, row in numbered:
+            yield generate_row(selected_contract, path, row_number, row, pdf)
+    finally:
+        for _, _, future in pending:
+            if future is not None:
+                future.cancel()
+
+def write_zip(results, fileobj, on_result=None):
+    """Write every result's files into a ZIP on fileobj as they arrive, then report.csv.
+
+    on_result(result) is called after each row (e.g. for progress). Returns
+    the report rows.
+    """
+    report = []
+    with zipfile.ZipFile(fileobj, "w", zipfile.ZIP_DEFLATED) as archive:
+        for result in results:
+            for name, data in result["files"].items():
+                archive.writestr(name, data)
+            report.append({
+                "row": result["row"],
+                "status": result["status"],
+                "files": " ".join(result["files"]),
+                "missing_fields": "; ".join(result["missing_fields"]),
+                "error": result["error"],
+            })
+            if on_result is not None:
+                on_result(result)
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=REPORT_FIELDS)
+        writer.writeheader()
+        writer.writerows(report)
+        archive.writestr("report.csv", buffer.getvalue())
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate one contract per row of a CSV or JSONL file.")
+    parser.add_argument("contract_type", help='entry of contract_types.json, e.g. "Non-Disclosure Agreement"')
+    parser.add_argument("rows", help="CSV or JSONL file of form details")
+    parser.add_argument("-o", "--output", default=None, help="ZIP to write (default: <rows>.zip)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: LEGALEASE_PDF_WORKERS or the CPU count)")
+    parser.add_argument("--no-pdf", action="store_true", help="only write DOCX files")
+    args = parser.parse_args()
+
+    try:
+        template_path(args.contract_type)
+        with open(args.rows, "rb") as f:
+            rows = read_rows(f.read(), args.rows)
+    except (OSError, ValueError, csv.Error) as e:
+        parser.error(str(e))
+    output = args.output or os.path.splitext(args.rows)[0] + ".zip"
+
+    start = time.perf_counter()
+    with open(output, "wb") as f:
+        report = write_zip(generate_batch(args.contract_type, rows, args.workers, pdf=not args.no_pdf), f)
+    failed = [entry for entry in report if entry["status"] != "ok"]
+    print(f"{len(report) - len(failed)} of {len(report)} contracts written to {output} "
+          f"in {time.perf_counter() - start:.1f} s")
+    for entry in failed:
+        print(f"Row {entry['row']}: {entry['error']}")
+    if failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""In-memory rendering of a generated contract to DOCX, HTML and PDF.
+
+The document is serialized once and converted to HTML once; the same HTML
+feeds the preview and the PDF, and nothing is written to disk.
+"""
+import re
+from io import BytesIO
+
+import mammoth
+from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer
+
+DOCX_MIME = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+PDF_MIME = 'application/pdf'
+
+_BLOCK_END = re.compile('</p>|</h1>|</h2>')
+
+def document_bytes(doc):
+    """Serialize a python-docx Document to .docx bytes."""
+    buffer = BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+def docx_to_html(docx_bytes):
+    return mammoth.convert_to_html(BytesIO(docx_bytes)).value
+
+def _pdf_styles():
+    styles = getSampleStyleSheet()
+    styles.add(ParagraphStyle(name='Justify', alignment=TA_JUSTIFY))
+    styles.add(ParagraphStyle(name='Center', alignment=TA_CENTER))
+    return styles
+
+def html_to_pdf(html_content):
+    """Lay out mammoth's HTML as a PDF with reportlab: headings and justified paragraphs."""
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter)
+    styles = _pdf_styles()
+
+    flowables = []
+    for p in _BLOCK_END.split(html_content):
+        if p.strip():
+            if p.startswith('<h1'):
+                flowables.append(Paragraph(p.replace('<h1>', ''), styles['Heading1']))
+            elif p.startswith('<h2'):
+                flowables.append(Paragraph(p.replace('<h2>', ''), styles['Heading2']))
+            else:
+                flowables.append(Paragraph(p.replace('<p>', ''), styles['Justify']))
+            flowables.append(Spacer(1, 12))
+
+    doc.build(flowables)
+    return buffer.getvalue()
+
+def render_contract(doc, pdf=True):
+    """{"docx": bytes, "html": str, "pdf": bytes or None} for a generated contract."""
+    docx_bytes = document_bytes(doc)
+    html_content = docx_to_html(docx_bytes)
+    return {
+        "docx": docx_bytes,
+        "html": html_content,
+        "pdf": html_to_pdf(html_content) if pdf else None,
+    }
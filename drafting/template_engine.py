@@ -0,0 +1,140 @@
+"""Placeholder substitution for .docx contract templates.
+
+A template is parsed once into a list of placeholder slots. Each slot
+records which paragraph it is in and the run and character offsets where
+it starts and ends, so a placeholder that Word split across several runs
+is still found. Paragraphs in tables (including nested ones), headers and
+footers are covered as well as the body. Filling a document then visits
+each paragraph that has slots once and writes all values directly, with
+no per-placeholder regex or re-scanning.
+
+Placeholders look like "[Client Name]" or "[Insert Date: Client Name]";
+both are filled by the value for "Client Name", and the first also by a
+value for "Insert Date: Client Name".
+"""
+import bisect
+import re
+
+_PLACEHOLDER = re.compile(r"\[([^\[\]]+)\]")
+
+def _table_paragraphs(table):
+    for row in table.rows:
+        for cell in row.cells:
+            yield from _container_paragraphs(cell)
+
+def _container_paragraphs(container):
+    yield from container.paragraphs
+    for table in container.tables:
+        yield from _table_paragraphs(table)
+
+def iter_paragraphs(doc):
+    """Every paragraph of a document in a fixed order: body, tables, then headers and footers.
+
+    Merged table cells are visited once, and headers and footers linked to
+    the previous section are skipped.
+    """
+    seen = set()
+    def unique(paragraphs):
+        for paragraph in paragraphs:
+            if id(paragraph._p) in seen:
+                continue
+            seen.add(id(paragraph._p))
+            yield paragraph
+
+    yield from unique(_container_paragraphs(doc))
+    for section in doc.sections:
+        for part in (section.header, section.first_page_header, section.even_page_header,
+                     section.footer, section.first_page_footer, section.even_page_footer):
+            if part.is_linked_to_previous:
+                continue
+            yield from unique(_container_paragraphs(part))
+
+def _parse_paragraph(paragraph_index, paragraph):
+    """Slots of one paragraph: (paragraph index, start run, start offset, end run, end offset, names)."""
+    runs = paragraph.runs
+    texts = [run.text for run in runs]
+    text = "".join(texts)
+    if "[" not in text:
+        return []
+    starts = []
+    position = 0
+    for run_text in texts:
+        starts.append(position)
+        position += len(run_text)
+
+    slots = []
+    for match in _PLACEHOLDER.finditer(text):
+        inner = " ".join(match.group(1).split())
+        names = (inner, inner.rsplit(":", 1)[-1].strip()) if ":" in inner else (inner,)
+        # The run holding a character is the last run starting at or before it
+        start_run = bisect.bisect_right(starts, match.start()) - 1
+        end_run = bisect.bisect_right(starts, match.end() - 1) - 1
+        slots.append((
+            paragraph_index,
+            start_run, match.start() - starts[start_run],
+            end_run, match.end() - starts[end_run],
+            names,
+        ))
+    return slots
+
+def parse_template(doc):
+    """All placeholder slots of a document, in document order."""
+    slots = []
+    for paragraph_index, paragraph in enumerate(iter_paragraphs(doc)):
+        slots.extend(_parse_paragraph(paragraph_index, paragraph))
+    return slots
+
+def placeholder_names(slots):
+    """Distinct placeholder names in a template, in order of first appearance."""
+    names = []
+    for slot in slots:
+        name = slot[5][-1]
+        if name not in names:
+            names.append(name)
+    return names
+
+def missing_placeholders(slots, values):
+    """Placeholder names that fill_template would leave unfilled with these values."""
+    missing = []
+    for slot in slots:
+        names = slot[5]
+        if all(values.get(name) is None for name in names) and names[-1] not in missing:
+            missing.append(names[-1])
+    return missing
+
+def fill_template(doc, slots, values):
+    """Write values into the slots of doc (parsed from the same template) in one pass.
+
+    A placeholder without a value is left as it is. The value takes the
+    formatting of the run the placeholder starts in.
+    """
+    by_paragraph = {}
+    for slot in slots:
+        by_paragraph.setdefault(slot[0], []).append(slot)
+    if not by_paragraph:
+        return doc
+
+    for paragraph_index, paragraph in enumerate(iter_paragraphs(doc)):
+        paragraph_slots = by_paragraph.get(paragraph_index)
+        if not paragraph_slots:
+            continue
+        runs = paragraph.runs
+        texts = [run.text for run in runs]
+        changed = set()
+        # Right to left, so earlier offsets stay valid
+        for _, start_run, start_offset, end_run, end_offset, names in reversed(paragraph_slots):
+            value = next((values[name] for name in reversed(names) if name in values), None)
+            if value is None:
+                continue
+            if start_run == end_run:
+                texts[start_run] = texts[start_run][:start_offset] + str(value) + texts[start_run][end_offset:]
+            else:
+                texts[start_run] = texts[start_run][:start_offset] + str(value)
+                for middle in range(start_run + 1, end_run):
+                    texts[middle] = ""
+                texts[end_run] = texts[end_run][end_offset:]
+                changed.update(range(start_run + 1, end_run + 1))
+            changed.add(start_run)
+        for run_index in changed:
+            runs[run_index].text = texts[run_index]
+    return doc
@@ -0,0 +1,123 @@
+"""Process-wide cache of prepared contract templates and their JSON catalogues.
+
+A template is opened once, heading styles are applied and its placeholders
+are indexed (drafting.template_engine). The prepared document is kept
+pristine and every request works on a deep copy of it, which is cheaper
+than reading and parsing the .docx again. Files are checked by size and
+mtime on every lookup, so an edited template or JSON file is picked up
+without a restart.
+"""
+import copy
+import json
+import os
+import threading
+
+from docx import Document
+from docx.enum.style import WD_STYLE_TYPE
+from docx.shared import Pt
+
+from common.clauses import clause_marker
+from drafting.template_engine import parse_template, placeholder_names
+
+DRAFTING_DIR = os.path.dirname(os.path.abspath(__file__))
+DOCS_DIR = os.path.join(DRAFTING_DIR, "docs")
+CONTRACT_TYPES_PATH = os.path.join(DRAFTING_DIR, "contract_types.json")
+PLACEHOLDER_QUESTIONS_PATH = os.path.join(DRAFTING_DIR, "placeholder_questions.json")
+
+def _version(path):
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+def apply_heading_styles(doc, selected_contract):
+    """Style the contract title as Heading 1 and top-level clauses and sections as Heading 2."""
+    # Create styles if they don't exist
+    styles = doc.styles
+    if 'Heading 1' not in styles:
+        styles.add_style('Heading 1', WD_STYLE_TYPE.PARAGRAPH)
+        styles['Heading 1'].font.size = Pt(16)
+        styles['Heading 1'].font.bold = True
+    if 'Heading 2' not in styles:
+        styles.add_style('Heading 2', WD_STYLE_TYPE.PARAGRAPH)
+        styles['Heading 2'].font.size = Pt(14)
+        styles['Heading 2'].font.bold = True
+
+    for paragraph in doc.paragraphs:
+        # The title, then every top-level numbered clause ("1." to any
+        # number, Devanagari digits too) or section heading
+        if paragraph.text.startswith(selected_contract.upper()):
+            paragraph.style = styles['Heading 1']
+        else:
+            marker = clause_marker(paragraph.text)
+            if marker is not None and marker[2] in (0, 1):
+                paragraph.style = styles['Heading 2']
+    return doc
+
+class TemplateRegistry:
+    def __init__(self):
+        self._templates = {}
+        self._catalogues = {}
+        self._lock = threading.Lock()
+
+    def _catalogue(self, path):
+        """Parsed JSON file, re-read only when it changes. Raises FileNotFoundError or json.JSONDecodeError."""
+        version = _version(path)
+        with self._lock:
+            cached = self._catalogues.get(path)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        with open(path, 'r') as f:
+            data = json.load(f)
+        with self._lock:
+            self._catalogues[path] = (version, data)
+        return data
+
+    def contract_types(self):
+        """{contract type: template file name} from contract_types.json."""
+        return self._catalogue(CONTRACT_TYPES_PATH)
+
+    def placeholder_questions(self):
+        """{contract type: {placeholder: question}} from placeholder_questions.json."""
+        return self._catalogue(PLACEHOLDER_QUESTIONS_PATH)
+
+    def template(self, selected_contract, path):
+        """Prepared template: {"version", "document", "slots", "placeholders"}. Never modify the document."""
+        path = os.path.abspath(path)
+        version = _version(path)
+        key = (path, selected_contract)
+        with self._lock:
+            entry = self._templates.get(key)
+        if entry is not None and entry["version"] == version:
+            return entry
+
+        doc = apply_heading_styles(Document(path), selected_contract)
+        slots = parse_template(doc)
+        entry = {
+            "version": version,
+            "document": doc,
+            "slots": slots,
+            "placeholders": placeholder_names(slots),
+        }
+        with self._lock:
+            self._templates[key] = entry
+        return entry
+
+    def clone(self, selected_contract, path):
+        """(fresh copy of the prepared document, its placeholder slots)."""
+        entry = self.template(selected_contract, path)
+        return copy.deepcopy(entry["document"]), entry["slots"]
+
+    def clear(self):
+        with self._lock:
+            self._templates.clear()
+            self._catalogues.clear()
+
+_registry = None
+_registry_lock = threading.Lock()
+
+def get_template_registry():
+    """Process-wide template registry."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = TemplateRegistry()
+        return _registry
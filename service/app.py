@@ -0,0 +1,228 @@
+"""Headless HTTP/JSON service for summary, compliance and drafting.
+
+Exposes the same functions the Streamlit pages call, so the tool can run
+behind a load balancer without a browser session:
+
+    POST /v1/documents/process    extract the text of an uploaded document
+    POST /v1/documents/analyze    summarize a document's text
+    POST /v1/contracts/analyze    compliance analysis of a contract's text
+    POST /v1/contracts/generate   fill a contract template (DOCX, PDF or HTML)
+    GET  /v1/contract-types       contract types and their form fields
+    GET  /v1/jobs                 recent background jobs (?status=running)
+    GET  /v1/jobs/{job_id}        status and result of a background job
+
+The extraction and analysis endpoints take "async_job": true to return a
+job id at once (202) instead of waiting; poll /v1/jobs/{job_id} until its
+status is "done" or "failed". Jobs go through the machine's persistent
+job queue (common.job_queue), so any server process can answer a poll and
+at most LEGALEASE_MAX_JOBS jobs run at once. Requests that wait run on a
+worker thread of the server process.
+
+The Streamlit pages are not clients of this service: they call the same
+functions in-process, because they render the streamed partial results of
+summary and compliance analyses as they arrive, which these JSON
+endpoints do not carry. Both sides share the job queue, so background
+jobs submitted from the summary page can be polled here as well.
+
+    python -m service.app --host 0.0.0.0 --port 8000 --workers 4
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import threading
+from typing import Dict, Literal, Optional
+
+from dotenv import load_dotenv
+from fastapi import FastAPI, File, Form, HTTPException, UploadFile
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(current_dir))
+
+from common.ocr_engines import language_codes
+from compliance.llm_integration import LLMIntegration as ComplianceLLM
+from drafting.rendering import DOCX_MIME, PDF_MIME, render_contract
+from drafting.template_engine import fill_template
+from drafting.template_registry import DOCS_DIR, get_template_registry
+from common.job_queue import get_job_queue, start_workers
+from summary.document_processor import MAX_DOCUMENT_TOKENS, SUPPORTED_EXTENSIONS, process_document
+from summary.llm_integration import LLMIntegration as SummaryLLM
+
+load_dotenv()
+
+app = FastAPI(title="LegalEase", version="1")
+
+_llms = {}
+_llms_lock = threading.Lock()
+
+def _llm(kind):
+    """Shared LLMIntegration per kind ("summary" or "compliance"); 503 without an API key."""
+    with _llms_lock:
+        llm = _llms.get(kind)
+        if llm is None:
+            try:
+                llm = SummaryLLM() if kind == "summary" else ComplianceLLM()
+            except ValueError as e:
+                raise HTTPException(status_code=503, detail=str(e))
+            _llms[kind] = llm
+        return llm
+
+def _run(func, *args):
+    """Run func now and return its result, mapping bad input to 400 and a failed analysis to 502."""
+    try:
+        return func(*args)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=502, detail=str(e))
+
+def _job_view(job):
+    """What clients see of a queued job (no parameters or checkpoints)."""
+    return {
+        "id": job["id"],
+        "kind": job["handler"].rsplit(":", 1)[-1],
+        "status": job["status"],
+        "progress": job["progress"],
+        "message": job["message"],
+        "result": job["result"],
+        "error": job["error"],
+        "attempts": job["attempts"],
+        "created_at": job["created_at"],
+        "started_at": job["started_at"],
+        "finished_at": job["finished_at"],
+    }
+
+def _submit(handler, params, files=None):
+    """Queue a service.pipelines handler and return 202 with the new job."""
+    queue = get_job_queue()
+    job_id = queue.submit(f"service.pipelines:{handler}", params, files)
+    start_workers()
+    return JSONResponse(status_code=202, content=_job_view(queue.get(job_id)))
+
+class DocumentAnalysisRequest(BaseModel):
+    text: str
+    input_language: str = "English"
+    output_language: str = "English"
+    async_job: bool = False
+
+class ContractAnalysisRequest(BaseModel):
+    text: str
+    # Revisions sent under the same id only re-analyze changed clauses
+    document_id: Optional[str] = None
+    async_job: bool = False
+
+class GenerateRequest(BaseModel):
+    contract_type: str
+    form_details: Dict[str, str]
+    format: Literal["docx", "pdf", "html"] = "docx"
+
+def _extract(file_path, languages, max_tokens):
+    try:
+        return {"text": process_document(file_path, languages=languages, max_tokens=max_tokens)}
+    finally:
+        os.unlink(file_path)
+
+def _analyze_document(text, input_language, output_language):
+    analysis = _llm("summary").analyze_document(text, input_language, output_language)
+    if analysis is None:
+        raise RuntimeError("Document analysis failed")
+    return analysis
+
+def _analyze_contract(text, document_id):
+    llm = _llm("compliance")
+    if document_id:
+        return llm.analyze_contract_revision(text, document_id)
+    return llm.analyze_contract(text)
+
+@app.get("/health")
+def health():
+    return {"status": "ok"}
+
+@app.post("/v1/documents/process")
+def process(
+    file: UploadFile = File(...),
+    input_language: str = Form("English"),
+    max_tokens: int = Form(MAX_DOCUMENT_TOKENS),
+    async_job: bool = Form(False),
+):
+    suffix = os.path.splitext(file.filename or "")[1].lower()
+    if suffix not in SUPPORTED_EXTENSIONS:
+        raise HTTPException(status_code=400, detail=f"Unsupported file format: {suffix or 'none'}")
+    # The extractors work on paths; the file is removed once it is extracted
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp_file:
+        shutil.copyfileobj(file.file, tmp_file)
+    if async_job:
+        try:
+            return _submit("extract_document", {"input_language": input_language, "max_tokens": max_tokens},
+                           {"file": tmp_file.name})
+        finally:
+            # Still here only if the queue did not take the file
+            if os.path.exists(tmp_file.name):
+                os.unlink(tmp_file.name)
+    return _run(_extract, tmp_file.name, language_codes(input_language), max_tokens)
+
+@app.post("/v1/documents/analyze")
+def analyze_document(request: DocumentAnalysisRequest):
+    _llm("summary")
+    if request.async_job:
+        return _submit("analyze_document", {"text": request.text, "input_language": request.input_language,
+                                            "output_language": request.output_language})
+    return _run(_analyze_document, request.text, request.input_language, request.output_language)
+
+@app.post("/v1/contracts/analyze")
+def analyze_contract(request: ContractAnalysisRequest):
+    _llm("compliance")
+    if request.async_job:
+        return _submit("analyze_contract", {"text": request.text, "document_id": request.document_id})
+    return _run(_analyze_contract, request.text, request.document_id)
+
+@app.get("/v1/contract-types")
+def contract_types():
+    registry = get_template_registry()
+    questions = registry.placeholder_questions()
+    return {name: {"fields": questions.get(name, {})} for name in registry.contract_types()}
+
+@app.post("/v1/contracts/generate")
+def generate_document(request: GenerateRequest):
+    registry = get_template_registry()
+    template_filename = registry.contract_types().get(request.contract_type)
+    if not template_filename:
+        raise HTTPException(status_code=404, detail=f"Unknown contract type: {request.contract_type}")
+    doc, slots = registry.clone(request.contract_type, os.path.join(DOCS_DIR, template_filename))
+    fill_template(doc, slots, request.form_details)
+    rendered = render_contract(doc, pdf=request.format == "pdf")
+
+    file_name = f'{request.contract_type.lower().replace(" ", "_")}.{request.format}'
+    headers = {"Content-Disposition": f'attachment; filename="{file_name}"'}
+    if request.format == "html":
+        return Response(rendered["html"], media_type="text/html")
+    if request.format == "pdf":
+        return Response(rendered["pdf"], media_type=PDF_MIME, headers=headers)
+    return Response(rendered["docx"], media_type=DOCX_MIME, headers=headers)
+
+@app.get("/v1/jobs")
+def jobs(status: Optional[str] = None, limit: int = 50):
+    return [_job_view(job) for job in get_job_queue().list_jobs(status, limit)]
+
+@app.get("/v1/jobs/{job_id}")
+def job_status(job_id: str):
+    job = get_job_queue().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired job")
+    return _job_view(job)
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the LegalEase HTTP service.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=1, help="server processes")
+    args = parser.parse_args()
+
+    import uvicorn
+    uvicorn.run("service.app:app", host=args.host, port=args.port, workers=args.workers)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Job handlers for long requests, run by common.job_queue workers.
+
+Every handler takes a common.job_queue.JobContext and splits its work into
+checkpointed steps (extraction, then analysis), so a job picked up again
+after a worker died does not extract or analyze twice. PDF extraction also
+saves the records read so far every CHECKPOINT_PAGES pages, so it resumes
+from the last saved page rather than from the start.
+"""
+import os
+
+import fitz  # PyMuPDF
+
+from common.ocr_engines import language_codes
+from compliance.llm_integration import LLMIntegration as ComplianceLLM
+from summary.document_processor import MAX_DOCUMENT_TOKENS, budgeted_text, iter_document_pages, process_document
+from summary.llm_integration import LLMIntegration as SummaryLLM
+
+# Share of a summary job's progress bar taken by extraction
+EXTRACT_SHARE = 0.6
+
+# PDF pages extracted between two checkpoints of the records read so far
+CHECKPOINT_PAGES = 20
+
+def _page_count(file_path):
+    if os.path.splitext(file_path)[1].lower() != ".pdf":
+        return None
+    with fitz.open(file_path) as doc:
+        return len(doc)
+
+def _extract(ctx, share):
+    """Text of the job's "file", reporting page progress as the first share of the job."""
+    file_path = ctx.params["file"]
+    pages = _page_count(file_path)
+    def on_record(record):
+        if record["page"] is not None:
+            done = record["page"] + 1
+            ctx.progress(share * done / pages if pages else None,
+                         f"Extracted page {done}" + (f" of {pages}" if pages else ""))
+    languages = language_codes(ctx.params.get("input_language"))
+    max_tokens = ctx.params.get("max_tokens", MAX_DOCUMENT_TOKENS)
+    ctx.progress(0.0, "Extracting text")
+    if pages is None:
+        return process_document(file_path, languages=languages, progress=on_record, max_tokens=max_tokens)
+    text = budgeted_text(_checkpointed_records(ctx, file_path, languages), on_record, max_tokens)
+    # The step's result replaces the partial records
+    ctx.checkpoint.pop("pages", None)
+    return text
+
+def _checkpointed_records(ctx, file_path, languages):
+    """Records of a PDF, replaying those a previous attempt saved and saving new ones every CHECKPOINT_PAGES pages."""
+    saved = ctx.checkpoint.setdefault("pages", {"next_page": 0, "records": []})
+    yield from list(saved["records"])
+    records = iter_document_pages(file_path, languages=languages, first_page=saved["next_page"])
+    try:
+        for record in records:
+            # Every page before this one is complete
+            if record["page"] >= saved["next_page"] + CHECKPOINT_PAGES:
+                saved["next_page"] = record["page"]
+                ctx.save()
+            saved["records"].append(record)
+            yield record
+    finally:
+        records.close()
+
+def _summarize(ctx, text, share):
+    ctx.progress(share, "Analyzing the document")
+    analysis = SummaryLLM().analyze_document(
+        text, ctx.params.get("input_language", "English"), ctx.params.get("output_language", "English")
+    )
+    if analysis is None:
+        raise RuntimeError("Document analysis failed")
+    return analysis
+
+def extract_document(ctx):
+    """params: file, input_language, max_tokens. Result: {"text"}."""
+    return {"text": ctx.step("extract", lambda: _extract(ctx, 1.0))}
+
+def analyze_document(ctx):
+    """params: text, input_language, output_language. Result: the summary analysis."""
+    return ctx.step("analyze", lambda: _summarize(ctx, ctx.params["text"], 0.0))
+
+def summarize_document(ctx):
+    """params: file, file_name, input_language, output_language. Result: {"file_name", "text", "analysis"}."""
+    text = ctx.step("extract", lambda: _extract(ctx, EXTRACT_SHARE))
+    analysis = ctx.step("analyze", lambda: _summarize(ctx, text, EXTRACT_SHARE))
+    return {"file_name": ctx.params.get("file_name"), "text": text, "analysis": analysis}
+
+def analyze_contract(ctx):
+    """params: text, document_id (optional). Result: the compliance analysis."""
+    def analyze():
+        ctx.progress(0.0, "Analyzing the contract")
+        llm = ComplianceLLM()
+        if ctx.params.get("document_id"):
+            return llm.analyze_contract_revision(ctx.params["text"], ctx.params["document_id"])
+        return llm.analyze_contract(ctx.params["text"])
+    return ctx.step("analyze", analyze)
@@ -1,15 +1,100 @@
 import streamlit as st
 import os
+import sqlite3
+import sys
+import tempfile
+import time
 from dotenv import load_dotenv
-from document_processor import process_document
-from llm_integration import LLMIntegration
+
+# Add the parent directory to sys.path so the shared `common` package resolves
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from document_processor import MAX_DOCUMENT_TOKENS, process_document
+from llm_integration import LLMIntegration, SINGLE_PASS_TOKENS
+from common.ocr_engines import language_codes
+from common.job_queue import get_job_queue, start_workers
 import tiktoken
 
+# Streaming analyses are redrawn at most this often (seconds)
+RENDER_INTERVAL = 0.25
+
+# Background jobs are polled this often (seconds) while the page is open
+JOB_REFRESH_INTERVAL = 2.0
+
 def num_tokens_from_string(string: str, encoding_name: str = "cl100k_base") -> int:
     encoding = tiktoken.get_encoding(encoding_name)
     num_tokens = len(encoding.encode(string))
     return num_tokens
 
+def render_analysis(placeholder, analysis):
+    """Draw a (possibly partial) analysis into a placeholder, replacing what was there."""
+    with placeholder.container():
+        st.write("**Summary:**")
+        st.write(analysis.get("summary") or "...")
+        for title, field in (("Key Points", "key_points"), ("Legal Implications", "legal_implications"), ("Recommended Actions", "recommended_actions")):
+            if field in analysis:
+                st.write(f"**{title}:**")
+                for item in analysis.get(field) or []:
+                    st.write(f"• {item}")
+
+def submit_background_jobs(uploaded_files, input_language, output_language):
+    """Queue one summary job per upload and remember the job ids in the page URL."""
+    queue = get_job_queue()
+    job_ids = [job_id for job_id in st.query_params.get("jobs", "").split(",") if job_id]
+    for uploaded_file in uploaded_files:
+        file_extension = os.path.splitext(uploaded_file.name)[1].lower()
+        with tempfile.NamedTemporaryFile(delete=False, suffix=file_extension) as tmp_file:
+            tmp_file.write(uploaded_file.getbuffer())
+        try:
+            job_ids.append(queue.submit(
+                "service.pipelines:summarize_document",
+                {"file_name": uploaded_file.name, "input_language": input_language,
+                 "output_language": output_language, "max_tokens": MAX_DOCUMENT_TOKENS},
+                {"file": tmp_file.name},
+            ))
+        except (OSError, sqlite3.Error) as e:
+            # The queue moves the upload into the job's directory only once it accepts it
+            if os.path.exists(tmp_file.name):
+                os.unlink(tmp_file.name)
+            st.error(f"Failed to queue {uploaded_file.name}: {e}")
+    start_workers()
+    st.query_params["jobs"] = ",".join(job_ids)
+
+def render_background_jobs():
+    """Show the jobs listed in the page URL; reruns the page while any of them is unfinished."""
+    job_ids = [job_id for job_id in st.query_params.get("jobs", "").split(",") if job_id]
+    if not job_ids:
+        return
+    queue = get_job_queue()
+    pending = False
+    st.subheader("Background Summaries")
+    for job_id in job_ids:
+        job = queue.get(job_id)
+        if job is None:
+            continue
+        file_name = job["params"].get("file_name", job_id)
+        if job["status"] == "done":
+            st.subheader(f"Summary for {file_name}")
+            st.info(f"{file_name} token count: {num_tokens_from_string(job['result']['text'])}")
+            render_analysis(st.empty(), job["result"]["analysis"])
+        elif job["status"] == "failed":
+            st.error(f"Failed to summarize {file_name}: {job['error']}")
+        else:
+            pending = True
+            st.progress(job["progress"], text=f"{file_name}: {job['message'] or job['status']}")
+    if st.button("Clear finished summaries"):
+        st.query_params["jobs"] = ",".join(
+            job_id for job_id in job_ids if (queue.get(job_id) or {}).get("status") in ("queued", "running")
+        )
+        st.rerun()
+    if pending:
+        # Workers exit when idle, so make sure some are around for queued jobs
+        start_workers()
+        time.sleep(JOB_REFRESH_INTERVAL)
+        st.rerun()
+
 def main():
     load_dotenv()
     api_key = os.environ.get("GROQ_API_KEY")
@@ -26,7 +111,19 @@ def main():
 
     uploaded_files = st.file_uploader("Choose PDF, DOCX, or image files", type=["pdf", "docx", "png", "jpg", "jpeg", "tiff", "bmp"], accept_multiple_files=True)
 
-    if uploaded_files:
+    # Long scans can run in the job queue instead; the job ids are kept in
+    # the URL, so the results are still there after a refresh or a later visit
+    background = st.checkbox(
+        "Run in the background (you can leave this page and come back for the results)",
+        value=bool(st.query_params.get("jobs")),
+    )
+    if background:
+        if uploaded_files and st.button("Start background summary"):
+            submit_background_jobs(uploaded_files, input_language, output_language)
+        render_background_jobs()
+
+    if uploaded_files and not background:
+        documents = []
         for uploaded_file in uploaded_files:
             file_name = uploaded_file.name
             file_extension = os.path.splitext(file_name)[1].lower()
@@ -35,43 +132,58 @@ def main():
                 f.write(uploaded_file.getbuffer())
 
             try:
-                document_text = process_document(temp_file_path)
+                # Only the OCR models for the selected input language are loaded
+                status = st.empty()
+                def show_progress(record):
+                    if record["page"] is not None:
+                        status.caption(f"Extracting {file_name}: page {record['page'] + 1}")
+                document_text = process_document(temp_file_path, languages=language_codes(input_language), progress=show_progress, max_tokens=MAX_DOCUMENT_TOKENS)
+                status.empty()
                 
                 token_count = num_tokens_from_string(document_text)
-                if token_count > 8000:
-                    st.warning(f"Document text exceeds API limit (8000 tokens). Current token count: {token_count}. The text will be truncated.")
-                    document_text = document_text[:int(len(document_text) * (8000 / token_count))]
-                    st.info(f"Truncated token count: {num_tokens_from_string(document_text)}")
+                if token_count >= MAX_DOCUMENT_TOKENS * 15 // 16:
+                    st.warning(f"{file_name} is longer than {MAX_DOCUMENT_TOKENS} tokens. Only the first {token_count} tokens will be analyzed.")
+                elif token_count > SINGLE_PASS_TOKENS:
+                    st.info(f"{file_name} token count: {token_count}. It will be analyzed in parts and the results combined.")
                 else:
-                    st.info(f"Document token count: {token_count}")
+                    st.info(f"{file_name} token count: {token_count}")
+                documents.append((file_name, document_text))
+            except ValueError as e:
+                st.error(f"Error processing document {file_name}: {e}")
+            finally:
+                if os.path.exists(temp_file_path):
+                    os.remove(temp_file_path)
 
-                st.subheader(f"Summary for {file_name}")
-                
-                with st.spinner("Analyzing the document..."):
-                    analysis = llm.analyze_document(document_text, input_language, output_language)
-
-                if analysis:
-                    st.write("**Summary:**")
-                    st.write(analysis.get("summary", "No summary available"))
-                    st.write("**Key Points:**")
-                    for point in analysis.get("key_points", []):
-                        st.write(f"• {point}")
-                    st.write("**Legal Implications:**")
-                    for implication in analysis.get("legal_implications", []):
-                        st.write(f"• {implication}")
-                    st.write("**Recommended Actions:**")
-                    for action in analysis.get("recommended_actions", []):
-                        st.write(f"• {action}")
-                else:
+        if not documents:
+            return
+
+        # All uploads are analyzed concurrently through the shared LLM gateway,
+        # and each summary fills in while its completion is still streaming
+        placeholders = []
+        for file_name, _ in documents:
+            st.subheader(f"Summary for {file_name}")
+            placeholder = st.empty()
+            placeholder.caption("Analyzing the document...")
+            placeholders.append(placeholder)
+
+        analyses = [None] * len(documents)
+        rendered_at = [0.0] * len(documents)
+        for index, analysis in llm.stream_documents([document_text for _, document_text in documents], input_language, output_language):
+            analyses[index] = analysis
+            now = time.monotonic()
+            if analysis and now - rendered_at[index] >= RENDER_INTERVAL:
+                rendered_at[index] = now
+                render_analysis(placeholders[index], analysis)
+
+        for (file_name, document_text), analysis, placeholder in zip(documents, analyses, placeholders):
+            if analysis:
+                render_analysis(placeholder, analysis)
+            else:
+                with placeholder.container():
                     st.error("Failed to analyze the document. Please try again.")
                     st.write("Error details:")
                     st.write(f"Document text (first 500 characters): {document_text[:500]}...")
                     st.write(f"Token count: {num_tokens_from_string(document_text)}")
-            except ValueError as e:
-                st.error(f"Error processing document: {e}")
-            finally:
-                if os.path.exists(temp_file_path):
-                    os.remove(temp_file_path)
 
 if __name__ == "__main__":
     main()
@@ -1,14 +1,33 @@
-import fitz  # PyMuPDF
 from PIL import Image
-import easyocr
 import io
 import os
 import docx
 import tiktoken
 import numpy as np
+from functools import partial
 
-# Initialize the OCR reader with multiple languages
-reader = easyocr.Reader(['en', 'hi', 'mr'])  # Initialize for English, Hindi, and Marathi
+from common.extraction import iter_pdf, record_fragment
+from common.extraction_cache import lookup, store
+from common.ocr_engines import DEFAULT_LANGUAGES, get_reader
+
+# Bump whenever extraction output changes so cached results are invalidated
+EXTRACTOR_VERSION = "summary-4"
+
+SUPPORTED_EXTENSIONS = ['.pdf', '.docx', '.png', '.jpg', '.jpeg', '.tiff', '.bmp']
+
+# Extraction cap for documents that are analyzed in full. Long documents are
+# analyzed in chunks (see summary.llm_integration), so this is far above the
+# single-call default of process_document's max_tokens
+MAX_DOCUMENT_TOKENS = 100000
+
+# Batched OCR: images are padded (never stretched) to the next multiple of
+# OCR_SIZE_STEP on each side so they fall into a few same-size buckets.
+# Resolution is left to EasyOCR, which fits each image into OCR_CANVAS_SIZE
+# pixels (its own default); only larger images are scaled down here, keeping
+# their aspect ratio, so their padded size is known up front
+OCR_BATCH_SIZE = 8
+OCR_CANVAS_SIZE = 2560
+OCR_SIZE_STEP = 64
 
 def num_tokens_from_string(string: str, encoding_name: str = "cl100k_base") -> int:
     encoding = tiktoken.get_encoding(encoding_name)
@@ -21,71 +40,160 @@ def truncate_text(text: str, max_tokens: int = 8000) -> str:
     truncated = encoded[:max_tokens]
     return encoding.decode(truncated)
 
-def extract_text_from_pdf(file_path):
-    text = ''
-    try:
-        pdf_document = fitz.open(file_path)
-    except Exception as e:
-        raise ValueError(f"Error opening PDF file: {e}")
-    
-    for page_num in range(len(pdf_document)):
-        try:
-            page = pdf_document[page_num]
-            text += page.get_text()
-            
-            for img in page.get_images(full=True):
-                xref = img[0]
-                base_image = pdf_document.extract_image(xref)
-                image_bytes = base_image["image"]
-                image = Image.open(io.BytesIO(image_bytes))
-                image_text = extract_text_from_image(image)
-                if image_text:
-                    text += '\n' + image_text
-            
-            if num_tokens_from_string(text) >= 7500:
-                break
-        except Exception as e:
-            print(f"Error processing page {page_num}: {e}")
-            continue
-    
-    pdf_document.close()
-    return truncate_text(text)
+class TokenBudget:
+    """Running token count over text that is built up fragment by fragment.
+
+    Only each new fragment is encoded, so the cost stays linear in the size of
+    the document instead of re-encoding everything seen so far.
+    """
+    def __init__(self, limit: int = 7500, max_tokens: int = 8000, encoding_name: str = "cl100k_base"):
+        self.encoding = tiktoken.get_encoding(encoding_name)
+        self.limit = limit
+        self.max_tokens = max_tokens
+        self.count = 0
+        self.fragments = []
 
-def extract_text_from_docx(file_path):
-    text = ''
+    @property
+    def exhausted(self) -> bool:
+        return self.count >= self.limit
+
+    def add(self, fragment: str) -> int:
+        # Anything past max_tokens is cut from the fragment itself, so the
+        # final text never has to be encoded again to be truncated
+        if not fragment or self.count >= self.max_tokens:
+            return self.count
+        tokens = self.encoding.encode(fragment)
+        remaining = self.max_tokens - self.count
+        if len(tokens) > remaining:
+            tokens = tokens[:remaining]
+            fragment = self.encoding.decode(tokens)
+        self.fragments.append(fragment)
+        self.count += len(tokens)
+        return self.count
+
+    def text(self) -> str:
+        return ''.join(self.fragments)
+
+def _iter_pdf(file_path, workers=None, languages=DEFAULT_LANGUAGES, first_page=0):
+    # Every embedded image is OCR'd, in batches per page range
+    return iter_pdf(file_path, partial(ocr_images_batched, languages=languages), workers, first_page=first_page)
+
+def _iter_docx(file_path, languages=DEFAULT_LANGUAGES):
     try:
         doc = docx.Document(file_path)
     except Exception as e:
         raise ValueError(f"Error opening DOCX file: {e}")
     
     for para in doc.paragraphs:
-        text += para.text + '\n'
-        if num_tokens_from_string(text) >= 7500:
-            break
+        yield {"page": None, "text": para.text, "source": "paragraph"}
     
+    images = []
     for rel in doc.part.rels.values():
-        if num_tokens_from_string(text) >= 7500:
-            break
         try:
             if "image" in rel.target_ref:
                 image_part = rel.target_part
-                image = Image.open(io.BytesIO(image_part.blob))
-                image_text = extract_text_from_image(image)
-                if image_text:
-                    text += '\n' + image_text
+                images.append(Image.open(io.BytesIO(image_part.blob)))
         except Exception as e:
             print(f"Error processing image in DOCX: {e}")
             continue
-    
-    return truncate_text(text)
 
-def extract_text_from_image(image):
+    # OCR a few batches at a time so a consumer that stops early (e.g. on the
+    # token budget) never pays for the remaining images
+    step = OCR_BATCH_SIZE * 4
+    for offset in range(0, len(images), step):
+        for image_text in ocr_images_batched(images[offset:offset + step], languages):
+            if image_text:
+                yield {"page": None, "text": image_text, "source": "ocr"}
+
+def _iter_image_file(file_path, languages=DEFAULT_LANGUAGES):
+    try:
+        with Image.open(file_path) as image:
+            text = extract_text_from_image(image, languages)
+    except Exception as e:
+        raise ValueError(f"Error processing image file: {e}")
+    yield {"page": 0, "text": text, "source": "image"}
+
+def budgeted_text(records, progress=None, max_tokens=8000):
+    """Join records until the token budget is used up, then stop the extraction behind them."""
+    # Stop reading at 15/16 of the cap (7500 of the default 8000 tokens)
+    budget = TokenBudget(limit=max_tokens * 15 // 16, max_tokens=max_tokens)
+    try:
+        for record in records:
+            if progress is not None:
+                progress(record)
+            budget.add(record_fragment(record))
+            if budget.exhausted:
+                break
+    finally:
+        if hasattr(records, "close"):
+            records.close()
+    return budget.text()
+
+def extract_text_from_pdf(file_path, workers=None, languages=DEFAULT_LANGUAGES):
+    return budgeted_text(_iter_pdf(file_path, workers, languages))
+
+def extract_text_from_docx(file_path, languages=DEFAULT_LANGUAGES):
+    return budgeted_text(_iter_docx(file_path, languages))
+
+def _normalize_for_ocr(image):
+    """RGB array of the image on a white canvas whose sides are multiples of OCR_SIZE_STEP.
+
+    Padding puts similarly sized images in the same bucket without
+    distorting the text, and a bucket of same-sized arrays can go through
+    EasyOCR as one batch.
+    """
+    image = image.convert("RGB")
+    scale = min(1.0, OCR_CANVAS_SIZE / max(image.width, image.height))
+    if scale < 1.0:
+        image = image.resize((max(1, round(image.width * scale)), max(1, round(image.height * scale))))
+    width = -(-image.width // OCR_SIZE_STEP) * OCR_SIZE_STEP
+    height = -(-image.height // OCR_SIZE_STEP) * OCR_SIZE_STEP
+    array = np.full((height, width, 3), 255, dtype=np.uint8)
+    array[:image.height, :image.width] = np.asarray(image)
+    return array
+
+def ocr_images_batched(images, languages=DEFAULT_LANGUAGES, batch_size=None):
+    """OCR a list of PIL images in batches; returns one text per image, in input order."""
+    if not images:
+        return []
+    batch_size = batch_size or OCR_BATCH_SIZE
+    texts = [""] * len(images)
+
+    buckets = {}
+    for index, image in enumerate(images):
+        try:
+            array = _normalize_for_ocr(image)
+        except Exception as e:
+            print(f"Error preparing image for OCR: {e}")
+            continue
+        buckets.setdefault(array.shape, []).append((index, array))
+
+    reader = get_reader(languages)
+    for entries in buckets.values():
+        arrays = [array for _, array in entries]
+        try:
+            results = reader.readtext_batched(arrays, batch_size=batch_size, canvas_size=OCR_CANVAS_SIZE)
+        except Exception as e:
+            # Fall back to one image at a time rather than losing the bucket
+            print(f"Batched OCR failed, retrying images one by one: {e}")
+            results = []
+            for array in arrays:
+                try:
+                    results.append(reader.readtext(array, canvas_size=OCR_CANVAS_SIZE))
+                except Exception as e:
+                    print(f"Error extracting text from image: {e}")
+                    results.append([])
+        for (index, _), result in zip(entries, results):
+            texts[index] = ' '.join([detection[1] for detection in result])
+    return texts
+
+def extract_text_from_image(image, languages=DEFAULT_LANGUAGES):
     try:
         # Convert PIL Image to numpy array
         image_np = np.array(image)
         
-        # Use EasyOCR to extract text in multiple languages
-        result = reader.readtext(image_np)
+        # Use EasyOCR to extract text, loading the language models on first use
+        result = get_reader(languages).readtext(image_np)
         
         # Combine all detected text
         text = ' '.join([detection[1] for detection in result])
@@ -97,17 +205,64 @@ def extract_text_from_image(image):
         print(f"Error extracting text from image: {e}")
         return ""
 
-def process_document(file_path):
+def _cache_version(languages, kind):
+    return f"{EXTRACTOR_VERSION}-{kind}-{'+'.join(sorted(languages))}"
+
+def iter_document_pages(file_path, workers=None, use_cache=True, languages=DEFAULT_LANGUAGES, first_page=0):
+    """Yield extraction records in document order while the document is being extracted.
+
+    Each record is a dict with "text", "source" ("text" for a PDF text layer,
+    "paragraph" for a DOCX paragraph, "ocr" for an embedded image, "image" for
+    an image file) and "page" (the 0-based PDF page, None for DOCX). No token budget is applied; closing the
+    generator stops extraction. A document read to the end is cached and
+    later calls replay the cached records. first_page skips the PDF pages
+    before it, e.g. to resume an extraction that was cut short.
+    """
     file_extension = os.path.splitext(file_path)[1].lower()
+    if file_extension not in SUPPORTED_EXTENSIONS:
+        raise ValueError("Unsupported file format")
+
+    cache, key, cached = lookup(file_path, _cache_version(languages, "records"), use_cache)
+    if cached is not None:
+        for record in cached["records"]:
+            if record["page"] is None or record["page"] >= first_page:
+                yield record
+        return
+
     if file_extension == '.pdf':
-        return extract_text_from_pdf(file_path)
+        source = _iter_pdf(file_path, workers, languages, first_page)
     elif file_extension == '.docx':
-        return extract_text_from_docx(file_path)
-    elif file_extension in ['.png', '.jpg', '.jpeg', '.tiff', '.bmp']:
-        try:
-            with Image.open(file_path) as image:
-                return extract_text_from_image(image)
-        except Exception as e:
-            raise ValueError(f"Error processing image file: {e}")
+        source = _iter_docx(file_path, languages)
     else:
+        source = _iter_image_file(file_path, languages)
+
+    records = []
+    try:
+        for record in source:
+            records.append(record)
+            yield record
+    finally:
+        source.close()
+
+    # Only a whole document is cached
+    if first_page == 0:
+        store(cache, key, {"records": records})
+
+def process_document(file_path, workers=None, use_cache=True, languages=DEFAULT_LANGUAGES, progress=None, max_tokens=8000):
+    """Extract a document's text up to max_tokens.
+
+    progress, if given, is called with every record as it is extracted, so
+    a UI can report progress while pages are still being read.
+    """
+    file_extension = os.path.splitext(file_path)[1].lower()
+    if file_extension not in SUPPORTED_EXTENSIONS:
         raise ValueError("Unsupported file format")
+
+    # Reruns and repeat uploads of the same bytes are served from the cache
+    cache, key, cached = lookup(file_path, _cache_version(languages, f"text{max_tokens}"), use_cache)
+    if cached is not None:
+        return cached["text"]
+
+    text = budgeted_text(iter_document_pages(file_path, workers, use_cache, languages), progress, max_tokens)
+    store(cache, key, {"text": text})
+    return text
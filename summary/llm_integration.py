@@ -1,15 +1,34 @@
-import groq
-import json
+import asyncio
 import os
 import tiktoken
 
+from common.chunking import count_tokens, merge_unique, split_into_chunks
+from common.json_stream import JSONStreamParser, extract_json, parses_as
+from common.llm_gateway import get_gateway
+
+# Documents up to this size are analyzed in one call; longer ones are split
+# into clause-aligned chunks of CHUNK_TOKENS that are analyzed concurrently
+# (bounded by the gateway's concurrency limit) and merged in a reduce step
+SINGLE_PASS_TOKENS = 6000
+CHUNK_TOKENS = 3000
+
+# Expected top-level fields of an analysis; see common.json_stream.extract_json
+ANALYSIS_SCHEMA = {
+    "summary": str,
+    "key_points": list,
+    "legal_implications": list,
+    "recommended_actions": list,
+}
+
 class LLMIntegration:
-    def __init__(self, api_key=None):
+    def __init__(self, api_key=None, use_cache=True):
         if api_key is None:
             api_key = os.environ.get("GROQ_API_KEY")
         if api_key is None:
             raise ValueError("GROQ API key not provided and not found in environment variables")
-        self.client = groq.Groq(api_key=api_key)
+        self.gateway = get_gateway(api_key)
+        # Identical prompts are answered from the on-disk response cache unless disabled
+        self.use_cache = use_cache
 
     def _truncate_text(self, text: str, max_tokens: int = 8000) -> str:
         encoding = tiktoken.get_encoding("cl100k_base")
@@ -17,11 +36,114 @@ class LLMIntegration:
         truncated = encoded[:max_tokens]
         return encoding.decode(truncated)
 
+    async def _complete(self, system_prompt, prompt, model="llama3-8b-8192", temperature=0.3, max_tokens=4000, schema=None):
+        return await self.gateway.acomplete(
+            [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": prompt}
+            ],
+            model=model,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            use_cache=self.use_cache,
+            validate=parses_as(schema),
+        )
+
+    async def _stream(self, system_prompt, prompt, model="llama3-8b-8192", temperature=0.3, max_tokens=4000, schema=None):
+        """Yield completion deltas as the model generates them."""
+        async for delta in self.gateway.astream(
+            [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": prompt}
+            ],
+            model=model,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            use_cache=self.use_cache,
+            validate=parses_as(schema),
+        ):
+            yield delta
+
+    def _parse_json(self, response_content):
+        """Extract the analysis object from a response, repairing truncated output."""
+        parsed = extract_json(response_content, ANALYSIS_SCHEMA)
+        if parsed is None:
+            print("Error parsing response. Raw response content:")
+            print(response_content)
+        return parsed
+
     def analyze_document(self, document_text, input_language, output_language):
+        return self.gateway.run(self.aanalyze_document(document_text, input_language, output_language))
+
+    def stream_documents(self, document_texts, input_language, output_language):
+        """Analyze several documents concurrently, yielding (index, analysis) as each one takes shape.
+
+        Every document yields partial analyses while its completion streams,
+        then its final analysis (None on failure) as its last item.
+        """
+        for index, analysis in self.gateway.merge([
+            self.astream_document(document_text, input_language, output_language)
+            for document_text in document_texts
+        ]):
+            if isinstance(analysis, Exception):
+                print(f"Error calling the analysis model: {analysis}")
+                analysis = None
+            yield index, analysis
+
+    async def astream_document(self, document_text, input_language, output_language):
+        """Yield partial analyses as the fields of the completion are parsed, then the final analysis."""
+        if await asyncio.to_thread(count_tokens, document_text) > SINGLE_PASS_TOKENS:
+            # Chunked documents are combined in a reduce step, so there is nothing to stream
+            yield await self.aanalyze_document(document_text, input_language, output_language)
+            return
+
+        system_prompt, prompt = await asyncio.to_thread(self._analysis_prompt, document_text, input_language, output_language)
+        parser = JSONStreamParser()
+        last = None
+        try:
+            async for delta in self._stream(system_prompt, prompt, schema=ANALYSIS_SCHEMA):
+                parser.feed(delta)
+                partial = parser.partial()
+                if partial and partial != last:
+                    last = partial
+                    yield partial
+        except Exception as e:
+            print(f"Error calling the analysis model: {e}")
+            yield None
+            return
+        yield self._parse_json(parser.buffer)
+
+    async def aanalyze_document(self, document_text, input_language, output_language):
+        # Tokenizing and chunking run in a worker thread so they do not hold
+        # up the other requests on the gateway's loop
+        if await asyncio.to_thread(count_tokens, document_text) <= SINGLE_PASS_TOKENS:
+            return await self._analyze_part(document_text, input_language, output_language)
+
+        # Map: analyze clause-aligned chunks concurrently
+        chunks = await asyncio.to_thread(split_into_chunks, document_text, CHUNK_TOKENS)
+        partials = await asyncio.gather(*[
+            self._analyze_part(chunk, input_language, output_language, part, len(chunks))
+            for part, chunk in enumerate(chunks, start=1)
+        ])
+        partials = [partial for partial in partials if partial]
+        if not partials:
+            return None
+
+        # Reduce: merge the list fields and condense the partial summaries into one
+        return {
+            "summary": await self._reduce_summaries([partial.get("summary", "") for partial in partials], output_language),
+            "key_points": merge_unique(partial.get("key_points") for partial in partials),
+            "legal_implications": merge_unique(partial.get("legal_implications") for partial in partials),
+            "recommended_actions": merge_unique(partial.get("recommended_actions") for partial in partials),
+        }
+
+    def _analysis_prompt(self, document_text, input_language, output_language, part=None, parts=None):
+        """(system prompt, user prompt) asking for the JSON analysis of one document or part."""
         document_text = self._truncate_text(document_text)
+        scope = f"This is part {part} of {parts} of a longer document; analyze only this part.\n" if part else ""
         prompt = f"""
         Analyze the following legal document in {input_language}. Provide a comprehensive analysis including a summary, key points, legal implications, and recommended actions. If you're not confident about certain aspects, please indicate that.
-
+        {scope}
         Document text:
         {document_text}
 
@@ -36,35 +158,38 @@ class LLMIntegration:
         Ensure that your response is valid JSON. Escape any special characters in the text fields.
         The response should be a simplified yet legally valid summary of the document in {output_language}.
         """
+        system_prompt = f"You are an AI legal assistant specialized in analyzing {input_language} legal documents and providing insights in {output_language}."
+        return system_prompt, prompt
 
-        response = self.client.chat.completions.create(
-            model="llama3-8b-8192",
-            messages=[
-                {"role": "system", "content": f"You are an AI legal assistant specialized in analyzing {input_language} legal documents and providing insights in {output_language}."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.3,
-            max_tokens=4000,
+    async def _analyze_part(self, document_text, input_language, output_language, part=None, parts=None):
+        system_prompt, prompt = await asyncio.to_thread(
+            self._analysis_prompt, document_text, input_language, output_language, part, parts
         )
-
         try:
-            response_content = response.choices[0].message.content
-            # Remove triple backticks if present
-            response_content = response_content.strip('`')
-            parsed_response = json.loads(response_content)
-            return parsed_response
-        except json.JSONDecodeError as e:
-            print(f"Error parsing response: {e}")
-            print("Raw response content:")
-            print(response_content)
-            # Try to extract JSON from the response if it's wrapped in backticks
-            try:
-                json_start = response_content.index('{')
-                json_end = response_content.rindex('}') + 1
-                json_content = response_content[json_start:json_end]
-                return json.loads(json_content)
-            except:
-                return None
+            response_content = await self._complete(system_prompt, prompt, schema=ANALYSIS_SCHEMA)
         except Exception as e:
-            print(f"Unexpected error: {e}")
+            print(f"Error calling the analysis model: {e}")
             return None
+        return self._parse_json(response_content)
+
+    async def _reduce_summaries(self, summaries, output_language):
+        summaries = [summary for summary in summaries if summary]
+        joined = "\n\n".join(f"Part {i}: {summary}" for i, summary in enumerate(summaries, start=1))
+        prompt = f"""
+        The following are summaries of consecutive parts of one legal document.
+        Combine them into a single brief summary of the entire document in {output_language}.
+
+        {joined}
+
+        Return only the combined summary text, without any extra explanation.
+        """
+        try:
+            return (await self._complete(
+                f"You are an AI legal assistant that writes concise summaries of legal documents in {output_language}.",
+                prompt,
+                max_tokens=1000,
+            )).strip()
+        except Exception as e:
+            # The partial summaries are still useful on their own
+            print(f"Error combining summaries: {e}")
+            return "\n\n".join(summaries)
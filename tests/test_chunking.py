@@ -0,0 +1,9 @@
+from common.chunking import merge_unique
+
+def test_merge_unique_keeps_first_seen_order():
+    assert merge_unique([["a", "b"], None, ["b", "c"], [{"x": 1}, {"x": 1}]]) == ["a", "b", "c", {"x": 1}]
+
+def test_merge_unique_takes_a_string_as_one_item():
+    assert merge_unique([["Missing CIN"], "Notice period too short", "Missing CIN"]) == [
+        "Missing CIN", "Notice period too short",
+    ]
@@ -0,0 +1,53 @@
+import pytest
+
+from common.clauses import clause_boundaries, clause_marker, segment_clauses
+
+@pytest.mark.parametrize("line, expected", [
+    ("ARTICLE IV", ("heading", "ARTICLE IV", 0)),
+    ("ARTICLE IV DEFINITIONS", ("heading", "ARTICLE IV", 0)),
+    ("Section 5: Payment", ("heading", "Section 5", 0)),
+    ("Clause 3 - Termination", ("heading", "Clause 3", 0)),
+    ("SCHEDULE A", ("heading", "SCHEDULE A", 0)),
+    ("धारा 3", ("heading", "धारा 3", 0)),
+    ("1. Definitions", ("decimal", "1", 1)),
+    ("4.2 The Employee shall", ("decimal", "4.2", 2)),
+    ("१.२ कर्मचारी", ("decimal", "1.2", 2)),
+    ("(a) the employee", ("alpha", "a", None)),
+    ("(iv) the employer", ("roman", "iv", None)),
+])
+def test_markers(line, expected):
+    assert clause_marker(line) == expected
+
+@pytest.mark.parametrize("line", [
+    "Part-time employees are entitled to leave on a pro rata basis.",
+    "Part of the salary shall be paid in kind.",
+    "Section 5 of the Act applies here.",
+    "Clause 3 shall survive termination.",
+    "Schedule the payment within 30 days.",
+    "Chapter and verse of the policy are attached.",
+    "1.5 lakhs per annum is payable as a bonus.",
+    "30 days after the effective date.",
+    "2019 was the year of incorporation.",
+])
+def test_running_text_is_not_a_marker(line):
+    assert clause_marker(line) is None
+
+def test_wrapped_line_does_not_split_a_clause():
+    text = (
+        "1. Remuneration\n"
+        "The Employee shall receive a fixed salary of Rs.\n"
+        "1.5 lakhs per annum, payable monthly, subject to\n"
+        "Section 5 of the Act.\n"
+        "2. Termination\n"
+        "Either party may terminate on one month's notice.\n"
+    )
+    assert clause_boundaries(text) == [0, text.index("2. Termination")]
+
+def test_nesting():
+    text = "ARTICLE I\n1. Scope\n1.1 Services\n(a) design\n(b) build\n2. Fees\n"
+    root = segment_clauses(text)
+    article = root["children"][0]
+    assert article["label"] == "ARTICLE I"
+    assert [child["label"] for child in article["children"]] == ["1", "2"]
+    assert [child["label"] for child in article["children"][0]["children"]] == ["1.1"]
+    assert [child["label"] for child in article["children"][0]["children"][0]["children"]] == ["a", "b"]
@@ -0,0 +1,60 @@
+import os
+import sqlite3
+
+import fitz  # PyMuPDF
+import pytest
+
+from common.job_queue import JobContext, JobQueue
+from service import pipelines
+
+@pytest.fixture
+def queue(tmp_path, monkeypatch):
+    monkeypatch.setenv("LEGALEASE_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setenv("LEGALEASE_PDF_WORKERS", "1")
+    return JobQueue(str(tmp_path / "jobs" / "queue.sqlite3"))
+
+def _pdf(path, pages):
+    doc = fitz.open()
+    for number in range(pages):
+        doc.new_page().insert_text((72, 72), f"Page {number}")
+    doc.save(path)
+    doc.close()
+    return path
+
+def test_submit_moves_files(queue, tmp_path):
+    upload = tmp_path / "upload.pdf"
+    upload.write_bytes(b"%PDF")
+    job = queue.get(queue.submit("service.pipelines:extract_document", {}, {"file": str(upload)}))
+    assert not upload.exists()
+    assert os.path.exists(job["params"]["file"])
+
+def test_failed_submit_removes_moved_files(queue, tmp_path, monkeypatch):
+    upload = tmp_path / "upload.pdf"
+    upload.write_bytes(b"%PDF")
+    def broken():
+        raise sqlite3.OperationalError("database is locked")
+    monkeypatch.setattr(queue, "_connect", broken)
+    with pytest.raises(sqlite3.OperationalError):
+        queue.submit("service.pipelines:extract_document", {}, {"file": str(upload)})
+    assert os.listdir(queue.files_dir) == []
+
+def test_extraction_resumes_from_checkpoint(queue, tmp_path):
+    pages = 2 * pipelines.CHECKPOINT_PAGES + 5
+    upload = _pdf(str(tmp_path / "long.pdf"), pages)
+    job_id = queue.submit("service.pipelines:extract_document", {}, {"file": upload})
+
+    # The first attempt dies while reading the last page range
+    ctx = JobContext(queue, queue.get(job_id))
+    records = pipelines._checkpointed_records(ctx, ctx.params["file"], ["en"])
+    for record in records:
+        if record["page"] == pages - 1:
+            break
+    records.close()
+    checkpoint = queue.get(job_id)["checkpoint"]["pages"]
+    assert checkpoint["next_page"] == 2 * pipelines.CHECKPOINT_PAGES
+    assert [record["page"] for record in checkpoint["records"]] == list(range(checkpoint["next_page"]))
+
+    ctx = JobContext(queue, queue.get(job_id))
+    resumed = list(pipelines._checkpointed_records(ctx, ctx.params["file"], ["en"]))
+    assert [record["page"] for record in resumed] == list(range(pages))
+    assert resumed[-1]["text"].strip() == f"Page {pages - 1}"
@@ -0,0 +1,35 @@
+from common.json_stream import JSONStreamParser, extract_json
+
+def test_object_after_prose():
+    assert extract_json('Here you go: {"summary": "x", "score": 1} Thanks!') == {"summary": "x", "score": 1}
+
+def test_balanced_braces_in_prose_are_skipped():
+    assert extract_json('Fill in {name} first. {"summary": "y"}') == {"summary": "y"}
+
+def test_unclosed_brace_in_prose_is_skipped():
+    assert extract_json('prose { not json { "summary": "z" }') == {"summary": "z"}
+
+def test_truncated_object_is_repaired():
+    assert extract_json('{"summary": "a", "issues": ["b", "c') == {"summary": "a", "issues": ["b", "c"]}
+
+def test_braces_inside_strings():
+    assert extract_json('{"summary": "uses { and } and \\" quotes"}') == {"summary": 'uses { and } and " quotes'}
+
+def test_no_object():
+    assert extract_json("no json here") is None
+    assert extract_json('just { an open brace') is None
+
+def test_streamed_deltas():
+    parser = JSONStreamParser()
+    text = 'Sure. {"summary": "streamed", "key_points": ["one", "two"]}'
+    partials = []
+    for i in range(0, len(text), 5):
+        parser.feed(text[i:i + 5])
+        partials.append(parser.partial())
+    assert parser.done
+    assert parser.result() == {"summary": "streamed", "key_points": ["one", "two"]}
+    assert {"summary": "streamed"} in partials
+
+def test_schema_conforms_missing_fields():
+    value = extract_json('{"summary": "s", "key_points": "only one"}', {"summary": str, "key_points": list, "notes": str})
+    assert value == {"summary": "s", "key_points": ["only one"], "notes": ""}
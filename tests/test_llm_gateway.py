@@ -0,0 +1,220 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+from common import response_cache as response_cache_module
+from common.disk_cache import DiskCache
+from common.json_stream import parses_as
+from common.llm_gateway import LLMGateway, TokenBucket
+
+MESSAGES = [{"role": "user", "content": "hello"}]
+
+class StubServer:
+    """Chat completions endpoint on localhost that plays back scripted responses.
+
+    Each entry of `script` is (status, body, headers) and answers one
+    request; once the script runs out every request gets `default`. A body
+    that is a list is sent as server-sent events, one "data:" line per item.
+    """
+    def __init__(self, script=(), default=None, delay=0.0):
+        self.script = list(script)
+        self.default = default or (200, _completion("ok"), {})
+        self.delay = delay
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                with stub.lock:
+                    stub.requests += 1
+                    stub.in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+                    status, body, headers = stub.script.pop(0) if stub.script else stub.default
+                try:
+                    time.sleep(stub.delay)
+                    self.send_response(status)
+                    for name, value in headers.items():
+                        self.send_header(name, value)
+                    if isinstance(body, list):
+                        self.send_header("Content-Type", "text/event-stream")
+                        self.end_headers()
+                        for event in body:
+                            self.wfile.write(f"data: {event}\n\n".encode("utf-8"))
+                            self.wfile.flush()
+                    else:
+                        data = json.dumps(body).encode("utf-8")
+                        self.send_header("Content-Type", "application/json")
+                        self.send_header("Content-Length", str(len(data)))
+                        self.end_headers()
+                        self.wfile.write(data)
+                finally:
+                    with stub.lock:
+                        stub.in_flight -= 1
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+def _completion(content):
+    return {"choices": [{"message": {"content": content}}]}
+
+def _events(*deltas):
+    return [json.dumps({"choices": [{"delta": {"content": delta}}]}) for delta in deltas] + ["[DONE]"]
+
+@pytest.fixture
+def stub():
+    servers = []
+    def make(*args, **kwargs):
+        server = StubServer(*args, **kwargs)
+        servers.append(server)
+        return server
+    yield make
+    for server in servers:
+        server.close()
+
+def _gateway(server, **kwargs):
+    options = {"max_concurrency": 4, "requests_per_minute": 60000, "max_retries": 3,
+               "timeout": 10.0, "backoff_base": 0.01, "backoff_cap": 0.05}
+    options.update(kwargs)
+    return LLMGateway("test-key", server.url, **options)
+
+def test_complete(stub):
+    server = stub(default=(200, _completion("hi there"), {}))
+    gateway = _gateway(server)
+    assert gateway.complete(MESSAGES, "model", use_cache=False) == "hi there"
+    assert gateway.metrics[-1]["attempts"] == 1
+
+def test_retries_429_and_5xx(stub):
+    server = stub(script=[
+        (429, {"error": "slow down"}, {"Retry-After": "0"}),
+        (503, {"error": "unavailable"}, {}),
+    ], default=(200, _completion("done"), {}))
+    gateway = _gateway(server)
+    assert gateway.complete(MESSAGES, "model", use_cache=False) == "done"
+    assert server.requests == 3
+    assert gateway.metrics[-1]["attempts"] == 3
+    assert gateway.metrics[-1]["status"] == 200
+
+def test_retries_give_up(stub):
+    server = stub(default=(500, {"error": "broken"}, {}))
+    gateway = _gateway(server, max_retries=2)
+    with pytest.raises(httpx.HTTPStatusError):
+        gateway.complete(MESSAGES, "model", use_cache=False)
+    assert server.requests == 3
+
+def test_client_errors_are_not_retried(stub):
+    server = stub(default=(400, {"error": "bad request"}, {}))
+    gateway = _gateway(server)
+    with pytest.raises(httpx.HTTPStatusError):
+        gateway.complete(MESSAGES, "model", use_cache=False)
+    assert server.requests == 1
+
+def test_backoff_honours_retry_after(stub):
+    gateway = _gateway(stub(), backoff_base=0.01, backoff_cap=0.05)
+    assert gateway._backoff(0, "2") == 2.0
+    assert gateway._backoff(10) <= 0.05
+    assert gateway._backoff(0, "not a number") <= 0.01
+
+def test_concurrency_limit(stub):
+    server = stub(delay=0.2)
+    gateway = _gateway(server, max_concurrency=2)
+    async def many():
+        return await asyncio.gather(*[
+            gateway.acomplete(MESSAGES, "model", use_cache=False) for _ in range(6)
+        ])
+    assert gateway.run(many()) == ["ok"] * 6
+    assert server.max_in_flight == 2
+
+def test_token_bucket_rate():
+    async def acquire_all():
+        bucket = TokenBucket(rate=20, capacity=2)
+        start = time.monotonic()
+        for _ in range(6):
+            await bucket.acquire()
+        return time.monotonic() - start
+    # Two tokens are there at once; the other four come at 20 per second
+    assert 0.18 <= asyncio.run(acquire_all()) < 1.0
+
+def test_stream(stub):
+    server = stub(default=(200, _events("Hel", "lo", "!"), {}))
+    gateway = _gateway(server)
+    assert list(gateway.stream(MESSAGES, "model", use_cache=False)) == ["Hel", "lo", "!"]
+    assert gateway.metrics[-1]["first_delta"] is not None
+
+def test_stream_retries_before_first_delta(stub):
+    server = stub(script=[(429, {"error": "slow down"}, {"Retry-After": "0"})],
+                  default=(200, _events("after", " retry"), {}))
+    gateway = _gateway(server)
+    assert "".join(gateway.stream(MESSAGES, "model", use_cache=False)) == "after retry"
+    assert server.requests == 2
+
+def test_stream_raises(stub):
+    server = stub(default=(400, {"error": "bad request"}, {}))
+    gateway = _gateway(server)
+    with pytest.raises(httpx.HTTPStatusError):
+        list(gateway.stream(MESSAGES, "model", use_cache=False))
+
+def test_merge_yields_errors_per_iterable(stub):
+    gateway = _gateway(stub())
+    async def good():
+        yield "a"
+        yield "b"
+    async def bad():
+        yield "x"
+        raise ValueError("broken stream")
+    items = {0: [], 1: []}
+    for index, item in gateway.merge([good(), bad()]):
+        items[index].append(item)
+    assert items[0] == ["a", "b"]
+    assert items[1][0] == "x"
+    assert isinstance(items[1][1], ValueError)
+    assert len(items[1]) == 2
+
+@pytest.fixture
+def response_cache(tmp_path, monkeypatch):
+    cache = DiskCache(str(tmp_path / "llm"), max_bytes=1024 * 1024, ttl=3600)
+    monkeypatch.setattr(response_cache_module, "_cache", cache)
+    monkeypatch.setenv("LEGALEASE_LLM_CACHE", "1")
+    return cache
+
+def test_only_valid_completions_are_cached(stub, response_cache):
+    server = stub(script=[(200, _completion("not json"), {})],
+                  default=(200, _completion('{"summary": "ok"}'), {}))
+    gateway = _gateway(server)
+    validate = parses_as({"summary": str})
+    # The unparseable answer is not kept, so the retry asks the model again
+    assert gateway.run(gateway.acomplete(MESSAGES, "model", validate=validate)) == "not json"
+    assert gateway.run(gateway.acomplete(MESSAGES, "model", validate=validate)) == '{"summary": "ok"}'
+    assert gateway.run(gateway.acomplete(MESSAGES, "model", validate=validate)) == '{"summary": "ok"}'
+    assert server.requests == 2
+
+def test_unfinished_streams_are_not_cached(stub, response_cache):
+    server = stub(script=[(200, _events('{"summary": ', '"cut')[:-1], {})],
+                  default=(200, _events('{"summary": ', '"ok"}'), {}))
+    gateway = _gateway(server)
+    validate = parses_as({"summary": str})
+    def stream():
+        async def collect():
+            return "".join([delta async for delta in gateway.astream(MESSAGES, "model", validate=validate)])
+        return gateway.run(collect())
+    # No [DONE]: the text is handed out but not cached
+    assert stream() == '{"summary": "cut'
+    assert stream() == '{"summary": "ok"}'
+    assert stream() == '{"summary": "ok"}'
+    assert server.requests == 2
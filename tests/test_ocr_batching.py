@@ -0,0 +1,64 @@
+import io
+from functools import partial
+
+import fitz  # PyMuPDF
+import numpy as np
+from PIL import Image
+
+from summary import document_processor
+from common.extraction import extract_page_range
+from summary.document_processor import OCR_CANVAS_SIZE, OCR_SIZE_STEP, _normalize_for_ocr, ocr_images_batched
+
+class ShadeReader:
+    """Stands in for EasyOCR: "reads" an image as the grey level of its top-left pixel."""
+    def __init__(self):
+        self.batches = []
+
+    def readtext_batched(self, arrays, batch_size=1, canvas_size=2560):
+        self.batches.append([array.shape for array in arrays])
+        return [self.readtext(array) for array in arrays]
+
+    def readtext(self, array, canvas_size=2560):
+        return [(None, f"shade{array[0, 0, 0]}", 1.0)]
+
+def _image(shade, size):
+    return Image.new("RGB", size, (shade, shade, shade))
+
+def _png(image):
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+def test_normalize_pads_without_stretching():
+    image = Image.new("RGB", (1000, 90), (0, 0, 0))
+    array = _normalize_for_ocr(image)
+    assert array.shape == (128, 1024, 3)
+    # The image keeps its own size in the corner; the rest is white padding
+    assert (array[:90, :1000] == 0).all()
+    assert (array[90:] == 255).all() and (array[:, 1000:] == 255).all()
+
+def test_normalize_fits_large_scans_to_the_canvas():
+    array = _normalize_for_ocr(Image.new("RGB", (2480, 3508), (0, 0, 0)))
+    assert array.shape[0] == OCR_CANVAS_SIZE
+    assert array.shape[0] % OCR_SIZE_STEP == 0 and array.shape[1] % OCR_SIZE_STEP == 0
+    # 2480 x 3508 scaled to a 2560 long side keeps its aspect ratio before padding
+    assert (array[:, :round(2480 * OCR_CANVAS_SIZE / 3508)] == 0).all()
+
+def test_batched_text_goes_back_to_its_page(tmp_path, monkeypatch):
+    reader = ShadeReader()
+    monkeypatch.setattr(document_processor, "get_reader", lambda languages: reader)
+    layout = [[(10, (200, 100)), (20, (600, 300))], [], [(30, (200, 100))]]
+    doc = fitz.open()
+    for images in layout:
+        page = doc.new_page()
+        for number, (shade, size) in enumerate(images):
+            page.insert_image(fitz.Rect(50, 50 + 200 * number, 250, 150 + 200 * number), stream=_png(_image(shade, size)))
+    path = str(tmp_path / "scans.pdf")
+    doc.save(path)
+    doc.close()
+
+    pages = extract_page_range(path, 0, len(layout), partial(ocr_images_batched, languages=["en"]))
+    assert [page["page"] for page in pages] == [0, 1, 2]
+    assert [page["ocr"] for page in pages] == [["shade10", "shade20"], [], ["shade30"]]
+    # Same-size images share one batch, the other size gets its own
+    assert sorted(len(batch) for batch in reader.batches) == [1, 2]
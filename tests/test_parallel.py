@@ -0,0 +1,17 @@
+import os
+
+from common.parallel import WORKER_THREADS, discard_executor, get_executor, split_page_ranges
+
+def _thread_settings():
+    return os.environ.get("OMP_NUM_THREADS"), os.environ.get("MKL_NUM_THREADS")
+
+def test_workers_run_limited_threads():
+    executor = get_executor(2)
+    try:
+        assert executor.submit(_thread_settings).result(timeout=30) == (str(WORKER_THREADS), str(WORKER_THREADS))
+    finally:
+        discard_executor(2)
+
+def test_split_page_ranges():
+    assert split_page_ranges(10, 3) == [(0, 4), (4, 7), (7, 10)]
+    assert split_page_ranges(2, 8) == [(0, 1), (1, 2)]
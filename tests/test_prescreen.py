@@ -0,0 +1,42 @@
+import pytest
+
+from compliance.prescreen import prescreen
+
+def _checks(text):
+    return [finding["check"] for finding in prescreen(text)["findings"]]
+
+@pytest.mark.parametrize("clause", [
+    "Either party may terminate this agreement with a notice period of one month.",
+    "Either party may terminate this agreement by giving thirty (30) days' written notice.",
+    "Either party may terminate this agreement by giving thirty (30) days’ written notice.",
+    "Either party may terminate this agreement on one month’s notice.",
+    "Either party may terminate this agreement on two months' notice.",
+    "Either party may terminate this agreement on fifteen (15) days notice.",
+    "Either party may terminate this agreement by notice in writing of not less than 30 days.",
+    "Either party may terminate this agreement by giving notice of 60 days.",
+])
+def test_notice_period_phrasings(clause):
+    assert "notice_period" not in _checks(clause)
+
+def test_termination_without_notice():
+    assert "notice_period" in _checks("The employer may terminate the employee at any time.")
+
+def test_notice_period_not_required_without_termination():
+    assert "notice_period" not in _checks("The employee shall keep all information confidential.")
+
+def test_wage_match_does_not_hide_termination():
+    findings = prescreen("Salary upon termination shall be Rs. 100 per day.")["findings"]
+    checks = [finding["check"] for finding in findings]
+    assert "minimum_wage" in checks
+    assert "notice_period" in checks
+
+def test_minimum_wage_monthly_figure():
+    assert "minimum_wage" not in _checks("The salary shall be Rs. 30,000 per month.")
+    assert "minimum_wage" in _checks("The salary shall be Rs. 3,000 per month.")
+
+def test_dividend_payment_period():
+    assert "dividend_payment_period" in _checks("Dividends declared shall be paid within 45 days.")
+    assert "dividend_payment_period" not in _checks("Dividends declared shall be paid within 30 days.")
+
+def test_loan_to_director():
+    assert "loan_to_director" in _checks("The company may grant loans to any director of the company.")
@@ -0,0 +1,111 @@
+import json
+
+import pytest
+
+from common.disk_cache import DiskCache
+from compliance import llm_integration, revisions
+from compliance.revisions import clause_hash, pack_runs, plan_revision
+
+BODY = "The parties agree that this clause sets out obligations in plain words for testing purposes only."
+
+def _clauses(*texts):
+    return [(clause_hash(text), text) for text in texts]
+
+def _contract(*names):
+    return "\n".join(f"{number}. {name.upper()}\n{BODY} Clause {name}." for number, name in enumerate(names, start=1))
+
+def test_plan_reuses_units_whose_clauses_remain():
+    old = _clauses("a", "b", "c", "d")
+    previous = {"units": [{"clauses": [old[0][0], old[1][0]]}, {"clauses": [old[2][0], old[3][0]]}]}
+    reused, runs = plan_revision(_clauses("a", "b", "x", "c", "d2"), previous)
+    assert [position for position, _ in reused] == [0]
+    assert runs == [[2, 3, 4]]
+
+def test_plan_places_repeated_boilerplate_at_its_own_occurrence():
+    boiler = "Notices shall be in writing."
+    old = _clauses("a", boiler, "b", boiler)
+    previous = {"units": [{"clauses": [old[0][0], old[1][0]]}, {"clauses": [old[2][0], old[3][0]]}]}
+    reused, runs = plan_revision(old, previous)
+    # The second unit's copy of the boilerplate is the one at index 3, not the first occurrence
+    assert [position for position, _ in reused] == [0, 2]
+    assert runs == []
+
+def test_pack_runs_splits_on_the_token_limit():
+    clauses = _clauses("one two", "three four", "five", "six seven eight")
+    units = pack_runs(clauses, [[0, 1, 2, 3]], 4, lambda text: len(text.split()))
+    assert units == [[0, 1], [2, 3]]
+
+class StubModel:
+    """Stands in for the model: answers every clause prompt with a fixed analysis."""
+    def __init__(self, fail=()):
+        self.prompts = []
+        self.fail = list(fail)
+
+    async def complete(self, prompt, model=None, max_tokens=None, schema=None):
+        self.prompts.append(prompt)
+        for marker in self.fail:
+            if marker in prompt:
+                self.fail.remove(marker)
+                raise RuntimeError("model unavailable")
+        if "Combine them" in prompt:
+            return json.dumps({"summary": "combined", "overall_assessment": "fine"})
+        return json.dumps({"summary": "part", "balance_score": 50, "compliance_check": {},
+                           "key_clauses": [], "overall_assessment": "ok"})
+
+    def clause_prompts(self):
+        return [prompt for prompt in self.prompts if "Contract text:" in prompt]
+
+@pytest.fixture
+def analyze(tmp_path, monkeypatch):
+    monkeypatch.setattr(revisions, "_store", DiskCache(str(tmp_path / "revisions"), max_bytes=1024 * 1024))
+    # One clause per unit, counted in words so no tokenizer download is needed
+    monkeypatch.setattr(llm_integration, "CHUNK_TOKENS", 1)
+    monkeypatch.setattr(llm_integration, "count_tokens", lambda text: len(text.split()))
+    monkeypatch.setattr(llm_integration.LLMIntegration, "_relevant_provisions", lambda self, text: "")
+    llm = llm_integration.LLMIntegration(api_key="test-key")
+    def run(model, text, document_id="agreement"):
+        monkeypatch.setattr(llm, "_complete", model.complete)
+        return llm.analyze_contract_revision(text, document_id)
+    return run
+
+def test_unchanged_revision_makes_no_calls(analyze):
+    text = _contract("alpha", "beta", "gamma")
+    analyze(StubModel(), text)
+    model = StubModel()
+    result = analyze(model, text)
+    assert model.prompts == []
+    assert result["revision"]["reanalyzed_clauses"] == 0
+
+def test_edited_clause_reanalyzes_only_its_unit(analyze):
+    analyze(StubModel(), _contract("alpha", "beta", "gamma"))
+    model = StubModel()
+    result = analyze(model, _contract("alpha", "betamax", "gamma"))
+    assert len(model.clause_prompts()) == 1
+    assert "Clause betamax." in model.clause_prompts()[0]
+    assert "part 2 of 3" in model.clause_prompts()[0]
+    assert result["revision"] == {"version": 2, "clauses": 3, "reanalyzed_clauses": 1, "reused_units": 2}
+
+def test_inserted_clause(analyze):
+    analyze(StubModel(), _contract("alpha", "beta", "gamma"))
+    model = StubModel()
+    result = analyze(model, _contract("alpha", "beta", "gamma", "delta"))
+    assert len(model.clause_prompts()) == 1
+    assert "Clause delta." in model.clause_prompts()[0]
+    assert "part 4 of 4" in model.clause_prompts()[0]
+    assert result["revision"]["reused_units"] == 3
+
+def test_failed_unit_is_retried(analyze):
+    text = _contract("alpha", "beta", "gamma")
+    first = StubModel(fail=["Clause beta."])
+    analyze(first, text)
+    assert len(first.clause_prompts()) == 3
+    # Same text again: the revision is not complete, so the failed clause is asked for once more
+    model = StubModel()
+    result = analyze(model, text)
+    assert len(model.clause_prompts()) == 1
+    assert "Clause beta." in model.clause_prompts()[0]
+    assert result["revision"]["reanalyzed_clauses"] == 1
+    # Now every unit is stored and nothing is re-analyzed
+    model = StubModel()
+    analyze(model, text)
+    assert model.prompts == []
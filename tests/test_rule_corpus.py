@@ -0,0 +1,32 @@
+from compliance.rule_corpus import SectionCursor, get_corpus, split_listing
+
+def test_split_listing():
+    assert split_listing("Punishment for personation.  58. Refusal of registration.  59. Rectification of register.") == [
+        (None, "Punishment for personation."), ("58", "Refusal of registration."), ("59", "Rectification of register."),
+    ]
+
+def test_split_listing_ignores_wrapped_cross_references():
+    assert split_listing("in addition to the audit under section  143.  (5) The qualifications apply.") == [
+        (None, "in addition to the audit under section 143. (5) The qualifications apply."),
+    ]
+
+def test_cursor_carries_sections_into_the_schedules():
+    cursor = SectionCursor()
+    assert cursor.place("Punishment for fraud.", "447") == ("447", None)  # table of contents
+    assert cursor.place("Registered office of company.— (1) A company shall", "12") == ("12", None)
+    assert cursor.place("(2) The company shall furnish") == ("12", None)
+    assert cursor.place("Subs. by Act 21 of 2015, s. 11.", "1") == ("12", None)  # footnote
+    assert cursor.place("Publication of name by company.— (1) Every company", "12A") == ("12A", None)
+    assert cursor.place("(2) Every company shall paint") == ("12A", None)
+    assert cursor.place("Alteration of memorandum.— (1) Save as provided", "13") == ("13", None)
+    assert cursor.place("(i) Every person whose name is entered as a member", "2") == (None, "2")
+    assert cursor.place("within such other period as the conditions of issue provide") == (None, "2")
+    assert cursor.place("(i) The proceeds of the sale shall be received", "12") == (None, "12")
+
+def test_shipped_corpus_sections():
+    rules = get_corpus()["rules"]
+    proceeds = [rule for rule in rules if rule["rule"].startswith("(i) The proceeds of the sale shall be received")]
+    assert proceeds and all(rule["section"] is None and rule["regulation"] == "12" for rule in proceeds)
+    office = [rule for rule in rules if rule["rule"].startswith("(2) The company shall furnish to the Registrar verification")]
+    assert office and all(rule["section"] == "12" for rule in office)
+    assert sum(rule["section"] is None and rule["regulation"] is None for rule in rules) < len(rules) * 0.05
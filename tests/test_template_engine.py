@@ -0,0 +1,24 @@
+from docx import Document
+
+from drafting.template_engine import fill_template, missing_placeholders, parse_template
+
+def _template(*paragraphs):
+    doc = Document()
+    for text in paragraphs:
+        doc.add_paragraph(text)
+    return doc
+
+def test_missing_matches_fill():
+    doc = _template("Between [Party: Name] and [Company].", "Dated [Date].")
+    slots = parse_template(doc)
+    # The full label fills a slot just as well as the name after the colon
+    values = {"Party: Name": "Alice", "Date": None}
+    assert missing_placeholders(slots, values) == ["Company", "Date"]
+    fill_template(doc, slots, values)
+    assert doc.paragraphs[0].text == "Between Alice and [Company]."
+    assert doc.paragraphs[1].text == "Dated [Date]."
+
+def test_nothing_missing():
+    doc = _template("[Party: Name] signs on [Date].")
+    slots = parse_template(doc)
+    assert missing_placeholders(slots, {"Name": "Bob", "Date": "today"}) == []
@@ -0,0 +1,59 @@
+import docx
+import pytest
+import tiktoken
+
+from summary import document_processor
+from summary.document_processor import budgeted_text, iter_document_pages
+
+@pytest.fixture
+def encoding(monkeypatch):
+    """cl100k_base when it can be loaded; offline, a byte-level stand-in so the budget logic is still tested."""
+    try:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        stand_in = tiktoken.Encoding(name="bytes", pat_str=r"\S+|\s+",
+                                     mergeable_ranks={bytes([i]): i for i in range(256)}, special_tokens={})
+        monkeypatch.setattr(document_processor.tiktoken, "get_encoding", lambda name: stand_in)
+        return stand_in
+
+def _docx(path, paragraphs):
+    doc = docx.Document()
+    for text in paragraphs:
+        doc.add_paragraph(text)
+    doc.save(path)
+    return path
+
+def _read(path, max_tokens):
+    seen = []
+    text = budgeted_text(iter_document_pages(path, use_cache=False), seen.append, max_tokens)
+    return text, len(seen)
+
+def test_stops_at_fifteen_sixteenths_of_the_cap(tmp_path, encoding):
+    paragraphs = [f"Clause {n}: the supplier shall deliver the goods on time." for n in range(200)]
+    path = _docx(str(tmp_path / "long.docx"), paragraphs)
+    max_tokens = 320
+    text, read = _read(path, max_tokens)
+
+    counts = [len(encoding.encode(paragraph + "\n")) for paragraph in paragraphs]
+    total, expected = 0, 0
+    while total < max_tokens * 15 // 16:
+        total += counts[expected]
+        expected += 1
+    # Reading stops with the paragraph that crosses 15/16 of the cap
+    assert read == expected
+    assert text == "".join(paragraph + "\n" for paragraph in paragraphs[:expected])[:len(text)]
+    assert len(encoding.encode(text)) <= max_tokens
+
+def test_fragment_is_cut_at_the_cap(tmp_path, encoding):
+    long_paragraph = " ".join(f"word{n}" for n in range(2000))
+    path = _docx(str(tmp_path / "one.docx"), ["Short opening.", long_paragraph, "Never read."])
+    max_tokens = 100
+    text, read = _read(path, max_tokens)
+    assert read == 2
+    assert len(encoding.encode(text)) == max_tokens
+    assert text.startswith("Short opening.\n" + long_paragraph[:20])
+    assert "Never read." not in text
+
+def test_short_document_is_kept_whole(tmp_path, encoding):
+    path = _docx(str(tmp_path / "short.docx"), ["First.", "Second."])
+    assert _read(path, 8000) == ("First.\nSecond.\n", 2)